@@ -1,42 +1,18 @@
-import requests
 import os
 import psycopg2
 from dotenv import load_dotenv
 from datetime import datetime
 from urllib.parse import urlparse
+from ingest_versions import bump_ingest_version, TIDE
+import marine_client
 
 if os.getenv('ENV') != 'production':
     load_dotenv('config.env')
 
 def fetch_tide(lat, lng, location_id):
-    api_key = os.getenv('API_KEY')
-    
-    if not api_key:
-        print('Error: API key not found')
-        return
-        
-    base_url = "http://api.worldweatheronline.com/premium/v1/marine.ashx"
-    params = {
-        'key': api_key,
-        'format': 'json',
-        'q': f'{lat},{lng}',
-        'tide': 'yes',
-    }
-
-    response = requests.get(base_url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        print("API Response:", data)
-
-        try:
-            if 'data' in data and data['data'].get('weather'):
-                weather_data = data['data']['weather']
-                insert_tide_data(location_id, weather_data)
-            else:
-                print("Warning: 'weather' data not found in the API response.")
-        except KeyError as e:
-            print(f"KeyError: {str(e)} - Tide data not found in the API response.")
+    weather_data = marine_client.client.weather(lat, lng)
+    if weather_data is not None:
+        insert_tide_data(location_id, weather_data)
 
 def insert_tide_data(location_id, weather_data):
     DATABASE_URL = os.getenv('DATABASE_URL')
@@ -84,6 +60,7 @@ def insert_tide_data(location_id, weather_data):
                         (location_id, tide_time, tide_height, tide_type, tide_date)
                     )
 
+        bump_ingest_version(cursor, location_id, TIDE)
         conn.commit() 
 
     except Exception as e:
@@ -1,174 +1,358 @@
 import os
+import functools
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import psycopg2
+import db_pool
+from location_overrides import apply_coordinate_overrides
+from location_registry import LocationRegistry
+from ingest_versions import IngestVersions, cache_control, SURF, TIDE, GRAPH, SCORE
+from forecast_data import (
+    serialize_time, serialize_date, build_combined_data, build_combined_data_many,
+    SURF_SELECT, TIDE_SELECT, GRAPH_POINTS_SELECT, SCORES_SELECT, surf_row, tide_row, graph_point_row, score_row,
+)
+from combined_json import fetch_combined_json
+from field_selection import request_projection
+import columnar
+import graph_binary
+import payload_store
+import best_sessions
+from json_encoding import FastJSONProvider, iter_json_array, dumps_json
+from forecast_time import (
+    local_now, parse_window, from_now_window, apply_window, empty_is_not_found, ForecastWindow,
+    surf_timestamp_sql, tide_timestamp_sql, graph_timestamp_sql,
+)
+from region_overview import fetch_region_overview
+from region_ranking import fetch_region_ranking, parse_ranking_args
+from spatial_index import SpotIndex, spot_summary
+from map_clusters import ClusterPyramid
+import compression
+from single_flight import SingleFlight, CoalescingMetrics
 from datetime import datetime, timedelta, time as time_type
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Most locations one batch request may ask for
+MAX_BATCH_LOCATIONS = int(os.getenv('MAX_BATCH_LOCATIONS', '50'))
+# Rows fetched from the database per round trip while streaming a response
+STREAM_BATCH_ROWS = int(os.getenv('STREAM_BATCH_ROWS', '500'))
+# Most spots a nearest-spots lookup returns
+MAX_NEAREST_SPOTS = 50
+# Forecast horizon (hours) for the region overview
+DEFAULT_OVERVIEW_HOURS = 6
+MAX_OVERVIEW_HOURS = 48
+# Surf rows are 3-hour forecast slots; "from now" windows keep the slot in progress
+SURF_SLOT_HOURS = 3
+# Per-worker best-session caches: built series per location, ranked results per query
+SESSION_SERIES_CACHE_ENTRIES = int(os.getenv('SESSION_SERIES_CACHE_ENTRIES', '256'))
+SESSION_RESULT_CACHE_ENTRIES = int(os.getenv('SESSION_RESULT_CACHE_ENTRIES', '2048'))
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed, stdlib json otherwise
 CORS(app)
 
-# OVERRIDE LOCATIONS!!!!!!
-LOCATION_COORDINATE_OVERRIDES = {
-    
-    # !!!!NORCAL!!!!
-    
-    106: {'latitude': 34.329648, 'longitude': -119.405961},  # Faria
-    108: {'latitude': 34.317135, 'longitude': -119.374548},  # Mondos
-    110: {'latitude': 34.306946, 'longitude': -119.359833},  # Solimar
-    120: {'latitude': 34.150716, 'longitude': -119.222780},  # Silver Strand
-    
- 
-    
-    #  !!!!SOCAL!!!!!!
-    
-    
-    218: {'latitude': 32.926921, 'longitude': -117.261348},  # Torrey Pines
-    220: {'latitude': 32.883053, 'longitude': -117.256193},  # Blacks
-    222: {'latitude': 32.865790, 'longitude': -117.256182},  # Scripps  
-    223: {'latitude': 32.862438, 'longitude': -117.257255},  # La Jolla  
-    224: {'latitude': 32.837644, 'longitude': -117.283237},  # Horseshoe  
-    232: {'latitude': 32.752517, 'longitude': -117.255807},  # Ocean Beach  
-    233: {'latitude': 32.736865, 'longitude': -117.256585},  # Sunset Cliffs 
-    # 198: {'latitude': 33.085983, 'longitude': -117.313915},  # Ponto  
-    # 200: {'latitude': 33.076462, 'longitude': -117.310942},  # Grandview  
-    # 202: {'latitude': 33.065375, 'longitude': -117.307658},  # Beacons  
-    # 204: {'latitude': 33.047037, 'longitude': -117.298923},  # Moonlight  
-    # 205: {'latitude': 33.045603, 'longitude': -117.298806},  # D-Street  
-    # 206: {'latitude': 33.033844, 'longitude': -117.295402},  # Swami's  
-    # 208: {'latitude': 33.024358, 'longitude': -117.289884},  # Pipes  
-    210: {'latitude': 33.013240, 'longitude': -117.283262},  # Cardiff Reef  
-    212: {'latitude': 33.001681, 'longitude': -117.282118},  # Seaside Reef  
-    214: {'latitude': 32.974702, 'longitude': -117.271754},  # River Mouth  
-
-  
-    
-    
-    # !!!!MEXICO!!!!!!
-    
-    
-    268: {'latitude': 32.056660, 'longitude': -116.884037},  # La Salina  
-    269: {'latitude': 32.035890, 'longitude': -116.886783},  # El Paso  
-    271: {'latitude': 31.975145, 'longitude': -116.790638},  # Salsipuedes  
-    272: {'latitude': 31.899349, 'longitude': -116.731289},  # San Miguel  
-    273: {'latitude': 31.877028, 'longitude': -116.688175},  # 3Ms  
-    274: {'latitude': 31.869540, 'longitude': -116.679793},  # Stacks 
-    # 277: {'latitude': 31.462509, 'longitude': -116.589201},  # Light House  
-    # 278: {'latitude': 31.328248, 'longitude': -116.455489},  # Punta Cabras  
-    # 280: {'latitude': 30.855740, 'longitude': -116.171328},  # 4 Casas  
-    # 308: {'latitude': 22.895806, 'longitude': -109.868477},  # Monuments  
+def get_db_connection():
+    """Borrows a connection from this worker's pool; hand it back with release_db_connection."""
+    try:
+        return db_pool.getconn()
+    except psycopg2.Error as e:
+        print(f"Database connection error: {e}")
+        raise
 
- 
 
+def release_db_connection(conn):
+    """Returns a borrowed connection to the pool (rolled back, or discarded if broken)."""
+    db_pool.putconn(conn)
 
-        
-    # !!!!MAUI!!!!!!
-    
-    432: {'latitude': 20.864631, 'longitude': -156.165437},  # Honomanu
-   
-    436: {'latitude': 20.590686, 'longitude': -156.414735},  # Perouse Bay  
-    437: {'latitude': 20.612308, 'longitude': -156.437565},  # Dumps  
-    439: {'latitude': 20.634524, 'longitude': -156.452177},  # Little Beach  
-    441: {'latitude': 20.727902, 'longitude': -156.451735},  # The Cove  
-
-    454: {'latitude': 21.017501, 'longitude': -156.641494},  # Honolua Bay
-    456: {'latitude': 21.026671, 'longitude': -156.630644},  # WindMills
-    457: {'latitude': 21.023738, 'longitude': -156.610418},  # Honokohau
-    463: {'latitude': 20.937247, 'longitude': -156.354435},  # Pavillions
-    
-    
 
-    
-    # !!!!OAHU!!!!!!
-    
-        # !!!!SOUTH SHORE!!!!!!
+# Locations live in memory per worker, overrides applied, reloaded when location_version changes
+location_registry = LocationRegistry(apply_coordinate_overrides)
 
-    
-    504: {'latitude': 21.284179, 'longitude': -157.67278},   # Sandy Beach
-    506: {'latitude': 21.255018, 'longitude': -157.794234},  # Black Point
-    508: {'latitude': 21.252854, 'longitude': -157.805273},  # Diamond
-    512: {'latitude': 21.26771, 'longitude': -157.824682},   # Publics
-    516: {'latitude': 21.272952, 'longitude': -157.831626},  # Waikiki
-    518: {'latitude': 21.272100, 'longitude': -157.832826},  # Populars
-    520: {'latitude': 21.275351, 'longitude': -157.833866},  # Threes
-    522: {'latitude': 21.276619, 'longitude': -157.83917},   # Fours
-    524: {'latitude': 21.276452, 'longitude': -157.841549},  # Kaisers
-    526: {'latitude': 21.281239, 'longitude': -157.845857},  # Bowls
-    528: {'latitude': 21.28576, 'longitude': -157.851543},   # Ala Moana
-    530: {'latitude': 21.299028, 'longitude': -157.875976},  # Sand Island
-    532: {'latitude': 21.301940, 'longitude': -158.002802},  # Ewa
-    534: {'latitude': 21.294790, 'longitude': -158.106832},  # Barbers
-    
-        # !!!!NORTH SHORE!!!!!!
-        
-    542: {'latitude': 21.595378, 'longitude': -158.108636},  # Hale'iwa
-    544: {'latitude': 21.61922, 'longitude': -158.087975},   # Laniakea
-    546: {'latitude': 21.622838, 'longitude': -158.084584},  # Jockos
-    548: {'latitude': 21.624339, 'longitude': -158.082737},  # Chuns
-    552: {'latitude': 21.659598, 'longitude': -158.059782},  # Log Cabins
-    554: {'latitude': 21.661639, 'longitude': -158.056826},  # Rockpile
-    556: {'latitude': 21.662891, 'longitude': -158.055381},  # Off The Wall
-    558: {'latitude': 21.663689, 'longitude': -158.054756},  # Backdoor
-    559: {'latitude': 21.664735, 'longitude': -158.053571},  # Pipeline
-    560: {'latitude': 21.667839, 'longitude': -158.050055},  # Chambers
-    562: {'latitude': 21.669923, 'longitude': -158.048039},  # Rocky Point
-    564: {'latitude': 21.679007, 'longitude': -158.04112},   # Sunset
-    566: {'latitude': 21.684658, 'longitude': -158.032643},  # Velzyland
-
-}
-
-def apply_coordinate_overrides(location_data):
+# KD-tree over the registry's (overridden) coordinates, rebuilt whenever the registry reloads
+spot_index = SpotIndex()
+location_registry.on_reload(spot_index.rebuild)
+
+# Per-zoom grid clusters for the map, also rebuilt only when the registry reloads
+cluster_pyramid = ClusterPyramid()
+location_registry.on_reload(cluster_pyramid.rebuild)
+
+
+# Per-location ingest run versions, used for ETags / 304s without fetching any data rows
+ingest_versions = IngestVersions()
+
+# Compressed bodies of ETag-tagged responses, and per-endpoint compression ratios (per worker)
+compressed_bodies = compression.CompressedBodyCache()
+compression_metrics = compression.CompressionMetrics()
+
+# Identical concurrent combined-data reads share one fetch; coalescing_metrics counts the savings
+coalescing_metrics = CoalescingMetrics()
+combined_reads = SingleFlight('combined', coalescing_metrics)
+
+# Best-session series and rankings, keyed by the ingest source they were built from
+session_series = best_sessions.LRUCache(SESSION_SERIES_CACHE_ENTRIES)
+session_results = best_sessions.LRUCache(SESSION_RESULT_CACHE_ENTRIES)
+
+
+def json_response(body, status=200):
+    """Wraps already-serialized JSON bytes in a response."""
+    return app.response_class(body, status=status, mimetype='application/json')
+
+
+def request_window(location_id, lookback_hours=0, default=None, from_now=False, allow_all=False):
     """
-    Applies coordinate overrides to a location's data if the location ID exists in the overrides dictionary.
+    The ?start=&end=&hours= window for a location's forecast rows, in the spot's local time.
+    from_now makes the default an open window from the current hour (less lookback_hours);
+    allow_all lets ?all=1 ask for every stored row instead (None).
     """
-    location_id = location_data['id']
-    if location_id in LOCATION_COORDINATE_OVERRIDES:
-        override = LOCATION_COORDINATE_OVERRIDES[location_id]
-        location_data['latitude'] = override['latitude']
-        location_data['longitude'] = override['longitude']
-    return location_data
+    location = location_registry.get(location_id)
+    region = location['region'] if location else None
+    if from_now:
+        default = from_now_window(region, lookback_hours)
+    return parse_window(request.args, region, lookback_hours, default, allow_all)
 
 
-def get_db_connection():
-    try:
-        DATABASE_URL = os.environ.get('DATABASE_URL')
-        if DATABASE_URL:
-            conn = psycopg2.connect(DATABASE_URL, sslmode='require')
-        else:
-            conn = psycopg2.connect(
-                dbname="surf_forecast",
-                user="orlandosantos",
-                host="localhost",
-                port="5432"
-            )
-        return conn
-    except psycopg2.Error as e:
-        print(f"Database connection error: {e}")
-        raise
+def request_format(formats=columnar.SERIES_FORMATS):
+    """Body format the request asked for (?format= or Accept), e.g. 'v2'; ValueError if ?format= is unknown."""
+    return columnar.negotiate_format(request.args.get('format'), request.accept_mimetypes, formats)
 
 
-# Utility functions to serialize date and time
-def serialize_time(value):
-    if isinstance(value, datetime):
-        return value.strftime('%H:%M')
-    elif isinstance(value, time_type):  # Use time_type to avoid conflict
-        return value.strftime('%H:%M')
-    elif isinstance(value, str):
-        try:
-            time_obj = datetime.strptime(value, '%H:%M')
-            return time_obj.strftime('%H:%M')
-        except ValueError:
+def conditional(*datasets, include_location=False, window_lookback=None, window_from_now=False, window_all=False,
+                formats=None):
+    """
+    Tags 200 responses with an ETag derived from the location's ingest versions and a
+    Cache-Control lifetime that runs until the next scheduled ingest. A matching
+    If-None-Match is answered with 304 before the view (and its queries) ever runs, and a
+    body already compressed for this ETag is served from memory the same way.
+    With window_lookback set, the route takes ?start=&end=&hours= and the resolved window
+    is part of the ETag ("from now" windows also cap max-age at the next hour); window_from_now
+    routes default to such a window when none is given, and window_all ones take ?all=1
+    for every stored row. With formats
+    (a columnar format table) set, the route serves several body formats, which Accept may pick.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(location_id, **kwargs):
+            forecast_window = None
+            body_format = 'v1'
             try:
-                time_obj = datetime.strptime(value, '%I:%M %p')
-                return time_obj.strftime('%H:%M')
+                if window_lookback is not None:
+                    forecast_window = request_window(location_id, window_lookback, from_now=window_from_now,
+                                                     allow_all=window_all)
+                if formats:
+                    body_format = request_format(formats)
             except ValueError:
-                return value
-    return value
+                return view(location_id, **kwargs)  # the view answers 400
+            try:
+                extra = (location_registry.version,) if include_location else ()
+                if forecast_window is not None:
+                    extra += (forecast_window.key(),)
+                if body_format != 'v1':
+                    extra += (body_format,)
+                etag = ingest_versions.etag(location_id, datasets, request.full_path, extra)
+            except Exception as e:
+                print(f"ETag lookup error: {e}")
+                etag = None
+            if etag is None:
+                return view(location_id, **kwargs)
+
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = cached_compressed_response(etag)
+                if response is None:
+                    response = app.make_response(view(location_id, **kwargs))
+                    if response.status_code != 200:
+                        return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = cache_control(
+                max_age_limit=forecast_window.valid_seconds if forecast_window else None)
+            response.vary.add('Accept-Encoding')
+            if formats:
+                response.vary.add('Accept')
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_compressed_response(etag):
+    """Response from the compressed-body cache in the best encoding the client accepts, or None."""
+    for encoding in compression.acceptable(request.accept_encodings):
+        entry = compressed_bodies.get(etag, encoding)
+        if entry is not None:
+            body, raw_size = entry
+            compression_metrics.record(request.endpoint, raw_size, len(body), cache_hit=True)
+            response = json_response(body)
+            response.headers['Content-Encoding'] = encoding
+            return response
+    return None
+
+
+@app.after_request
+def compress_response(response):
+    """
+    Compresses JSON/text bodies in the encoding negotiated from Accept-Encoding. Bodies tagged
+    with an ETag are kept in the compressed-body cache; streamed bodies are gzipped as they
+    stream. Bodies under COMPRESSION_MIN_BYTES and pre-encoded bodies are left alone.
+    """
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in compression.COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    etag, _ = response.get_etag()
+    endpoint = request.endpoint
+
+    if response.is_streamed:
+        if request.accept_encodings['gzip'] <= 0:
+            return response
+
+        def on_complete(raw_size, chunks):
+            body = b''.join(chunks)
+            compression_metrics.record(endpoint, raw_size, len(body))
+            if etag is not None:
+                compressed_bodies.put(etag, 'gzip', body, raw_size)
+
+        response.response = compression.iter_gzip(response.iter_encoded(), on_complete)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    encoding = compression.negotiate(request.accept_encodings)
+    body = response.get_data()
+    if encoding is None or len(body) < compression.COMPRESSION_MIN_BYTES:
+        return response
+    compressed = compression.compress(body, encoding, cached=etag is not None)
+    if etag is not None:
+        compressed_bodies.put(etag, encoding, compressed, len(body))
+    compression_metrics.record(endpoint, len(body), len(compressed))
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def stream_json_rows(sql, params, format_row, not_found_message):
+    """
+    Streams the query's rows as a JSON array while the cursor is read, so the full row list and
+    its dicts never sit in memory together. The connection is held until the stream finishes.
+    Answers 404 with not_found_message when there are no rows, or [] if it is None.
+    """
+    conn = get_db_connection()
+    try:
+        # Server-side cursors need a transaction, which autocommit (transaction pooler) mode doesn't hold open
+        cursor = conn.cursor() if conn.autocommit else conn.cursor(name='stream_json_rows')
+        cursor.execute(sql, params)
+        first_rows = cursor.fetchmany(STREAM_BATCH_ROWS)
+    except Exception:
+        release_db_connection(conn)
+        raise
+    if not first_rows:
+        cursor.close()
+        release_db_connection(conn)
+        if not_found_message is None:
+            return jsonify([])
+        return jsonify({'error': not_found_message}), 404
+
+    def rows():
+        batch = first_rows
+        while batch:
+            yield from batch
+            batch = cursor.fetchmany(STREAM_BATCH_ROWS)
+
+    def generate():
+        try:
+            yield from iter_json_array(rows(), format_row)
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+    return app.response_class(generate(), mimetype='application/json')
+
+
+def fetch_location_rows(select, location_id, forecast_window, timestamp_sql, date_column, order_by,
+                        date_as_text=False):
+    """All of the location's rows for a SELECT ending in FROM, within the window if there is one."""
+    sql, params = apply_window(select + 'WHERE location_id = %s', (location_id,), forecast_window,
+                               timestamp_sql, date_column, date_as_text)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql + order_by, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        release_db_connection(conn)
+
+
+def columnar_response(columnar_format, location_id, forecast_window, timestamp_sql, date_column,
+                      not_found_message, date_as_text=False):
+    """The v2 body (columnar.py) for the location's rows, within the window if there is one."""
+    rows = fetch_location_rows(columnar_format.select, location_id, forecast_window, timestamp_sql, date_column,
+                               ' ORDER BY id', date_as_text)
+    if not rows and empty_is_not_found(forecast_window):
+        return jsonify({'error': not_found_message}), 404
+    return json_response(dumps_json(columnar_format.document(location_id, rows)))
 
-def serialize_date(value):
-    return value.strftime('%a %b %d') if isinstance(value, datetime) else value
+
+def graph_binary_response(body_format, location_id, forecast_window):
+    """Packed or msgpack graph points (graph_binary.py), within the window if there is one."""
+    rows = fetch_location_rows(graph_binary.GRAPH_BINARY_SELECT, location_id, forecast_window, graph_timestamp_sql(),
+                               'graph_date', ' ORDER BY graph_date, graph_time, id')
+    if not rows and empty_is_not_found(forecast_window):
+        return jsonify({'error': 'No graph points data found for this location'}), 404
+    try:
+        body = graph_binary.ENCODERS[body_format](rows)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return app.response_class(body, mimetype=graph_binary.GRAPH_FORMATS[body_format])
+
+
+def prerendered_body(cursor, kind, location_id, compressed):
+    """
+    (body, content encoding) rendered at ingest time, gzip-compressed if `compressed`, provided
+    it was rendered from the versions this worker currently sees; None otherwise.
+    """
+    source = ingest_versions.source(location_id, payload_store.PAYLOAD_SOURCES[kind])
+    if source is None:
+        return None
+    source = payload_store.payload_source(kind, source, location_registry.version if kind == 'combined' else None)
+    body = payload_store.fetch_payload(cursor, location_id, kind, source, compressed)
+    if body is None:
+        return None
+    return body, 'gzip' if compressed else None
+
+
+def encoded_json_response(body, content_encoding=None):
+    response = json_response(body)
+    if content_encoding is not None:
+        response.headers['Content-Encoding'] = content_encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def prerendered_response(cursor, kind, location_id):
+    """
+    Serves the body rendered at ingest time (gzip-compressed if the client accepts it), provided
+    it was rendered from the versions this worker currently sees. Returns None to fall back
+    to the live query.
+    """
+    # Use the stored gzip copy only when gzip is the client's best option; otherwise the
+    # plain body is compressed (and cached) in the negotiated encoding by compress_response
+    compressed = compression.negotiate(request.accept_encodings) == 'gzip'
+    prerendered = prerendered_body(cursor, kind, location_id, compressed)
+    if prerendered is None:
+        return None
+    return encoded_json_response(*prerendered)
+
+
+@app.route('/metrics/compression', methods=['GET'])
+def get_compression_metrics():
+    """Per-endpoint compression counters and ratios for this worker."""
+    return jsonify(compression_metrics.snapshot())
+
+@app.route('/metrics/coalescing', methods=['GET'])
+def get_coalescing_metrics():
+    """Per-route request coalescing counters for this worker: fetches run and queries saved."""
+    return jsonify(coalescing_metrics.snapshot())
 
 @app.route('/')
 def hello():
@@ -176,250 +360,369 @@ def hello():
 
 @app.route('/locations', methods=['GET'])
 def get_locations():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, location_name, region, latitude, longitude FROM locations ORDER BY latitude DESC')
-    locations = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    # Apply coordinate overrides
-    overridden_locations = []
-    for row in locations:
-        location_data = {
-            'id': row[0],
-            'location_name': row[1],
-            'region': row[2], 
-            'latitude': row[3],
-            'longitude': row[4]
-        }
-        location_data = apply_coordinate_overrides(location_data)
-        overridden_locations.append(location_data)
-    
-    return jsonify(overridden_locations)
+    """Returns every location (overrides applied) from the in-memory registry."""
+    try:
+        return json_response(location_registry.list_json())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/locations/nearest', methods=['GET'])
+def get_nearest_locations():
+    """Spots nearest to ?lat=&lng=, up to ?k= of them, optionally within ?radius_km=."""
+    try:
+        try:
+            lat = float(request.args['lat'])
+            lng = float(request.args['lng'])
+            k = max(1, min(int(request.args.get('k', 10)), MAX_NEAREST_SPOTS))
+            radius_km = float(request.args['radius_km']) if 'radius_km' in request.args else None
+        except (KeyError, ValueError):
+            return jsonify({'error': 'lat and lng are required numbers; k and radius_km must be numeric'}), 400
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return jsonify({'error': 'lat/lng out of range'}), 400
+
+        location_registry.snapshot()  # (re)loads the registry, which rebuilds the index if needed
+        nearest = spot_index.nearest(lat, lng, k, radius_km)
+
+        return jsonify([spot_summary(distance_km, location) for distance_km, location in nearest])
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/locations/map', methods=['GET'])
+def get_map_locations():
+    """Spots and clusters (count + centroid) inside ?bbox=west,south,east,north at ?zoom=."""
+    try:
+        try:
+            west, south, east, north = (float(value) for value in request.args['bbox'].split(','))
+            zoom = int(request.args.get('zoom', 0))
+        except (KeyError, ValueError):
+            return jsonify({'error': 'bbox=west,south,east,north and an integer zoom are required'}), 400
+        if not (-90 <= south <= north <= 90):
+            return jsonify({'error': 'bbox latitudes out of range'}), 400
+
+        location_registry.snapshot()  # (re)loads the registry, which rebuilds the clusters if needed
+        result = cluster_pyramid.query(west, south, east, north, zoom)
+        result['zoom'] = zoom
+
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/locations/<int:location_id>', methods=['GET'])
 def get_location_by_id(location_id):
     """Fetches a single location by its ID and includes max/min swell and wind directions."""
-    conn, cursor = None, None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Fetch location data
-        cursor.execute('''
-            SELECT id, location_name, latitude, longitude, 
-                   preferred_wind_dir_min, preferred_wind_dir_max, 
-                   preferred_swell_dir_min, preferred_swell_dir_max,
-                   bad_swell_dir_min, bad_swell_dir_max, 
-                   wavecalc,
-                   region,
-                   reef
-            FROM locations 
-            WHERE id = %s
-        ''', (location_id,))
-        location = cursor.fetchone()
-
-        if not location:
+        body = location_registry.detail_json(location_id)
+        if body is None:
             return jsonify({'error': 'Location not found'}), 404
-
-        # Format the response
-        location_data = {
-            'id': location[0],
-            'location_name': location[1],
-            'latitude': location[2],
-            'longitude': location[3],
-            'preferred_wind_dir_min': location[4],
-            'preferred_wind_dir_max': location[5],
-            'preferred_swell_dir_min': location[6],
-            'preferred_swell_dir_max': location[7],
-            'bad_swell_dir_min': location[8],
-            'bad_swell_dir_max': location[9],
-            'wavecalc': location[10],
-            'region': location[11],
-            'reef': location[12] 
-        }
-
-        location_data = apply_coordinate_overrides(location_data)
-
-        return jsonify(location_data)
-
+        return json_response(body)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
-
 
     
 @app.route('/surf/<int:location_id>', methods=['GET'])
+@conditional(SURF, window_lookback=SURF_SLOT_HOURS, window_from_now=True, window_all=True,
+             formats=columnar.SERIES_FORMATS)
 def get_surf(location_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Surf rows for a location from the current slot on, or within ?start=&end=&hours=; ?all=1 for every row."""
     try:
-        # Fetch surf data for the given location_id
-        cursor.execute('''
-            SELECT id, location_id, date, sunrise, sunset, time, tempF, windspeedMiles, winddirDegree, 
-                   winddir16point, weatherDesc, swellHeight_ft, swelldir, swelldir16point, swellperiod_secs
-            FROM surf_data
-            WHERE location_id = %s
-        ''', (location_id,))
-        surf_data = cursor.fetchall()
+        forecast_window = request_window(location_id, SURF_SLOT_HOURS, from_now=True, allow_all=True)
+        projection = request_projection(request.args.get('fields'), 'surf')
+        v2 = request_format() == 'v2'
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if location_registry.get(location_id) is None:
+        return jsonify({'error': 'Location not found'}), 404
+
+    if v2:
+        try:
+            return columnar_response(columnar.surf_format(projection.fields if projection else None), location_id,
+                                     forecast_window, surf_timestamp_sql(), 'date',
+                                     'No surf data found for this location', date_as_text=True)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    if forecast_window is None and projection is None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            response = prerendered_response(cursor, 'surf', location_id)
+            if response is not None:
+                return response
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        finally:
+            cursor.close()
+            release_db_connection(conn)
+
+    try:
+        # Stream surf data for the given location_id, within the window and limited to the
+        # ?fields= columns if those were asked for
+        select, format_row = (projection.select, projection.format_row) if projection else (SURF_SELECT, surf_row)
+        sql, params = apply_window(select + 'WHERE location_id = %s', (location_id,), forecast_window,
+                                   surf_timestamp_sql(), 'date', date_as_text=True)
+        return stream_json_rows(sql, params, format_row,
+                                'No surf data found for this location' if empty_is_not_found(forecast_window) else None)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        if not surf_data:
-            return jsonify({'error': 'No surf data found for this location'}), 404
 
-        # Serialize the response
-        response = [
-            {
-                'id': row[0],
-                'location_id': row[1],
-                'date': serialize_date(row[2]),
-                'sunrise': serialize_time(row[3]),
-                'sunset': serialize_time(row[4]),
-                'time': serialize_time(row[5]),
-                'tempF': row[6],
-                'windspeedMiles': row[7],
-                'winddirDegree': row[8],
-                'winddir16point': row[9],
-                'weatherDesc': row[10],
-                'swellHeight_ft': row[11],
-                'swelldir': row[12],
-                'swelldir16point': row[13],
-                'swellperiod_secs': row[14],
-            } for row in surf_data
-        ]
 
-        return jsonify(response)
+
+@app.route('/scores/<int:location_id>', methods=['GET'])
+@conditional(SURF, SCORE, window_lookback=SURF_SLOT_HOURS)
+def get_scores(location_id):
+    """Surf-quality scores (surf_scores.py) of a location's surf rows, optionally within ?start=&end=&hours=."""
+    try:
+        forecast_window = request_window(location_id, SURF_SLOT_HOURS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if location_registry.get(location_id) is None:
+        return jsonify({'error': 'Location not found'}), 404
+
+    try:
+        sql, params = apply_window(SCORES_SELECT + 'WHERE location_id = %s', (location_id,), forecast_window,
+                                   surf_timestamp_sql(), 'date', date_as_text=True)
+        return stream_json_rows(sql + ' ORDER BY id', params, score_row,
+                                'No scores found for this location' if empty_is_not_found(forecast_window) else None)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
+@app.route('/sessions/<int:location_id>', methods=['GET'])
+@conditional(SURF, GRAPH, SCORE, window_lookback=SURF_SLOT_HOURS, window_from_now=True)
+def get_best_sessions(location_id):
+    """
+    Best upcoming surf sessions (best_sessions.py) for a location: runs of slots meeting
+    ?min_swell_ft=&max_wind_mph=&min_tide_ft=&max_tide_ft=&min_score=, from now unless
+    ?start=&end=&hours= says otherwise, best first, up to ?limit=.
+    """
+    try:
+        forecast_window = request_window(location_id, SURF_SLOT_HOURS, from_now=True)
+        thresholds = best_sessions.parse_thresholds(request.args)
+        limit = best_sessions.parse_limit(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if location_registry.get(location_id) is None:
+        return jsonify({'error': 'Location not found'}), 404
+
+    try:
+        # Both caches are keyed by the ingest versions, so a new ingest never serves stale sessions
+        source = ingest_versions.source(location_id, (SURF, GRAPH, SCORE))
+        result_key = (location_id, source, forecast_window.key(), thresholds, limit)
+        sessions = session_results.get(result_key) if source is not None else None
+        if sessions is None:
+            series = session_series.get((location_id, source)) if source is not None else None
+            if series is None:
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(best_sessions.SESSION_SURF_SQL, (location_id,))
+                    surf_rows = cursor.fetchall()
+                    cursor.execute(best_sessions.SESSION_TIDE_SQL, (location_id,))
+                    series = best_sessions.SpotSeries(surf_rows, cursor.fetchall(), SURF_SLOT_HOURS)
+                finally:
+                    cursor.close()
+                    release_db_connection(conn)
+                if source is not None:
+                    session_series.put((location_id, source), series)
+            sessions = best_sessions.find_sessions(series, thresholds, forecast_window, limit)
+            if source is not None:
+                session_results.put(result_key, sessions)
+        return jsonify({'location_id': location_id, 'thresholds': dict(thresholds), 'sessions': sessions})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 @app.route('/locations/combined-data/<int:location_id>', methods=['GET'])
+@conditional(SURF, TIDE, SCORE, include_location=True)
 def get_combined_data_by_id(location_id):
     """Fetches combined surf and tide data for a specific location."""
+    try:
+        include_surf = request.args.get('include_surf', 'true').lower() == 'true'
+        include_tide = request.args.get('include_tide', 'true').lower() == 'true'
+        try:
+            surf_projection = request_projection(request.args.get('fields'), 'combined')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        location = location_registry.get(location_id)
+        if not location:
+            return jsonify({'error': 'Location not found'}), 404
+
+        compressed = compression.negotiate(request.accept_encodings) == 'gzip'
+        # Concurrent requests for the same document (and ingest versions) share one fetch
+        key = (request.full_path, ingest_versions.source(location_id, (SURF, TIDE, SCORE)),
+               location_registry.version, compressed)
+        body, content_encoding = combined_reads.get(key, lambda: load_combined_body(
+            location, include_surf, include_tide, surf_projection, compressed))
+        return encoded_json_response(body, content_encoding)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def load_combined_body(location, include_surf, include_tide, surf_projection, compressed):
+    """(body, content encoding) of a combined-data document: pre-rendered if current, else rendered live."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if include_surf and include_tide and surf_projection is None:
+            prerendered = prerendered_body(cursor, 'combined', location['id'], compressed)
+            if prerendered is not None:
+                return prerendered
+
+        # One statement renders the surf and tide arrays; build in Python only for the rare fallback
+        body = fetch_combined_json(cursor, location, include_surf, include_tide, surf_projection)
+        if body is None:
+            body = dumps_json(build_combined_data(cursor, location, include_surf, include_tide, surf_projection))
+        return body, None
+    finally:
+        cursor.close()
+        release_db_connection(conn)
+
+
+@app.route('/locations/combined-data', methods=['GET'])
+def get_combined_data_batch():
+    """
+    Fetches combined data for several locations at once: ?ids=1,2,3 plus the same
+    include_surf/include_tide flags. Returns one object keyed by location ID; unknown IDs
+    are left out.
+    """
     conn, cursor = None, None
     try:
         include_surf = request.args.get('include_surf', 'true').lower() == 'true'
         include_tide = request.args.get('include_tide', 'true').lower() == 'true'
 
+        try:
+            location_ids = list(dict.fromkeys(
+                int(value) for value in request.args.get('ids', '').split(',') if value.strip()
+            ))
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+        if not location_ids:
+            return jsonify({'error': 'No location ids given'}), 400
+        if len(location_ids) > MAX_BATCH_LOCATIONS:
+            return jsonify({'error': f'At most {MAX_BATCH_LOCATIONS} locations per request'}), 400
+
+        locations = [location_registry.get(location_id) for location_id in location_ids]
+        locations = [location for location in locations if location]
+        if not locations:
+            return jsonify({'error': 'Location not found'}), 404
+
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute('''
-            SELECT id, location_name, latitude, longitude, 
-                   preferred_wind_dir_min, preferred_wind_dir_max, 
-                   preferred_swell_dir_min, preferred_swell_dir_max
-            FROM locations WHERE id = %s
-        ''', (location_id,))
-        location = cursor.fetchone()
+        documents = build_combined_data_many(cursor, locations, include_surf, include_tide)
 
-        if not location:
-            return jsonify({'error': 'Location not found'}), 404
+        return jsonify({str(location_id): document for location_id, document in documents.items()})
 
-        combined_data = {
-            'location_id': location[0],
-            'location_name': location[1],
-            'latitude': location[2],
-            'longitude': location[3],
-            'preferred_wind_dir_min': location[4],
-            'preferred_wind_dir_max': location[5],
-            'preferred_swell_dir_min': location[6],
-            'preferred_swell_dir_max': location[7],
-        }
-
-        combined_data = apply_coordinate_overrides(combined_data)
-
-        if include_surf:
-            cursor.execute('''
-                SELECT id, location_id, date, sunrise, sunset, time, tempF, windspeedMiles, winddirDegree, 
-                       winddir16point, weatherDesc, swellHeight_ft, swelldir, swelldir16point, swellperiod_secs
-                FROM surf_data WHERE location_id = %s
-            ''', (location_id,))
-            surf_data = cursor.fetchall()
-            combined_data['surf_data'] = [
-                {
-                    'id': row[0],
-                    'location_id': row[1],
-                    'date': serialize_date(row[2]),
-                    'sunrise': serialize_time(row[3]),
-                    'sunset': serialize_time(row[4]),
-                    'time': serialize_time(row[5]),
-                    'tempF': row[6],
-                    'windspeedMiles': row[7],
-                    'winddirDegree': row[8],
-                    'winddir16point': row[9],
-                    'weatherDesc': row[10],
-                    'swellHeight_ft': row[11],
-                    'swelldir': row[12],
-                    'swelldir16point': row[13],
-                    'swellperiod_secs': row[14],
-                }
-                for row in surf_data
-            ]
-
-        if include_tide:
-            cursor.execute('''
-                SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
-                FROM tide_data WHERE location_id = %s
-            ''', (location_id,))
-            tide_data = cursor.fetchall()
-            combined_data['tide_data'] = [
-                {
-                    'id': row[0],
-                    'location_id': row[1],
-                    'tide_time': serialize_time(row[2]),
-                    'tide_height': row[3],
-                    'tide_type': row[4],
-                    'tide_date': serialize_date(row[5])
-                }
-                for row in tide_data
-            ]
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return jsonify(combined_data)
+    finally:
+        if cursor: cursor.close()
+        if conn: release_db_connection(conn)
+
+
+@app.route('/regions/<region>/overview', methods=['GET'])
+def get_region_overview(region):
+    """Snapshot of every spot in a region: current swell and wind, the next few hours, next high/low tide."""
+    conn, cursor = None, None
+    try:
+        try:
+            hours = max(0, min(int(request.args.get('hours', DEFAULT_OVERVIEW_HOURS)), MAX_OVERVIEW_HOURS))
+        except ValueError:
+            return jsonify({'error': 'hours must be an integer'}), 400
+
+        locations = [location for location in location_registry.all() if location['region'] == region]
+        if not locations:
+            return jsonify({'error': 'Region not found'}), 404
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        now = local_now(region)
+        spots = fetch_region_overview(cursor, locations, now, hours)
+
+        return jsonify({'region': region, 'local_time': now.strftime('%Y-%m-%d %H:%M'), 'spots': spots})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    finally:
+        if cursor: cursor.close()
+        if conn: release_db_connection(conn)
+
+
+@app.route('/regions/<region>/top-spots', methods=['GET'])
+def get_region_top_spots(region):
+    """
+    The region's best spots (region_ranking.py) over ?start=&end=&hours= (from now by default),
+    ranked by average ?by=score|face_ft|wind_quality, up to ?limit=.
+    """
+    conn, cursor = None, None
+    try:
+        try:
+            forecast_window = parse_window(request.args, region, SURF_SLOT_HOURS,
+                                           from_now_window(region, SURF_SLOT_HOURS))
+            metric, limit = parse_ranking_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        locations = [location for location in location_registry.all() if location['region'] == region]
+        if not locations:
+            return jsonify({'error': 'Region not found'}), 404
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        spots = fetch_region_ranking(cursor, region, locations, forecast_window, metric, limit)
+
+        return jsonify({'region': region, 'window': forecast_window.key(), 'by': metric, 'spots': spots})
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
     finally:
         if cursor: cursor.close()
-        if conn: conn.close()
+        if conn: release_db_connection(conn)
 
 
 @app.route('/api/combined-tide-data/<int:location_id>', methods=['GET'])
 def get_combined_tide_data(location_id):
-    """Fetches combined tide data from both tide_data and boundary_tide_data for a given location."""
+    """
+    Fetches combined tide data from both tide_data and boundary_tide_data for a given location:
+    yesterday through two days ahead by default, or the ?start=&end=&hours= window.
+    """
     conn, cursor = None, None
     try:
-        today = datetime.now()
-        three_days_ago = today - timedelta(days=1)
-        two_days_after = today + timedelta(days=2)
+        today = datetime.now().date()
+        default_window = ForecastWindow(datetime.combine(today - timedelta(days=1), time_type.min),
+                                        datetime.combine(today + timedelta(days=3), time_type.min))
+        try:
+            forecast_window = request_window(location_id, default=default_window)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Fetch tide data for the date range from tide_data table
-        cursor.execute('''
+        # Fetch tide data for the window from tide_data table
+        cursor.execute(*apply_window('''
             SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
             FROM tide_data
-            WHERE location_id = %s AND tide_date BETWEEN %s AND %s
-        ''', (location_id, three_days_ago.date(), two_days_after.date()))
+            WHERE location_id = %s
+        ''', (location_id,), forecast_window, tide_timestamp_sql(), 'tide_date'))
         
         tide_data = cursor.fetchall()
         print(f"Tide Data: {tide_data}")  # Add this debug statement
 
-        # Fetch tide data from boundary_tide_data table for the same date range
-        cursor.execute('''
+        # Fetch tide data from boundary_tide_data table for the same window
+        cursor.execute(*apply_window('''
             SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
             FROM boundary_tide_data
-            WHERE location_id = %s AND tide_date BETWEEN %s AND %s
-        ''', (location_id, three_days_ago.date(), two_days_after.date()))
+            WHERE location_id = %s
+        ''', (location_id,), forecast_window, tide_timestamp_sql(), 'tide_date'))
         
         boundary_tide_data = cursor.fetchall()
         print(f"Boundary Tide Data: {boundary_tide_data}")  # Add this debug statement
@@ -443,46 +746,51 @@ def get_combined_tide_data(location_id):
 
     finally:
         if cursor: cursor.close()
-        if conn: conn.close()
+        if conn: release_db_connection(conn)
         
 @app.route('/graph-points/<int:location_id>', methods=['GET'])
+@conditional(GRAPH, window_lookback=0, window_from_now=True, window_all=True, formats=graph_binary.GRAPH_FORMATS)
 def get_graph_points(location_id):
-    """Fetches graph points data for a specific location."""
+    """Fetches graph points data for a specific location from now on, or within ?start=&end=&hours=; ?all=1 for every point."""
+    try:
+        forecast_window = request_window(location_id, from_now=True, allow_all=True)
+        body_format = request_format(graph_binary.GRAPH_FORMATS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if location_registry.get(location_id) is None:
+        return jsonify({'error': 'Location not found'}), 404
+
     conn, cursor = None, None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        if body_format in graph_binary.ENCODERS:
+            return graph_binary_response(body_format, location_id, forecast_window)
+        if body_format == 'v2':
+            return columnar_response(columnar.GRAPH_FORMAT, location_id, forecast_window, graph_timestamp_sql(),
+                                     'graph_date', 'No graph points data found for this location')
 
-        # Fetch data from graph_points table based on location_id, ordered by id
-        cursor.execute('''
-            SELECT id, location_id, graph_time, tide_height, tide_type
-            FROM graph_points WHERE location_id = %s ORDER BY id
-        ''', (location_id,))
-        graph_points_data = cursor.fetchall()
+        if forecast_window is None:
+            conn = get_db_connection()
+            cursor = conn.cursor()
 
-        if not graph_points_data:
-            return jsonify({'error': 'No graph points data found for this location'}), 404
-
-        # Format and serialize data for JSON response
-        graph_points_response = [
-            {
-                'id': row[0],
-                'location_id': row[1],
-                'graph_time': serialize_time(row[2]),
-                'tide_height': round(float(row[3]) * 3.28084, 2),  # Convert to float, then to feet and round
-                'tide_type': row[4]
-            }
-            for row in graph_points_data
-        ]
-
-        return jsonify(graph_points_response)
+            response = prerendered_response(cursor, 'graph', location_id)
+            if response is not None:
+                return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
     finally:
         if cursor: cursor.close()
-        if conn: conn.close()
+        if conn: release_db_connection(conn)
+
+    try:
+        # Stream graph_points rows for the location, ordered by id
+        sql, params = apply_window(GRAPH_POINTS_SELECT + 'WHERE location_id = %s', (location_id,), forecast_window,
+                                   graph_timestamp_sql(), 'graph_date')
+        return stream_json_rows(sql + ' ORDER BY id', params, graph_point_row,
+                                'No graph points data found for this location' if empty_is_not_found(forecast_window) else None)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
         
 @app.route('/graph-data/<int:location_id>', methods=['GET'])
@@ -521,47 +829,49 @@ def get_graph_data(location_id):
 
     finally:
         if cursor: cursor.close()
-        if conn: conn.close()
+        if conn: release_db_connection(conn)
         
 @app.route('/tide-data/<int:location_id>', methods=['GET'])
+@conditional(TIDE, window_lookback=0, window_from_now=True, window_all=True, formats=columnar.SERIES_FORMATS)
 def get_tide_data(location_id):
-    """Fetches tide data for a specific location."""
-    conn, cursor = None, None
+    """Fetches tide data for a specific location from now on, or within ?start=&end=&hours=; ?all=1 for every row."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        forecast_window = request_window(location_id, from_now=True, allow_all=True)
+        v2 = request_format() == 'v2'
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if location_registry.get(location_id) is None:
+        return jsonify({'error': 'Location not found'}), 404
 
-        # Fetch tide data for the given location_id
-        cursor.execute('''
-            SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
-            FROM tide_data
-            WHERE location_id = %s
-        ''', (location_id,))
-        tide_data = cursor.fetchall()
+    conn, cursor = None, None
+    try:
+        if v2:
+            return columnar_response(columnar.TIDE_FORMAT, location_id, forecast_window, tide_timestamp_sql(),
+                                     'tide_date', 'No tide data found for this location')
 
-        if not tide_data:
-            return jsonify({'error': 'No tide data found for this location'}), 404
+        if forecast_window is None:
+            conn = get_db_connection()
+            cursor = conn.cursor()
 
-        # Serialize the tide data for JSON response
-        response = [
-            {
-                'id': row[0],
-                'location_id': row[1],
-                'tide_time': serialize_time(row[2]),
-                'tide_height_mt': row[3],
-                'tide_type': row[4],
-                'tide_date': serialize_date(row[5])
-            } for row in tide_data
-        ]
-
-        return jsonify(response)
+            response = prerendered_response(cursor, 'tide', location_id)
+            if response is not None:
+                return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
     finally:
         if cursor: cursor.close()
-        if conn: conn.close()
+        if conn: release_db_connection(conn)
+
+    try:
+        # Stream tide data for the given location_id, within the window if one was asked for
+        sql, params = apply_window(TIDE_SELECT + 'WHERE location_id = %s', (location_id,), forecast_window,
+                                   tide_timestamp_sql(), 'tide_date')
+        return stream_json_rows(sql, params, tide_row,
+                                'No tide data found for this location' if empty_is_not_found(forecast_window) else None)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
 
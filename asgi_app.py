@@ -0,0 +1,731 @@
+"""
+ASGI variant of app.py: the same routes returning byte-identical JSON, but served from an
+asyncpg pool so a worker never blocks on a Postgres round trip, and independent queries in
+one request (surf and tide for combined data, tide and boundary tides) run concurrently on
+separate pooled connections.
+
+Needs the optional packages in requirements-asgi.txt. Run with:
+    uvicorn asgi_app:app --workers 4
+"""
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import re
+import asyncpg
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import HTMLResponse, Response
+from starlette.routing import Route
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+import compression
+import payload_store
+from single_flight import AsyncSingleFlight, CoalescingMetrics
+from db_pool import DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_MAX_AGE, DB_POOL_TIMEOUT, DB_POOL_MODE
+from forecast_data import (
+    serialize_time, serialize_date, location_summary, group_by_location,
+    SURF_SELECT, COMBINED_SURF_SELECT, TIDE_SELECT, GRAPH_POINTS_SELECT, SCORES_SELECT,
+    surf_row, combined_surf_row, tide_row, graph_point_row, score_row,
+)
+from field_selection import request_projection
+import columnar
+import graph_binary
+import best_sessions
+from forecast_time import (
+    local_now, parse_window, from_now_window, apply_window, empty_is_not_found, ForecastWindow,
+    surf_timestamp_sql, tide_timestamp_sql, graph_timestamp_sql,
+)
+from ingest_versions import IngestVersions, cache_control, SURF, TIDE, GRAPH, SCORE
+from json_encoding import dumps_json
+from location_overrides import apply_coordinate_overrides
+from location_registry import LocationRegistry, LOCATIONS_SQL
+from map_clusters import ClusterPyramid
+from region_overview import REGION_OVERVIEW_SQL, region_overview_params, region_overview_spots
+from region_ranking import region_ranking_query, rank_region_spots, parse_ranking_args
+from spatial_index import SpotIndex, spot_summary
+from datetime import datetime, timedelta, time as time_type
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Same limits as app.py
+MAX_BATCH_LOCATIONS = int(os.getenv('MAX_BATCH_LOCATIONS', '50'))
+MAX_NEAREST_SPOTS = 50
+DEFAULT_OVERVIEW_HOURS = 6
+MAX_OVERVIEW_HOURS = 48
+SURF_SLOT_HOURS = 3
+SESSION_SERIES_CACHE_ENTRIES = int(os.getenv('SESSION_SERIES_CACHE_ENTRIES', '256'))
+SESSION_RESULT_CACHE_ENTRIES = int(os.getenv('SESSION_RESULT_CACHE_ENTRIES', '2048'))
+
+_PLACEHOLDER = re.compile(r'%\((\w+)\)s|%s')
+
+
+def asyncpg_query(sql, params=()):
+    """Rewrites psycopg2 placeholders (%s or %(name)s) as asyncpg's $1, $2, ... -> (sql, args)."""
+    args = []
+    positions = {}
+    sequential = iter(params) if not isinstance(params, dict) else None
+
+    def replace(match):
+        name = match.group(1)
+        if name is None:
+            args.append(next(sequential))
+            return f'${len(args)}'
+        if name not in positions:
+            args.append(params[name])
+            positions[name] = len(args)
+        return f'${positions[name]}'
+
+    return _PLACEHOLDER.sub(replace, sql), args
+
+
+async def _init_connection(conn):
+    # psycopg2 decodes json columns (json_agg results) to Python objects; asyncpg returns text
+    await conn.set_type_codec('json', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+
+async def create_pool():
+    """asyncpg pool sized by the same DB_POOL_* settings as db_pool."""
+    options = {
+        'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+        'max_size': DB_POOL_MAX_SIZE,
+        'max_inactive_connection_lifetime': DB_POOL_MAX_AGE,
+        'init': _init_connection,
+    }
+    if DB_POOL_MODE == 'transaction':
+        # Prepared statements don't survive a transaction-mode pooler handing out other backends
+        options['statement_cache_size'] = 0
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if DATABASE_URL:
+        return await asyncpg.create_pool(DATABASE_URL, ssl='require', **options)
+    return await asyncpg.create_pool(database='surf_forecast', user='orlandosantos', host='localhost',
+                                     port=5432, **options)
+
+
+pool = None
+
+
+async def fetch(sql, params=()):
+    async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+        sql, args = asyncpg_query(sql, params)
+        return await conn.fetch(sql, *args)
+
+
+async def fetchval(sql, params=()):
+    async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+        sql, args = asyncpg_query(sql, params)
+        return await conn.fetchval(sql, *args)
+
+
+class AsyncLocationRegistry(LocationRegistry):
+    """LocationRegistry loaded through asyncpg by the refresh task; reads never touch the database."""
+
+    def snapshot(self):
+        return self._snapshot
+
+    async def refresh_async(self, force=False):
+        async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+            try:
+                version = await conn.fetchval('SELECT version FROM location_version WHERE id = 1') or 0
+            except asyncpg.UndefinedTableError:
+                version = None
+            current = self._snapshot
+            if not (force or current is None or version is None or version != current.version):
+                return
+            self._snapshot = self._build(version, await conn.fetch(LOCATIONS_SQL))
+        for callback in self._listeners:
+            callback(self._snapshot.rows)
+
+
+class AsyncIngestVersions(IngestVersions):
+    """IngestVersions refreshed through asyncpg by the refresh task."""
+
+    def get(self, location_id, dataset):
+        return (self._versions or {}).get((location_id, dataset))
+
+    async def refresh_async(self):
+        try:
+            rows = await fetch('SELECT location_id, dataset, version, updated_at FROM ingest_versions')
+        except asyncpg.PostgresError as e:
+            print(f"Ingest version refresh error: {e}")
+            if self._versions is None:
+                self._versions = {}
+            return
+        self._versions = {(location_id, dataset): (version, updated_at)
+                          for location_id, dataset, version, updated_at in rows}
+
+
+location_registry = AsyncLocationRegistry(apply_coordinate_overrides)
+spot_index = SpotIndex()
+location_registry.on_reload(spot_index.rebuild)
+cluster_pyramid = ClusterPyramid()
+location_registry.on_reload(cluster_pyramid.rebuild)
+ingest_versions = AsyncIngestVersions()
+
+compressed_bodies = compression.CompressedBodyCache()
+compression_metrics = compression.CompressionMetrics()
+
+coalescing_metrics = CoalescingMetrics()
+combined_reads = AsyncSingleFlight('combined', coalescing_metrics)
+
+session_series = best_sessions.LRUCache(SESSION_SERIES_CACHE_ENTRIES)
+session_results = best_sessions.LRUCache(SESSION_RESULT_CACHE_ENTRIES)
+
+
+async def refresh_forever():
+    """Background reload of locations and ingest versions, so requests only read memory."""
+    interval = min(location_registry.check_interval, ingest_versions.check_interval)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await location_registry.refresh_async()
+            await ingest_versions.refresh_async()
+        except (asyncpg.PostgresError, OSError, asyncio.TimeoutError) as e:
+            # Keep serving what we have; the next pass tries again
+            print(f"Refresh error: {e}")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global pool
+    pool = await create_pool()
+    await location_registry.refresh_async(force=True)
+    await ingest_versions.refresh_async()
+    refresher = asyncio.create_task(refresh_forever())
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        await pool.close()
+
+
+def accept_encodings(request):
+    return parse_accept_header(request.headers.get('accept-encoding'))
+
+
+def request_format(request, formats=columnar.SERIES_FORMATS):
+    return columnar.negotiate_format(request.query_params.get('format'),
+                                     parse_accept_header(request.headers.get('accept'), MIMEAccept), formats)
+
+
+def json_error(message, status):
+    return Response(dumps_json({'error': message}), status_code=status, media_type='application/json')
+
+
+def response_headers(request):
+    """Vary, plus ETag and Cache-Control when the route set an ETag."""
+    headers = {'Vary': getattr(request.state, 'vary', 'Accept-Encoding')}
+    etag = getattr(request.state, 'etag', None)
+    if etag is not None:
+        headers['ETag'] = quote_etag(etag, weak=True)
+        headers['Cache-Control'] = cache_control(max_age_limit=getattr(request.state, 'max_age_limit', None))
+    return headers
+
+
+def respond(request, body, content_encoding=None):
+    """
+    200 response for JSON bytes: tagged like app.conditional when the route set an ETag, and
+    compressed like app.compress_response (cached per ETag and encoding).
+    """
+    headers = response_headers(request)
+    etag = getattr(request.state, 'etag', None)
+
+    encoding = compression.negotiate(accept_encodings(request)) if content_encoding is None else None
+    if encoding is not None and len(body) >= compression.COMPRESSION_MIN_BYTES:
+        compressed = compression.compress(body, encoding, cached=etag is not None)
+        if etag is not None:
+            compressed_bodies.put(etag, encoding, compressed, len(body))
+        compression_metrics.record(request.scope['endpoint'].__name__, len(body), len(compressed))
+        body, content_encoding = compressed, encoding
+    if content_encoding is not None:
+        headers['Content-Encoding'] = content_encoding
+    return Response(body, media_type='application/json', headers=headers)
+
+
+def request_window(request, location_id, lookback_hours=0, default=None, from_now=False, allow_all=False):
+    location = location_registry.get(location_id)
+    region = location['region'] if location else None
+    if from_now:
+        default = from_now_window(region, lookback_hours)
+    return parse_window(request.query_params, region, lookback_hours, default, allow_all)
+
+
+def conditional(*datasets, include_location=False, window_lookback=None, window_from_now=False, window_all=False,
+                formats=None):
+    """Async counterpart of app.conditional: 304s and cached compressed bodies before the view runs."""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request):
+            location_id = request.path_params['location_id']
+            forecast_window = None
+            body_format = 'v1'
+            try:
+                if window_lookback is not None:
+                    forecast_window = request_window(request, location_id, window_lookback, from_now=window_from_now,
+                                                     allow_all=window_all)
+                if formats:
+                    body_format = request_format(request, formats)
+            except ValueError:
+                return await view(request, location_id)  # the view answers 400
+            if forecast_window is not None:
+                request.state.max_age_limit = forecast_window.valid_seconds
+            if formats:
+                request.state.vary = 'Accept-Encoding, Accept'
+            try:
+                extra = (location_registry.version,) if include_location else ()
+                if forecast_window is not None:
+                    extra += (forecast_window.key(),)
+                if body_format != 'v1':
+                    extra += (body_format,)
+                # Flask's request.full_path, so both apps hand out the same ETags
+                full_path = f'{request.url.path}?{request.url.query}'
+                etag = ingest_versions.etag(location_id, datasets, full_path, extra)
+            except Exception as e:
+                print(f"ETag lookup error: {e}")
+                etag = None
+
+            if etag is not None:
+                request.state.etag = etag
+                max_age_limit = forecast_window.valid_seconds if forecast_window else None
+                headers = {'ETag': quote_etag(etag, weak=True), 'Cache-Control': cache_control(max_age_limit=max_age_limit),
+                           'Vary': getattr(request.state, 'vary', 'Accept-Encoding')}
+                if parse_etags(request.headers.get('if-none-match')).contains_weak(etag):
+                    return Response(status_code=304, headers=headers)
+                for encoding in compression.acceptable(accept_encodings(request)):
+                    entry = compressed_bodies.get(etag, encoding)
+                    if entry is not None:
+                        body, raw_size = entry
+                        compression_metrics.record(view.__name__, raw_size, len(body), cache_hit=True)
+                        headers['Content-Encoding'] = encoding
+                        return Response(body, media_type='application/json', headers=headers)
+            return await view(request, location_id)
+        return wrapper
+    return decorator
+
+
+async def prerendered_body(request, kind, location_id):
+    """(body, content encoding) rendered at ingest time for the current versions, or None."""
+    source = ingest_versions.source(location_id, payload_store.PAYLOAD_SOURCES[kind])
+    if source is None:
+        return None
+    source = payload_store.payload_source(kind, source, location_registry.version if kind == 'combined' else None)
+    compressed = compression.negotiate(accept_encodings(request)) == 'gzip'
+    try:
+        body = await fetchval(payload_store.payload_select(compressed), (location_id, kind, source))
+    except asyncpg.UndefinedTableError:
+        return None
+    if body is None:
+        return None
+    return body, 'gzip' if compressed else None
+
+
+async def build_combined_data(location, include_surf=True, include_tide=True, surf_projection=None):
+    """forecast_data.build_combined_data with the surf and tide queries running concurrently."""
+    parts = []
+    if include_surf:
+        select, format_row = (surf_projection.select, surf_projection.format_row) if surf_projection \
+            else (COMBINED_SURF_SELECT, combined_surf_row)
+        parts.append(('surf_data', fetch(select + 'WHERE location_id = %s', (location['id'],)), format_row))
+    if include_tide:
+        parts.append(('tide_data', fetch(TIDE_SELECT + 'WHERE location_id = %s', (location['id'],)),
+                      lambda row: tide_row(row, 'tide_height')))
+
+    combined_data = location_summary(location)
+    results = await asyncio.gather(*(query for _, query, _ in parts))
+    for (key, _, format_row), rows in zip(parts, results):
+        combined_data[key] = [format_row(row) for row in rows]
+    return combined_data
+
+
+async def build_combined_data_many(locations, include_surf=True, include_tide=True):
+    """forecast_data.build_combined_data_many with the surf and tide queries running concurrently."""
+    location_ids = [location['id'] for location in locations]
+    parts = []
+    if include_surf:
+        parts.append(('surf_data', fetch(COMBINED_SURF_SELECT + 'WHERE location_id = ANY(%s) ORDER BY location_id, id',
+                                         (location_ids,)), combined_surf_row))
+    if include_tide:
+        parts.append(('tide_data', fetch(TIDE_SELECT + 'WHERE location_id = ANY(%s) ORDER BY location_id, id',
+                                         (location_ids,)), lambda row: tide_row(row, 'tide_height')))
+
+    results = await asyncio.gather(*(query for _, query, _ in parts))
+    grouped = [(key, group_by_location(rows, location_ids, format_row))
+               for (key, _, format_row), rows in zip(parts, results)]
+
+    documents = {}
+    for location in locations:
+        combined_data = location_summary(location)
+        for key, by_location in grouped:
+            combined_data[key] = by_location[location['id']]
+        documents[location['id']] = combined_data
+    return documents
+
+
+async def hello(request):
+    return HTMLResponse("Hello, World!", headers={'Vary': 'Accept-Encoding'})
+
+
+async def get_compression_metrics(request):
+    return respond(request, dumps_json(compression_metrics.snapshot()))
+
+
+async def get_coalescing_metrics(request):
+    return respond(request, dumps_json(coalescing_metrics.snapshot()))
+
+
+async def get_locations(request):
+    return respond(request, location_registry.list_json())
+
+
+async def get_nearest_locations(request):
+    try:
+        try:
+            lat = float(request.query_params['lat'])
+            lng = float(request.query_params['lng'])
+            k = max(1, min(int(request.query_params.get('k', 10)), MAX_NEAREST_SPOTS))
+            radius_km = float(request.query_params['radius_km']) if 'radius_km' in request.query_params else None
+        except (KeyError, ValueError):
+            return json_error('lat and lng are required numbers; k and radius_km must be numeric', 400)
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return json_error('lat/lng out of range', 400)
+
+        nearest = spot_index.nearest(lat, lng, k, radius_km)
+        return respond(request, dumps_json([spot_summary(distance_km, location) for distance_km, location in nearest]))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+async def get_map_locations(request):
+    try:
+        try:
+            west, south, east, north = (float(value) for value in request.query_params['bbox'].split(','))
+            zoom = int(request.query_params.get('zoom', 0))
+        except (KeyError, ValueError):
+            return json_error('bbox=west,south,east,north and an integer zoom are required', 400)
+        if not (-90 <= south <= north <= 90):
+            return json_error('bbox latitudes out of range', 400)
+
+        result = cluster_pyramid.query(west, south, east, north, zoom)
+        result['zoom'] = zoom
+        return respond(request, dumps_json(result))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+async def get_location_by_id(request):
+    body = location_registry.detail_json(request.path_params['location_id'])
+    if body is None:
+        return json_error('Location not found', 404)
+    return respond(request, body)
+
+
+async def _rows_response(request, kind, location_id, select, format_row, not_found_message,
+                         window_lookback, timestamp_sql, date_column, date_as_text=False, order_by='',
+                         fields_endpoint=None, columnar_format=None, formats=columnar.SERIES_FORMATS,
+                         window_from_now=False):
+    """
+    Pre-rendered body if current, else the live rows (within the ?start=&end=&hours= window,
+    and limited to the ?fields= columns when fields_endpoint is set, if those were asked
+    for); same bytes as the sync routes. columnar_format(projection) gives the v2 layout;
+    graph points also come in graph_binary's formats. kind None means nothing is pre-rendered.
+    window_from_now routes default to the rows from now on and take ?all=1 for every row.
+    """
+    try:
+        forecast_window = request_window(request, location_id, window_lookback,
+                                         from_now=window_from_now, allow_all=window_from_now)
+        projection = None
+        if fields_endpoint is not None:
+            projection = request_projection(request.query_params.get('fields'), fields_endpoint)
+        body_format = request_format(request, formats) if columnar_format else 'v1'
+    except ValueError as e:
+        return json_error(str(e), 400)
+    if location_registry.get(location_id) is None:
+        return json_error('Location not found', 404)
+    if body_format in graph_binary.ENCODERS:
+        select, order_by = graph_binary.GRAPH_BINARY_SELECT, ' ORDER BY graph_date, graph_time, id'
+    elif body_format == 'v2':
+        layout = columnar_format(projection)
+        select, order_by = layout.select, ' ORDER BY id'
+    elif projection is not None:
+        select, format_row = projection.select, projection.format_row
+    try:
+        if kind is not None and body_format == 'v1' and forecast_window is None and projection is None:
+            prerendered = await prerendered_body(request, kind, location_id)
+            if prerendered is not None:
+                return respond(request, *prerendered)
+        sql, params = apply_window(select + 'WHERE location_id = %s', (location_id,), forecast_window,
+                                   timestamp_sql, date_column, date_as_text)
+        rows = await fetch(sql + order_by, params)
+        if not rows and empty_is_not_found(forecast_window):
+            return json_error(not_found_message, 404)
+        if body_format in graph_binary.ENCODERS:
+            try:
+                body = graph_binary.ENCODERS[body_format](rows)
+            except ValueError as e:
+                return json_error(str(e), 400)
+            return Response(body, media_type=formats[body_format], headers=response_headers(request))
+        if body_format == 'v2':
+            return respond(request, dumps_json(layout.document(location_id, rows)))
+        return respond(request, dumps_json([format_row(row) for row in rows]))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+@conditional(SURF, window_lookback=SURF_SLOT_HOURS, window_from_now=True, window_all=True,
+             formats=columnar.SERIES_FORMATS)
+async def get_surf(request, location_id):
+    return await _rows_response(request, 'surf', location_id, SURF_SELECT, surf_row,
+                                'No surf data found for this location',
+                                SURF_SLOT_HOURS, surf_timestamp_sql(), 'date', date_as_text=True,
+                                fields_endpoint='surf',
+                                columnar_format=lambda projection: columnar.surf_format(
+                                    projection.fields if projection else None),
+                                window_from_now=True)
+
+
+@conditional(SURF, SCORE, window_lookback=SURF_SLOT_HOURS)
+async def get_scores(request, location_id):
+    return await _rows_response(request, None, location_id, SCORES_SELECT, score_row,
+                                'No scores found for this location',
+                                SURF_SLOT_HOURS, surf_timestamp_sql(), 'date', date_as_text=True,
+                                order_by=' ORDER BY id')
+
+
+@conditional(SURF, GRAPH, SCORE, window_lookback=SURF_SLOT_HOURS, window_from_now=True)
+async def get_best_sessions(request, location_id):
+    try:
+        forecast_window = request_window(request, location_id, SURF_SLOT_HOURS, from_now=True)
+        thresholds = best_sessions.parse_thresholds(request.query_params)
+        limit = best_sessions.parse_limit(request.query_params)
+    except ValueError as e:
+        return json_error(str(e), 400)
+    if location_registry.get(location_id) is None:
+        return json_error('Location not found', 404)
+
+    try:
+        source = ingest_versions.source(location_id, (SURF, GRAPH, SCORE))
+        result_key = (location_id, source, forecast_window.key(), thresholds, limit)
+        sessions = session_results.get(result_key) if source is not None else None
+        if sessions is None:
+            series = session_series.get((location_id, source)) if source is not None else None
+            if series is None:
+                surf_rows, tide_rows = await asyncio.gather(
+                    fetch(best_sessions.SESSION_SURF_SQL, (location_id,)),
+                    fetch(best_sessions.SESSION_TIDE_SQL, (location_id,)))
+                series = best_sessions.SpotSeries(surf_rows, tide_rows, SURF_SLOT_HOURS)
+                if source is not None:
+                    session_series.put((location_id, source), series)
+            sessions = best_sessions.find_sessions(series, thresholds, forecast_window, limit)
+            if source is not None:
+                session_results.put(result_key, sessions)
+        return respond(request, dumps_json({'location_id': location_id, 'thresholds': dict(thresholds),
+                                            'sessions': sessions}))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+@conditional(SURF, TIDE, SCORE, include_location=True)
+async def get_combined_data_by_id(request, location_id):
+    try:
+        include_surf = request.query_params.get('include_surf', 'true').lower() == 'true'
+        include_tide = request.query_params.get('include_tide', 'true').lower() == 'true'
+        try:
+            surf_projection = request_projection(request.query_params.get('fields'), 'combined')
+        except ValueError as e:
+            return json_error(str(e), 400)
+
+        location = location_registry.get(location_id)
+        if not location:
+            return json_error('Location not found', 404)
+
+        async def load():
+            if include_surf and include_tide and surf_projection is None:
+                prerendered = await prerendered_body(request, 'combined', location_id)
+                if prerendered is not None:
+                    return prerendered
+            return dumps_json(await build_combined_data(location, include_surf, include_tide, surf_projection)), None
+
+        compressed = compression.negotiate(accept_encodings(request)) == 'gzip'
+        key = (f'{request.url.path}?{request.url.query}', ingest_versions.source(location_id, (SURF, TIDE, SCORE)),
+               location_registry.version, compressed)
+        return respond(request, *await combined_reads.get(key, load))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+async def get_combined_data_batch(request):
+    try:
+        include_surf = request.query_params.get('include_surf', 'true').lower() == 'true'
+        include_tide = request.query_params.get('include_tide', 'true').lower() == 'true'
+
+        try:
+            location_ids = list(dict.fromkeys(
+                int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()
+            ))
+        except ValueError:
+            return json_error('ids must be a comma-separated list of integers', 400)
+        if not location_ids:
+            return json_error('No location ids given', 400)
+        if len(location_ids) > MAX_BATCH_LOCATIONS:
+            return json_error(f'At most {MAX_BATCH_LOCATIONS} locations per request', 400)
+
+        locations = [location_registry.get(location_id) for location_id in location_ids]
+        locations = [location for location in locations if location]
+        if not locations:
+            return json_error('Location not found', 404)
+
+        documents = await build_combined_data_many(locations, include_surf, include_tide)
+        return respond(request, dumps_json({str(location_id): document for location_id, document in documents.items()}))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+async def get_region_overview(request):
+    region = request.path_params['region']
+    try:
+        try:
+            hours = max(0, min(int(request.query_params.get('hours', DEFAULT_OVERVIEW_HOURS)), MAX_OVERVIEW_HOURS))
+        except ValueError:
+            return json_error('hours must be an integer', 400)
+
+        locations = [location for location in location_registry.all() if location['region'] == region]
+        if not locations:
+            return json_error('Region not found', 404)
+
+        now = local_now(region)
+        rows = await fetch(REGION_OVERVIEW_SQL, region_overview_params(locations, now, hours))
+        spots = region_overview_spots(locations, rows)
+        return respond(request, dumps_json({'region': region, 'local_time': now.strftime('%Y-%m-%d %H:%M'),
+                                            'spots': spots}))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+async def get_region_top_spots(request):
+    region = request.path_params['region']
+    try:
+        try:
+            forecast_window = parse_window(request.query_params, region, SURF_SLOT_HOURS,
+                                           from_now_window(region, SURF_SLOT_HOURS))
+            metric, limit = parse_ranking_args(request.query_params)
+        except ValueError as e:
+            return json_error(str(e), 400)
+
+        locations = [location for location in location_registry.all() if location['region'] == region]
+        if not locations:
+            return json_error('Region not found', 404)
+
+        rows = await fetch(*region_ranking_query(region, forecast_window))
+        spots = rank_region_spots(locations, rows, metric, limit)
+        return respond(request, dumps_json({'region': region, 'window': forecast_window.key(), 'by': metric,
+                                            'spots': spots}))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+async def get_combined_tide_data(request):
+    location_id = request.path_params['location_id']
+    try:
+        today = datetime.now().date()
+        default_window = ForecastWindow(datetime.combine(today - timedelta(days=1), time_type.min),
+                                        datetime.combine(today + timedelta(days=3), time_type.min))
+        try:
+            forecast_window = request_window(request, location_id, default=default_window)
+        except ValueError as e:
+            return json_error(str(e), 400)
+
+        # tide_data and boundary_tide_data are independent: query both at once
+        tide_data, boundary_tide_data = await asyncio.gather(*(
+            fetch(*apply_window(f'''
+                SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
+                FROM {table}
+                WHERE location_id = %s
+            ''', (location_id,), forecast_window, tide_timestamp_sql(), 'tide_date'))
+            for table in ('tide_data', 'boundary_tide_data')
+        ))
+
+        combined_data = [
+            {
+                'id': row[0],
+                'location_id': row[1],
+                'tide_time': serialize_time(row[2]),
+                'tide_height_mt': row[3],
+                'tide_type': row[4],
+                'tide_date': serialize_date(row[5])
+            } for row in tide_data + boundary_tide_data
+        ]
+        return respond(request, dumps_json(combined_data))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+@conditional(GRAPH, window_lookback=0, window_from_now=True, window_all=True, formats=graph_binary.GRAPH_FORMATS)
+async def get_graph_points(request, location_id):
+    return await _rows_response(request, 'graph', location_id, GRAPH_POINTS_SELECT, graph_point_row,
+                                'No graph points data found for this location',
+                                0, graph_timestamp_sql(), 'graph_date', order_by=' ORDER BY id',
+                                columnar_format=lambda projection: columnar.GRAPH_FORMAT,
+                                formats=graph_binary.GRAPH_FORMATS, window_from_now=True)
+
+
+async def get_graph_data(request):
+    location_id = request.path_params['location_id']
+    try:
+        graph_data = await fetch('''
+            SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
+            FROM graph_data WHERE location_id = %s
+        ''', (location_id,))
+
+        if not graph_data:
+            return json_error('No graph data found for this location', 404)
+
+        graph_data_response = [
+            {
+                'Time': serialize_time(row[2]),
+                'Tide Height': row[3],
+                'Tide Type': row[4],
+                'Date': row[5].strftime('%Y-%m-%d')
+            }
+            for row in graph_data
+        ]
+        return respond(request, dumps_json(graph_data_response))
+    except Exception as e:
+        return json_error(str(e), 500)
+
+
+@conditional(TIDE, window_lookback=0, window_from_now=True, window_all=True, formats=columnar.SERIES_FORMATS)
+async def get_tide_data(request, location_id):
+    return await _rows_response(request, 'tide', location_id, TIDE_SELECT, tide_row,
+                                'No tide data found for this location',
+                                0, tide_timestamp_sql(), 'tide_date',
+                                columnar_format=lambda projection: columnar.TIDE_FORMAT,
+                                window_from_now=True)
+
+
+app = Starlette(
+    routes=[
+        Route('/', hello),
+        Route('/metrics/compression', get_compression_metrics),
+        Route('/metrics/coalescing', get_coalescing_metrics),
+        Route('/locations', get_locations),
+        Route('/locations/nearest', get_nearest_locations),
+        Route('/locations/map', get_map_locations),
+        Route('/locations/{location_id:int}', get_location_by_id),
+        Route('/surf/{location_id:int}', get_surf),
+        Route('/scores/{location_id:int}', get_scores),
+        Route('/sessions/{location_id:int}', get_best_sessions),
+        Route('/locations/combined-data/{location_id:int}', get_combined_data_by_id),
+        Route('/locations/combined-data', get_combined_data_batch),
+        Route('/regions/{region}/overview', get_region_overview),
+        Route('/regions/{region}/top-spots', get_region_top_spots),
+        Route('/api/combined-tide-data/{location_id:int}', get_combined_tide_data),
+        Route('/graph-points/{location_id:int}', get_graph_points),
+        Route('/graph-data/{location_id:int}', get_graph_data),
+        Route('/tide-data/{location_id:int}', get_tide_data),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'])],
+    lifespan=lifespan,
+)
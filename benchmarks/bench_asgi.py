@@ -0,0 +1,156 @@
+"""
+Side-by-side load test of the sync app (gunicorn app:app) and the ASGI variant
+(uvicorn asgi_app:app) against the same Postgres (DATABASE_URL, or the local surf_forecast
+database). Both servers are started here with the same number of workers; every path is
+first checked for byte-identical bodies, then each server gets the same request mix.
+
+    python -m benchmarks.bench_asgi
+    python -m benchmarks.bench_asgi --workers 2 --concurrency 64 --seconds 15
+
+Requests ask for identity encoding and send no If-None-Match, so each one reaches the
+database (pre-rendered payloads still apply where the app uses them).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import requests
+
+SYNC_PORT = 8101
+ASYNC_PORT = 8102
+HEADERS = {'Accept-Encoding': 'identity'}
+
+
+def start_servers(workers):
+    env = dict(os.environ)
+    sync = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--workers', str(workers), '--bind', f'127.0.0.1:{SYNC_PORT}',
+         '--log-level', 'warning', 'app:app'], env=env)
+    asgi = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', '--workers', str(workers), '--port', str(ASYNC_PORT),
+         '--log-level', 'warning', 'asgi_app:app'], env=env)
+    for port in (SYNC_PORT, ASYNC_PORT):
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if requests.get(f'http://127.0.0.1:{port}/locations', timeout=2).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            if time.monotonic() > deadline:
+                stop_servers((sync, asgi))
+                raise SystemExit(f"server on port {port} did not come up")
+            time.sleep(0.2)
+    return sync, asgi
+
+
+def stop_servers(servers):
+    for server in servers:
+        server.terminate()
+    for server in servers:
+        server.wait(timeout=10)
+
+
+def request_paths(location_ids, regions):
+    """The request mix: single and batch combined data, raw series, two-table tides, region overviews."""
+    paths = []
+    for index, location_id in enumerate(location_ids):
+        batch = ','.join(str(other) for other in location_ids[index:index + 10])
+        paths += [
+            f'/locations/combined-data/{location_id}',
+            f'/locations/combined-data?ids={batch}',
+            f'/surf/{location_id}',
+            f'/graph-points/{location_id}',
+            f'/api/combined-tide-data/{location_id}',
+        ]
+    paths += [f'/regions/{region}/overview' for region in regions]
+    return paths
+
+
+def check_identical(paths):
+    mismatches = 0
+    for path in paths:
+        sync = requests.get(f'http://127.0.0.1:{SYNC_PORT}{path}', headers=HEADERS)
+        asgi = requests.get(f'http://127.0.0.1:{ASYNC_PORT}{path}', headers=HEADERS)
+        if sync.status_code != asgi.status_code or sync.content != asgi.content:
+            mismatches += 1
+            print(f"  differs: {path} ({sync.status_code} vs {asgi.status_code})")
+    return mismatches
+
+
+def load(port, paths, concurrency, seconds):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client(offset):
+        session = requests.Session()
+        mine = []
+        index = offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += concurrency
+            start = time.perf_counter()
+            try:
+                ok = session.get(f'http://127.0.0.1:{port}{path}', headers=HEADERS).status_code < 500
+            except requests.RequestException:
+                ok = False
+            mine.append(time.perf_counter() - start)
+            if not ok:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1e3,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1e3,
+        'errors': errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--locations', type=int, default=20)
+    args = parser.parse_args()
+
+    servers = start_servers(args.workers)
+    try:
+        locations = requests.get(f'http://127.0.0.1:{SYNC_PORT}/locations').json()
+        location_ids = [location['id'] for location in locations][:args.locations]
+        regions = sorted({location['region'] for location in locations if location['region']})
+        paths = request_paths(location_ids, regions)
+
+        print(f"{len(paths)} paths over {len(location_ids)} locations; checking bodies...")
+        print(f"  {check_identical(paths)} mismatched bodies\n")
+
+        print(f"{args.workers} workers each, {args.concurrency} concurrent clients, {args.seconds:g}s per server")
+        print(f"{'server':<22}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for label, port in (('gunicorn app:app', SYNC_PORT), ('uvicorn asgi_app:app', ASYNC_PORT)):
+            result = load(port, paths, args.concurrency, args.seconds)
+            print(f"{label:<22}{result['requests']:>10}{result['rps']:>10.1f}{result['p50_ms']:>10.1f}"
+                  f"{result['p95_ms']:>10.1f}{result['errors']:>8}")
+    finally:
+        stop_servers(servers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+v1 (row objects) against v2 (day-grouped columns, columnar.py) bodies for the forecast series
+endpoints: encoded size and build + encode time. Runs without a database on rows shaped
+like psycopg2's output for each format's SELECT:
+    python -m benchmarks.bench_columnar
+"""
+import gzip
+import time
+from datetime import date, timedelta
+from benchmarks.bench_json import ROUNDS, surf_rows, tide_rows, graph_point_rows
+from columnar import surf_format, TIDE_FORMAT, GRAPH_FORMAT
+from forecast_data import surf_row, tide_row, graph_point_row
+from json_encoding import JSON_BACKEND, dumps_json
+
+
+def timed(build):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = build()
+    return (time.perf_counter() - start) / ROUNDS, body
+
+
+def main():
+    print(f"encoder backend: {JSON_BACKEND}\n")
+    surf, tide, graph = surf_rows(), tide_rows(), graph_point_rows()
+    endpoints = [
+        # v2 SELECTs: surf drops id/location_id, tide leads with tide_date, graph adds graph_date
+        ('/surf/<id>', surf, surf_row, surf_format(), [row[2:] for row in surf]),
+        ('/tide-data/<id>', tide, tide_row, TIDE_FORMAT, [(row[5],) + row[2:5] for row in tide]),
+        ('/graph-points/<id>', graph, graph_point_row, GRAPH_FORMAT,
+         [(date(2026, 1, 1) + timedelta(days=index // 24),) + row[2:] for index, row in enumerate(graph)]),
+    ]
+    print(f"{'endpoint':<20}{'format':<8}{'ms/call':>10}{'bytes':>9}{'gzip':>8}")
+    for name, rows, format_row, layout, columnar_rows in endpoints:
+        v1_time, v1_body = timed(lambda: dumps_json([format_row(row) for row in rows]))
+        v2_time, v2_body = timed(lambda: dumps_json(layout.document(559, columnar_rows)))
+        for label, elapsed, body in (('v1', v1_time, v1_body), ('v2', v2_time, v2_body)):
+            print(f"{name:<20}{label:<8}{elapsed * 1e3:>10.3f}{len(body):>9}{len(gzip.compress(body)):>8}")
+        print(f"{'':<20}{'':<8}{v1_time / v2_time:>9.1f}x{len(v1_body) / len(v2_body):>8.1f}x"
+              f"{len(gzip.compress(v1_body)) / len(gzip.compress(v2_body)):>7.1f}x\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Combined-data document built three ways against the configured database (DATABASE_URL, or
+the local surf_forecast database):
+    three-query   location, surf and tide queries, rows reshaped in Python (the original route)
+    two-query     location from the registry, surf and tide queries reshaped in Python
+    single-sql    location from the registry, surf and tide arrays rendered by Postgres
+
+    python -m benchmarks.bench_combined_sql [--rounds 5] [--locations 50]
+"""
+import argparse
+import time
+import db_pool
+from combined_json import fetch_combined_json
+from forecast_data import build_combined_data
+from json_encoding import JSON_BACKEND, dumps_json
+from location_overrides import apply_coordinate_overrides
+from location_registry import LOCATION_COLUMNS, LOCATIONS_SQL
+
+
+def three_query(cursor, location):
+    cursor.execute(f'SELECT {", ".join(LOCATION_COLUMNS)} FROM locations WHERE id = %s', (location['id'],))
+    location = apply_coordinate_overrides(dict(zip(LOCATION_COLUMNS, cursor.fetchone())))
+    return dumps_json(build_combined_data(cursor, location))
+
+
+def two_query(cursor, location):
+    return dumps_json(build_combined_data(cursor, location))
+
+
+def single_sql(cursor, location):
+    body = fetch_combined_json(cursor, location)
+    return body if body is not None else dumps_json(build_combined_data(cursor, location))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--locations', type=int, default=50)
+    args = parser.parse_args()
+
+    conn = db_pool.connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LOCATIONS_SQL)
+        locations = [apply_coordinate_overrides(dict(zip(LOCATION_COLUMNS, row)))
+                     for row in cursor.fetchall()][:args.locations]
+
+        reference = {location['id']: three_query(cursor, location) for location in locations}
+        print(f"encoder backend: {JSON_BACKEND}, {len(locations)} locations x {args.rounds} rounds\n")
+        print(f"{'path':<14}{'ms/doc':>10}{'speedup':>10}{'mismatches':>12}")
+
+        baseline = None
+        for label, build in (('three-query', three_query), ('two-query', two_query), ('single-sql', single_sql)):
+            mismatches = sum(build(cursor, location) != reference[location['id']] for location in locations)
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                for location in locations:
+                    build(cursor, location)
+            elapsed = (time.perf_counter() - start) / (args.rounds * len(locations))
+            baseline = baseline or elapsed
+            print(f"{label:<14}{elapsed * 1e3:>10.3f}{baseline / elapsed:>9.2f}x{mismatches:>12}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
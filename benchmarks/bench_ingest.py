@@ -0,0 +1,118 @@
+"""
+Marine ingest throughput against a local fake marine API, sequential vs ingest_engine.py at
+several parallelism levels. The fake API answers like marine.ashx (7 days, 3-hourly rows,
+tides) after --latency-ms, or with a 503 for an --error-rate share of requests (retried by
+marine_client). Writes are simulated with a --write-ms sleep unless --db is given, which
+writes through surfBackend into the configured database (DATABASE_URL, or the local
+surf_forecast database) for the first --locations spots of the locations table.
+
+    python -m benchmarks.bench_ingest [--locations 262] [--latency-ms 300] [--write-ms 20]
+                                      [--parallelism 1,4,8,16,32] [--rate 0] [--error-rate 0] [--db]
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault('API_KEY', 'bench')
+import ingest_engine
+import marine_client
+import surfBackend
+
+
+def marine_payload(query, days=7):
+    rnd = random.Random(query)
+    weather = []
+    for day in range(days):
+        hourly = [{
+            'time': str(hour), 'tempF': str(rnd.randint(50, 80)), 'windspeedMiles': str(rnd.randint(1, 25)),
+            'winddirDegree': str(rnd.randint(0, 359)), 'winddir16Point': 'NW', 'weatherDesc': [{'value': 'Sunny'}],
+            'swellHeight_ft': f'{rnd.uniform(1, 12):.1f}', 'swellDir': str(rnd.randint(0, 359)),
+            'swellDir16Point': 'WNW', 'swellPeriod_secs': f'{rnd.uniform(6, 18):.1f}', 'waterTemp_F': '60',
+        } for hour in range(0, 2400, 300)]
+        tides = [{'tideTime': f'{(2 + 6 * n) % 12 or 12:02d}:15 {"AM" if n < 2 else "PM"}',
+                  'tideHeight_mt': f'{rnd.uniform(-0.3, 1.8):.2f}', 'tide_type': ('LOW', 'HIGH')[n % 2]}
+                 for n in range(4)]
+        weather.append({'date': (date.today() + timedelta(days=day)).isoformat(),
+                        'astronomy': [{'sunrise': '06:45 AM', 'sunset': '06:10 PM'}],
+                        'hourly': hourly, 'tides': [{'tide_data': tides}]})
+    return json.dumps({'data': {'weather': weather}}).encode()
+
+
+def start_fake_api(latency, error_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = marine_payload(parse_qs(urlparse(self.path).query).get('q', [''])[0])
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--locations', type=int, default=262)
+    parser.add_argument('--latency-ms', type=float, default=300)
+    parser.add_argument('--write-ms', type=float, default=20)
+    parser.add_argument('--parallelism', default='1,4,8,16,32')
+    parser.add_argument('--rate', type=float, default=0, help='API requests/sec across all threads, 0 = unlimited')
+    parser.add_argument('--error-rate', type=float, default=0, help='share of API requests answered with 503')
+    parser.add_argument('--db', action='store_true', help='write through surfBackend into the database')
+    args = parser.parse_args()
+
+    server = start_fake_api(args.latency_ms / 1000, args.error_rate)
+    marine_client.client.base_url = f'http://127.0.0.1:{server.server_port}/premium/v1/marine.ashx'
+    marine_client.client.cache = None  # every run fetches
+    marine_client.client.rate_limiter = marine_client.RateLimiter(args.rate)
+
+    if args.db:
+        locations = surfBackend.load_locations()[:args.locations]
+        write = surfBackend.write_marine_data
+    else:
+        locations = [(n, 20 + n / 100, -150 - n / 100) for n in range(1, args.locations + 1)]
+
+        def write(location_id, weather_data):
+            time.sleep(args.write_ms / 1000)
+
+    def fetch(location):
+        return surfBackend.fetch_marine_weather(location[1], location[2])
+
+    writes = 'database' if args.db else f'{args.write_ms:g} ms simulated'
+    print(f"{len(locations)} locations, {args.latency_ms:g} ms API latency, writes: {writes}, "
+          f"rate limit: {args.rate or 'none'}\n")
+    print(f"{'parallelism':<13}{'seconds':>9}{'loc/s':>9}{'speedup':>10}{'errors':>8}")
+    baseline = None
+    for parallelism in (int(value) for value in args.parallelism.split(',')):
+        stats = ingest_engine.run_ingest(locations, fetch, write, parallelism=parallelism)
+        baseline = baseline or stats.locations_per_sec
+        speedup = stats.locations_per_sec / baseline if baseline else 0.0
+        print(f"{parallelism:<13}{stats.elapsed:>9.2f}{stats.locations_per_sec:>9.1f}"
+              f"{speedup:>9.2f}x{stats.fetch_errors + stats.write_errors:>8}")
+    print(f"\n{marine_client.client.latency.summary()}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-endpoint JSON encoding cost: the old jsonify path (list of dicts + stdlib json) against the
+selected fast encoder, and against streaming rows straight from the cursor.
+
+Runs without a database on rows shaped like psycopg2's output:
+    python -m benchmarks.bench_json
+    JSON_ENCODER=stdlib python -m benchmarks.bench_json
+"""
+import json
+import time
+import tracemalloc
+from datetime import date, time as time_type, timedelta
+from decimal import Decimal
+from forecast_data import surf_row, tide_row, graph_point_row
+from json_encoding import JSON_BACKEND, encode, iter_json_array, json_default
+
+ROUNDS = 200
+
+
+def surf_rows(days=7):
+    rows = []
+    for day in range(days):
+        for hour in range(300, 2400, 300):
+            rows.append((len(rows) + 1, 559, (date(2026, 1, 1) + timedelta(days=day)).isoformat(), '06:45:00',
+                         '18:10:00', str(hour), 72.0, 12.0, 45, 'NE', 'Partly cloudy', 6.6, 315, 'NW', 14.0))
+    return rows
+
+
+def tide_rows(days=7):
+    return [(i + 1, 559, f'{(i * 6) % 24:02d}:{i % 60:02d}:00', 0.45, 'HIGH' if i % 2 else 'LOW',
+             date(2026, 1, 1) + timedelta(days=i // 4)) for i in range(days * 4)]
+
+
+def graph_point_rows(days=7):
+    return [(i + 1, 559, time_type(i % 24, (i * 7) % 60), Decimal('0.43'), None) for i in range(days * 24)]
+
+
+def jsonify_path(rows, format_row):
+    return (json.dumps([format_row(row) for row in rows], default=json_default, sort_keys=True,
+                       separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def fast_path(rows, format_row):
+    return encode([format_row(row) for row in rows]) + b'\n'
+
+
+def streamed_path(rows, format_row):
+    return b''.join(iter_json_array(iter(rows), format_row))
+
+
+def measure(build, rows, format_row):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = build(rows, format_row)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    # Streaming consumers write each chunk out; only count the largest chunk alive at a time
+    if build is streamed_path:
+        for _ in iter_json_array(iter(rows), format_row):
+            pass
+    else:
+        build(rows, format_row)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(body)
+
+
+def main():
+    print(f"encoder backend: {JSON_BACKEND}\n")
+    endpoints = [
+        ('/surf/<id>', surf_rows(), surf_row),
+        ('/tide-data/<id>', tide_rows(), tide_row),
+        ('/graph-points/<id>', graph_point_rows(), graph_point_row),
+    ]
+    print(f"{'endpoint':<20}{'path':<12}{'rows':>6}{'ms/call':>10}{'peak KiB':>10}{'bytes':>9}")
+    for name, rows, format_row in endpoints:
+        baseline = None
+        for label, build in (('jsonify', jsonify_path), ('fast', fast_path), ('streamed', streamed_path)):
+            elapsed, peak, size = measure(build, rows, format_row)
+            baseline = baseline or (elapsed, peak)
+            print(f"{name:<20}{label:<12}{len(rows):>6}{elapsed * 1e3:>10.3f}{peak / 1024:>10.1f}{size:>9}"
+                  f"   ({baseline[0] / elapsed:.1f}x time, {baseline[1] / max(peak, 1):.1f}x memory)")
+        print()
+
+
+if __name__ == '__main__':
+    main()
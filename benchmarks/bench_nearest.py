@@ -0,0 +1,68 @@
+"""
+KD-tree vs linear haversine scan for nearest-spot lookups.
+
+Runs without a database, over csv/locations.csv with coordinate overrides applied:
+    python -m benchmarks.bench_nearest
+"""
+import csv
+import random
+import time
+from location_overrides import apply_coordinate_overrides
+from spatial_index import SpotIndex, linear_nearest
+
+QUERIES = 2000
+
+
+def load_locations(path='csv/locations.csv'):
+    with open(path) as file:
+        return [
+            apply_coordinate_overrides({
+                'id': int(row['id']),
+                'location_name': row['location_name'],
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+            })
+            for row in csv.DictReader(file)
+        ]
+
+
+def timed(label, queries, lookup):
+    start = time.perf_counter()
+    results = [lookup(lat, lng) for lat, lng in queries]
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / len(queries) * 1e6:8.1f} us/query")
+    return results
+
+
+def main():
+    locations = load_locations()
+    rnd = random.Random(42)
+    # Query points near real spots (California coast to Hawaii), like phone GPS fixes
+    queries = []
+    for _ in range(QUERIES):
+        spot = rnd.choice(locations)
+        queries.append((spot['latitude'] + rnd.uniform(-0.5, 0.5), spot['longitude'] + rnd.uniform(-0.5, 0.5)))
+
+    start = time.perf_counter()
+    index = SpotIndex(locations)
+    print(f"{len(locations)} locations, index built in {(time.perf_counter() - start) * 1e3:.2f} ms\n")
+
+    for k in (1, 10):
+        tree = timed(f"kd-tree      k={k}", queries, lambda lat, lng: index.nearest(lat, lng, k))
+        scan = timed(f"linear scan  k={k}", queries, lambda lat, lng: linear_nearest(locations, lat, lng, k))
+        # Compare distances, not ids: a few spots share identical coordinates
+        mismatches = sum(
+            [round(distance, 6) for distance, _ in a] != [round(distance, 6) for distance, _ in b]
+            for a, b in zip(tree, scan)
+        )
+        print(f"  mismatched results: {mismatches}\n")
+
+    tree = timed("kd-tree      radius=25km", queries, lambda lat, lng: index.within(lat, lng, 25))
+    scan = timed("linear scan  radius=25km", queries,
+                 lambda lat, lng: linear_nearest(locations, lat, lng, len(locations), 25))
+    mismatches = sum(len(a) != len(b) for a, b in zip(tree, scan))
+    print(f"  mismatched result counts: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
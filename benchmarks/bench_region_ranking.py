@@ -0,0 +1,105 @@
+"""
+Best spots in a region over a time range, three ways against the configured database
+(DATABASE_URL, or the local surf_forecast database):
+    per-spot   one /scores-style query per spot (what N /scores calls cost), sorted in Python
+    load-all   every slot in the region and range fetched, summarised and sorted in Python
+    ranked     region_ranking.py: per-spot summaries from the (region, forecast_time) index,
+               heap top-k
+
+    python -m benchmarks.bench_region_ranking [--region WestCoast] [--hours 24] [--limit 10] [--rounds 5]
+"""
+import argparse
+import time
+from collections import defaultdict
+import db_pool
+from forecast_time import from_now_window, parse_window
+from location_overrides import apply_coordinate_overrides
+from location_registry import LOCATION_COLUMNS, LOCATIONS_SQL
+from region_ranking import fetch_region_ranking
+
+SPOT_SLOTS_SQL = '''
+    SELECT s.location_id, sc.forecast_time, sc.score
+    FROM surf_data s
+    JOIN surf_scores sc ON sc.surf_data_id = s.id
+    WHERE s.location_id = %s AND sc.forecast_time >= %s AND sc.forecast_time < %s
+'''
+
+REGION_SLOTS_SQL = '''
+    SELECT location_id, forecast_time, score
+    FROM surf_scores
+    WHERE region = %s AND forecast_time >= %s AND forecast_time < %s
+'''
+
+
+def summarise(slots):
+    """(location_id, average score, best score) from (location_id, forecast_time, score) rows."""
+    scores = defaultdict(list)
+    for location_id, _, score in slots:
+        if score is not None:
+            scores[location_id].append(score)
+    return [(location_id, sum(values) / len(values), max(values)) for location_id, values in scores.items()]
+
+
+def top(summaries, limit):
+    summaries.sort(key=lambda summary: (summary[1], summary[2], -summary[0]), reverse=True)
+    return [summary[0] for summary in summaries[:limit]]
+
+
+def per_spot(cursor, region, locations, forecast_window, limit):
+    slots = []
+    for location in locations:
+        cursor.execute(SPOT_SLOTS_SQL, (location['id'], forecast_window.start, forecast_window.end))
+        slots += cursor.fetchall()
+    return top(summarise(slots), limit)
+
+
+def load_all(cursor, region, locations, forecast_window, limit):
+    cursor.execute(REGION_SLOTS_SQL, (region, forecast_window.start, forecast_window.end))
+    return top(summarise(cursor.fetchall()), limit)
+
+
+def ranked(cursor, region, locations, forecast_window, limit):
+    return [spot['location_id'] for spot in fetch_region_ranking(cursor, region, locations, forecast_window,
+                                                                 limit=limit)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--region', default='WestCoast')
+    parser.add_argument('--hours', type=int, default=24)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = db_pool.connect()
+    conn.autocommit = True
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LOCATIONS_SQL)
+        locations = [apply_coordinate_overrides(dict(zip(LOCATION_COLUMNS, row))) for row in cursor.fetchall()]
+        locations = [location for location in locations if location['region'] == args.region]
+        forecast_window = parse_window({'hours': str(args.hours)}, args.region, 3,
+                                       from_now_window(args.region, 3))
+        cursor.execute('SELECT count(*) FROM surf_scores WHERE region = %s AND forecast_time >= %s '
+                       'AND forecast_time < %s', (args.region, forecast_window.start, forecast_window.end))
+        print(f"{args.region}: {len(locations)} spots, {cursor.fetchone()[0]} slots in {forecast_window.key()}, "
+              f"top {args.limit} x {args.rounds} rounds\n")
+        print(f"{'path':<10}{'ms':>10}{'speedup':>10}{'same top-k':>12}")
+
+        reference = per_spot(cursor, args.region, locations, forecast_window, args.limit)
+        baseline = None
+        for label, rank in (('per-spot', per_spot), ('load-all', load_all), ('ranked', ranked)):
+            same = rank(cursor, args.region, locations, forecast_window, args.limit) == reference
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                rank(cursor, args.region, locations, forecast_window, args.limit)
+            elapsed = (time.perf_counter() - start) / args.rounds
+            baseline = baseline or elapsed
+            print(f"{label:<10}{elapsed * 1e3:>10.2f}{baseline / elapsed:>9.2f}x{str(same):>12}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from forecast_data import metres_to_feet
+
+# "When is it good this week": contiguous runs of surf slots where swell, wind, tide (and
+# optionally the surf score) meet the request's thresholds, ranked best first. Each location's
+# series (surf slots with the tide interpolated from graph_points at every slot) is built once
+# per ingest source and kept per worker; ranked results are kept per source, window and thresholds.
+
+SESSION_SURF_SQL = '''
+    SELECT date, time, swellHeight_ft, windspeedMiles,
+           (SELECT score FROM surf_scores WHERE surf_scores.surf_data_id = surf_data.id)
+    FROM surf_data
+    WHERE location_id = %s
+    ORDER BY id
+'''
+
+SESSION_TIDE_SQL = '''
+    SELECT graph_date, graph_time, tide_height
+    FROM graph_points
+    WHERE location_id = %s
+    ORDER BY graph_date, graph_time
+'''
+
+DEFAULT_SESSION_LIMIT = 5
+MAX_SESSION_LIMIT = 20
+
+# ?name= threshold -> default (None: not applied unless given)
+THRESHOLD_DEFAULTS = {
+    'min_swell_ft': 2.0,
+    'max_wind_mph': 15.0,
+    'min_tide_ft': None,
+    'max_tide_ft': None,
+    'min_score': None,
+}
+
+
+def _slot_time(date, time):
+    """surf_data 'YYYY-MM-DD' and 'HMM' / 'HHMM' text as a naive local datetime."""
+    hhmm = int(time.replace(':', '') or 0)
+    return datetime.strptime(date, '%Y-%m-%d') + timedelta(hours=hhmm // 100, minutes=hhmm % 100)
+
+
+class SpotSeries:
+    """
+    One location's surf slots as parallel lists in time order, with the tide height (feet)
+    interpolated from graph_points at each slot time (None outside the graph points' range).
+    """
+
+    def __init__(self, surf_rows, tide_rows, slot_hours):
+        self.slot = timedelta(hours=slot_hours)
+        self.times = [_slot_time(row[0], row[1]) for row in surf_rows]
+        self.swell_ft = [row[2] for row in surf_rows]
+        self.wind_mph = [row[3] for row in surf_rows]
+        self.score = [row[4] for row in surf_rows]
+        self.tide_ft = self._interpolate_tide(
+            [(datetime.combine(row[0], row[1]), metres_to_feet(row[2])) for row in tide_rows if row[2] is not None])
+
+    def _interpolate_tide(self, points):
+        # Slots and points are both in time order, so one pointer walks the points once
+        tide = []
+        index = 0
+        for when in self.times:
+            while index + 1 < len(points) and points[index + 1][0] <= when:
+                index += 1
+            if not points or when < points[0][0] or when > points[-1][0]:
+                tide.append(None)
+            elif points[index][0] == when:
+                tide.append(points[index][1])
+            else:
+                (before, low), (after, high) = points[index], points[index + 1]
+                tide.append(round(low + (high - low) * ((when - before) / (after - before)), 2))
+        return tide
+
+
+def parse_thresholds(args):
+    """Threshold values from the query string (THRESHOLD_DEFAULTS names), as a hashable tuple of pairs."""
+    thresholds = []
+    for name, default in THRESHOLD_DEFAULTS.items():
+        value = args.get(name)
+        if value is None:
+            thresholds.append((name, default))
+            continue
+        try:
+            thresholds.append((name, float(value)))
+        except ValueError:
+            raise ValueError(f"{name} must be a number")
+    return tuple(thresholds)
+
+
+def parse_limit(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_SESSION_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_SESSION_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_SESSION_LIMIT}")
+    return limit
+
+
+def _meets(value, low, high):
+    if low is None and high is None:
+        return True
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def find_sessions(series, thresholds, forecast_window=None, limit=DEFAULT_SESSION_LIMIT):
+    """
+    Ranked sessions in one pass over the series: runs of back-to-back slots inside the
+    window that all meet the thresholds, best average score first (then longest, earliest).
+    """
+    limits = dict(thresholds)
+    start = forecast_window.start if forecast_window else None
+    end = forecast_window.end if forecast_window else None
+
+    sessions = []
+    run = None
+    for index, when in enumerate(series.times):
+        good = (
+            (start is None or when + series.slot > start)
+            and (end is None or when < end)
+            and _meets(series.swell_ft[index], limits['min_swell_ft'], None)
+            and _meets(series.wind_mph[index], None, limits['max_wind_mph'])
+            and _meets(series.tide_ft[index], limits['min_tide_ft'], limits['max_tide_ft'])
+            and _meets(series.score[index], limits['min_score'], None)
+        )
+        if run is not None and (not good or when != run['end']):
+            sessions.append(_session(series, run))
+            run = None
+        if good:
+            if run is None:
+                run = {'first': index, 'last': index, 'end': when + series.slot}
+            else:
+                run['last'], run['end'] = index, when + series.slot
+    if run is not None:
+        sessions.append(_session(series, run))
+
+    sessions.sort(key=lambda session: (session['score'] is None, -(session['score'] or 0),
+                                       -session['hours'], session['start']))
+    return sessions[:limit]
+
+
+def _session(series, run):
+    slots = range(run['first'], run['last'] + 1)
+    def known(values):
+        return [values[index] for index in slots if values[index] is not None]
+
+    scores, swells, winds, tides = known(series.score), known(series.swell_ft), known(series.wind_mph), \
+        known(series.tide_ft)
+    start = series.times[run['first']]
+    return {
+        'start': start.isoformat(timespec='minutes'),
+        'end': run['end'].isoformat(timespec='minutes'),
+        'hours': (run['end'] - start).total_seconds() / 3600,
+        'score': round(sum(scores) / len(scores), 1) if scores else None,
+        'swell_ft_min': min(swells, default=None),
+        'swell_ft_max': max(swells, default=None),
+        'wind_mph_max': max(winds, default=None),
+        'tide_ft_min': min(tides, default=None),
+        'tide_ft_max': max(tides, default=None),
+    }
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping; get() returns None for a missing key."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,11 +1,11 @@
 import psycopg2
 import os
 from datetime import datetime, timedelta
-import requests
 from dotenv import load_dotenv
 import logging
 from urllib.parse import urlparse
 import pytz
+import marine_client
 
 
 if os.getenv('ENV') != 'production':
@@ -29,33 +29,12 @@ def get_db_connection():
 def fetch_historical_tide_data(lat: float, lng: float) -> dict:
     print(f"Fetching tide data for latitude {lat} and longitude {lng}...")
 
-    api_key = os.getenv('API_KEY')
-    if not api_key:
-        print("Error: API key not found in environment.")
-        return None
-    
-    base_url = "http://api.worldweatheronline.com/premium/v1/marine.ashx"
-    
     # Set to local timezone
     local_timezone = pytz.timezone('America/Los_Angeles')  # Adjust to your local timezone
     now_local = datetime.now(local_timezone)
     previous_day = (now_local - timedelta(days=1)).strftime('%Y-%m-%d')
-    
-    params = {
-        'key': api_key,
-        'format': 'json',
-        'q': f'{lat},{lng}',
-        'date': previous_day,
-        'tide': 'yes',
-    }
-
-    response = requests.get(base_url, params=params)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print(f"Error fetching historical tide data: {response.status_code}")
-        return None
+
+    return marine_client.client.marine(lat, lng, date=previous_day)
 
 
 def convert_to_24hr_format(time_str: str) -> str:
@@ -136,5 +115,7 @@ def update_tide_data_for_all_locations():
         logging.error(f"Error updating tide data for all locations: {e}")
 
 
-# Run the update for all locations
-update_tide_data_for_all_locations()
+if __name__ == "__main__":
+    # Run the update for all locations
+    update_tide_data_for_all_locations()
+    print(marine_client.client.summary())
@@ -0,0 +1,112 @@
+import functools
+from forecast_data import SURF_FIELDS, serialize_time, metres_to_feet
+
+# v2 bodies for the forecast series endpoints: rows grouped by day, each day holding one array
+# per field instead of one object per row, so key names, the location_id and per-day values
+# (sunrise/sunset) are written once:
+#   {"days": [{"date": "2026-10-18", "sunrise": "06:12", "sunset": "18:01",
+#              "time": ["00:00", "03:00", ...], "swellHeight_ft": [3.2, 3.5, ...], ...}],
+#    "location_id": 1}
+# Keys are the v1 row keys; row ids are left out unless ?fields= names id.
+# Clients pick it with ?format=v2 or by preferring V2_MEDIA_TYPE in Accept.
+V2_MEDIA_TYPE = 'application/vnd.surfbackend.v2+json'
+
+
+def _iso_date(value):
+    return value.isoformat() if value is not None else None
+
+
+class ColumnarFormat:
+    """
+    SELECT clause (ending in FROM, ready for a WHERE) and day builder for one dataset's v2 body.
+    day is (key, column, serializer); day_fields and series are lists of the same, serializer
+    None when the value is written as stored.
+    """
+
+    def __init__(self, table, day, day_fields, series):
+        self.day_key, day_column, self.day_serializer = day
+        columns = [day_column] + [column for _, column, _ in day_fields] + [column for _, column, _ in series]
+        self.select = f"\n    SELECT {', '.join(columns)}\n    FROM {table}\n"
+        self.day_fields = [(index, key, serializer) for index, (key, _, serializer) in enumerate(day_fields, 1)]
+        self.series = [(index, key, serializer)
+                       for index, (key, _, serializer) in enumerate(series, 1 + len(day_fields))]
+
+    def document(self, location_id, rows):
+        """The v2 document for rows of self.select (in row order); days appear in the order first seen."""
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[0], []).append(row)
+
+        days = []
+        for day, day_rows in grouped.items():
+            entry = {self.day_key: self.day_serializer(day) if self.day_serializer else day}
+            first = day_rows[0]
+            for index, key, serializer in self.day_fields:
+                entry[key] = serializer(first[index]) if serializer else first[index]
+            columns = list(zip(*day_rows))
+            for index, key, serializer in self.series:
+                entry[key] = [serializer(value) for value in columns[index]] if serializer else list(columns[index])
+            days.append(entry)
+        return {'location_id': location_id, 'days': days}
+
+
+# Surf keys written once per day, and those with a fixed place in the layout
+SURF_DAY_FIELDS = ('sunrise', 'sunset')
+SURF_STRUCTURAL_FIELDS = ('id', 'location_id', 'date', 'time')
+
+
+def _surf_field(key):
+    column, serializer = SURF_FIELDS[key]
+    return key, column, serializer
+
+
+@functools.lru_cache(maxsize=256)
+def surf_format(fields=None):
+    """v2 surf layout, limited to a field_selection field tuple when given (date and time are always kept)."""
+    def wanted(key):
+        return fields is None or key in fields
+
+    day_fields = [_surf_field(key) for key in SURF_DAY_FIELDS if wanted(key)]
+    series = [_surf_field('time')]
+    if fields is not None and 'id' in fields:
+        series.insert(0, _surf_field('id'))
+    series += [_surf_field(key) for key in SURF_FIELDS
+               if key not in SURF_DAY_FIELDS + SURF_STRUCTURAL_FIELDS and wanted(key)]
+    return ColumnarFormat('surf_data', _surf_field('date'), day_fields, series)
+
+
+TIDE_FORMAT = ColumnarFormat(
+    'tide_data',
+    ('date', 'tide_date', _iso_date),
+    [],
+    [('tide_time', 'tide_time', serialize_time),
+     ('tide_height_mt', 'tide_height_mt', None),
+     ('tide_type', 'tide_type', None)],
+)
+
+GRAPH_FORMAT = ColumnarFormat(
+    'graph_points',
+    ('date', 'graph_date', _iso_date),
+    [],
+    [('graph_time', 'graph_time', serialize_time),
+     ('tide_height', 'tide_height', metres_to_feet),
+     ('tide_type', 'tide_type', None)],
+)
+
+
+# Body formats of the series endpoints: ?format= name -> media type an Accept header can ask for
+SERIES_FORMATS = {'v1': 'application/json', 'v2': V2_MEDIA_TYPE}
+
+
+def negotiate_format(format_arg, accept_mimetypes, formats=SERIES_FORMATS):
+    """
+    Name of the body format to send: ?format= when given (ValueError unless it is one of
+    formats), else the format whose media type the Accept header (a werkzeug MIMEAccept)
+    prefers, v1 when it names none of them.
+    """
+    if format_arg is not None:
+        if format_arg not in formats:
+            raise ValueError(f"format must be one of {', '.join(formats)}")
+        return format_arg
+    best = accept_mimetypes.best_match(list(formats.values()))
+    return next((name for name, media_type in formats.items() if media_type == best), 'v1')
@@ -0,0 +1,144 @@
+import functools
+import json
+from forecast_data import location_summary
+from json_encoding import JSON_BACKEND, dumps_json, ascii_json
+
+# The combined-data document with its surf and tide arrays rendered by Postgres in one
+# statement, so the rows never become Python objects. Postgres' own json_build_object/json_agg
+# output has spaces after separators and keeps insertion key order, while jsonify is compact
+# with sorted keys; the arrays are therefore concatenated field by field from the specs below
+# (keys sorted here, values escaped with to_json), which gives byte-identical output.
+# Needs PostgreSQL 12+ for shortest round-trip float output.
+
+
+def _text(column):
+    return f"coalesce(to_json({column})::text, 'null')"
+
+
+def _int(column):
+    return f"coalesce({column}::text, 'null')"
+
+
+# Written in place of floats whose text differs between encoders; control characters inside
+# strings are always escaped by to_json, so this byte only ever comes from here
+FALLBACK_MARKER = '\x01'
+
+
+def _float(column):
+    # Postgres, json and orjson write the same shortest digits in [1e-4, 1e15); outside that
+    # range (and for NaN/Infinity) each uses its own exponent format, so mark them instead.
+    # Python writes integral floats as '72.0' where Postgres writes '72'.
+    return (f"CASE WHEN {column} IS NULL THEN 'null' "
+            f"WHEN {column} <> 0 AND (abs({column}) < 1e-4 OR abs({column}) >= 1e15) THEN chr(1) "
+            f"WHEN {column} = trunc({column}) THEN {column}::text || '.0' "
+            f"ELSE {column}::text END")
+
+
+def _time(column):
+    """forecast_data.serialize_time for text columns: 'H:MM' and 'h:MM AM' become 'HH:MM', others pass through."""
+    return _text(
+        f"CASE WHEN {column} ~ '^(2[0-3]|[01][0-9]|[0-9]):([0-5][0-9]|[0-9])$' "
+        f"THEN lpad(split_part({column}, ':', 1), 2, '0') || ':' || lpad(split_part({column}, ':', 2), 2, '0') "
+        f"WHEN {column} ~* '^(1[0-2]|0[1-9]|[1-9]):([0-5][0-9]|[0-9])\\s+(am|pm)$' "
+        f"THEN lpad((mod(split_part({column}, ':', 1)::int, 12) + CASE WHEN {column} ~* 'pm$' THEN 12 ELSE 0 END)::text, 2, '0')"
+        f" || ':' || lpad(substring({column} from ':([0-9]+)'), 2, '0') "
+        f"ELSE {column} END"
+    )
+
+
+def _http_date(column):
+    """DATE as Flask renders it (werkzeug http_date), e.g. 'Sun, 18 Oct 2026 00:00:00 GMT'."""
+    return f"""coalesce('"' || to_char({column}, 'Dy, DD Mon YYYY "00:00:00 GMT"') || '"', 'null')"""
+
+
+# Same keys and value rendering as forecast_data.combined_surf_row / tide_row(height_key='tide_height')
+SURF_JSON_FIELDS = {
+    'id': _int('s.id'),
+    'location_id': _int('s.location_id'),
+    'date': _text('s.date'),
+    'sunrise': _time('s.sunrise'),
+    'sunset': _time('s.sunset'),
+    'time': _time('s.time'),
+    'tempF': _float('s.tempF'),
+    'windspeedMiles': _float('s.windspeedMiles'),
+    'winddirDegree': _int('s.winddirDegree'),
+    'winddir16point': _text('s.winddir16point'),
+    'weatherDesc': _text('s.weatherDesc'),
+    'swellHeight_ft': _float('s.swellHeight_ft'),
+    'swelldir': _int('s.swelldir'),
+    'swelldir16point': _text('s.swelldir16point'),
+    'swellperiod_secs': _float('s.swellperiod_secs'),
+    'score': _float('sc.score'),
+}
+
+TIDE_JSON_FIELDS = {
+    'id': _int('t.id'),
+    'location_id': _int('t.location_id'),
+    'tide_time': _time('t.tide_time'),
+    'tide_height': _float('t.tide_height_mt'),
+    'tide_type': _text('t.tide_type'),
+    'tide_date': _http_date('t.tide_date'),
+}
+
+
+def _object_sql(fields):
+    """SQL text expression for one compact JSON object with keys in jsonify's (sorted) order."""
+    parts = []
+    for index, key in enumerate(sorted(fields)):
+        parts.append("'" + ('{' if index == 0 else ',') + json.dumps(key) + ":'")
+        parts.append(fields[key])
+    parts.append("'}'")
+    return 'concat(' + ', '.join(parts) + ')'
+
+
+@functools.lru_cache(maxsize=256)
+def combined_json_sql(surf_fields=None):
+    """COMBINED_JSON_SQL with surf objects limited to surf_fields (a field_selection field tuple)."""
+    fields = SURF_JSON_FIELDS if surf_fields is None else {field: SURF_JSON_FIELDS[field] for field in surf_fields}
+    return f'''
+    WITH surf AS (
+        SELECT string_agg({_object_sql(fields)}, ',' ORDER BY s.id) AS rows
+        FROM surf_data s
+        LEFT JOIN surf_scores sc ON sc.surf_data_id = s.id
+        WHERE %(include_surf)s AND s.location_id = %(location_id)s
+    ),
+    tide AS (
+        SELECT string_agg({_object_sql(TIDE_JSON_FIELDS)}, ',' ORDER BY t.id) AS rows
+        FROM tide_data t
+        WHERE %(include_tide)s AND t.location_id = %(location_id)s
+    )
+    SELECT '[' || coalesce(surf.rows, '') || ']', '[' || coalesce(tide.rows, '') || ']'
+    FROM surf, tide
+'''
+
+
+COMBINED_JSON_SQL = combined_json_sql()
+
+
+def fetch_combined_json(cursor, location, include_surf=True, include_tide=True, surf_projection=None):
+    """
+    The /locations/combined-data/<id> body in one round trip: location fields from the
+    registry entry, surf and tide arrays straight from COMBINED_JSON_SQL. Same bytes as
+    jsonify(build_combined_data(...)); returns None for the rare document holding a float
+    Postgres would format differently, so the caller can build that one in Python.
+    surf_projection (from field_selection) limits the keys of the surf rows.
+    """
+    sql = combined_json_sql(surf_projection.fields) if surf_projection else COMBINED_JSON_SQL
+    cursor.execute(sql, {
+        'location_id': location['id'],
+        'include_surf': include_surf,
+        'include_tide': include_tide,
+    })
+    surf, tide = cursor.fetchone()
+    if FALLBACK_MARKER in surf or FALLBACK_MARKER in tide:
+        return None
+
+    # dumps_json output ends in '}\n'; surf_data and tide_data sort after every location key
+    body = dumps_json(location_summary(location))[:-2]
+    if include_surf:
+        body += b',"surf_data":' + surf.encode('utf-8')
+    if include_tide:
+        body += b',"tide_data":' + tide.encode('utf-8')
+    body += b'}\n'
+    # Postgres writes non-ASCII text as UTF-8, like orjson; the stdlib encoder escapes it
+    return ascii_json(body) if JSON_BACKEND == 'stdlib' else body
@@ -0,0 +1,128 @@
+import gzip
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+# Memory budget for compressed bodies cached per (ETag, encoding) in each worker
+COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html')
+
+# Server preference when the client accepts several encodings with the same quality
+ENCODINGS = [name for name, available in (('br', brotli), ('zstd', zstandard), ('gzip', True)) if available]
+
+
+def compress(body, encoding, cached=False):
+    """Cached bodies are compressed once per data version, so they get the slow, small settings."""
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=9 if cached else 6, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if cached else 5)
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=19 if cached else 3).compress(body)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate(accept_encodings):
+    """Best encoding for a werkzeug Accept-Encoding header, or None for identity."""
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def acceptable(accept_encodings):
+    """Every encoding the client accepts, best first (client quality, then server preference)."""
+    qualities = [(accept_encodings[name], -index, name) for index, name in enumerate(ENCODINGS)]
+    return [name for quality, _, name in sorted(qualities, reverse=True) if quality > 0]
+
+
+def iter_gzip(chunks, on_complete=None):
+    """
+    gzip-compresses a streamed body chunk by chunk. on_complete(raw_size, compressed_chunks) is
+    called once the whole body has been sent, so callers can cache or measure it.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    raw_size = 0
+    sent = []
+    for chunk in chunks:
+        raw_size += len(chunk)
+        data = compressor.compress(chunk)
+        if data:
+            sent.append(data)
+            yield data
+    data = compressor.flush()
+    sent.append(data)
+    yield data
+    if on_complete is not None:
+        on_complete(raw_size, sent)
+
+
+class CompressedBodyCache:
+    """
+    Byte-bounded LRU of compressed bodies keyed by (ETag, encoding). ETags already identify the
+    endpoint, location and ingest versions, so each body is compressed once per ingest run.
+    Entries are (compressed body, uncompressed size).
+    """
+
+    def __init__(self, max_bytes=COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, etag, encoding):
+        with self._lock:
+            entry = self._entries.get((etag, encoding))
+            if entry is not None:
+                self._entries.move_to_end((etag, encoding))
+            return entry
+
+    def put(self, etag, encoding, body, raw_size):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop((etag, encoding), None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._entries[(etag, encoding)] = (body, raw_size)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class CompressionMetrics:
+    """Per-endpoint counters: responses compressed, bytes before/after, cache hits."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, raw_bytes, compressed_bytes, cache_hit=False):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'responses': 0, 'cache_hits': 0, 'raw_bytes': 0, 'compressed_bytes': 0,
+            })
+            stats['responses'] += 1
+            stats['cache_hits'] += int(cache_hit)
+            stats['raw_bytes'] += raw_bytes
+            stats['compressed_bytes'] += compressed_bytes
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: dict(stats, ratio=round(stats['raw_bytes'] / stats['compressed_bytes'], 2)
+                               if stats['compressed_bytes'] else None)
+                for endpoint, stats in self._endpoints.items()
+            }
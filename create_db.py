@@ -113,6 +113,69 @@ def create_db() -> None:
             )
         ''')
 
+        # Per-location lookups (and WHERE location_id = ANY(...) batches) on the forecast tables
+        cursor.execute('CREATE INDEX IF NOT EXISTS surf_data_location_id_idx ON surf_data (location_id, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS tide_data_location_id_idx ON tide_data (location_id, id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS graph_points_location_id_idx ON graph_points (location_id, id)')
+
+        # ?start=/?end=/?hours= windows filter each location's rows by date first
+        cursor.execute('CREATE INDEX IF NOT EXISTS surf_data_location_date_idx ON surf_data (location_id, date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS tide_data_location_date_idx ON tide_data (location_id, tide_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS graph_points_location_date_idx ON graph_points (location_id, graph_date)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS boundary_tide_data_location_date_idx ON boundary_tide_data (location_id, tide_date)')
+
+        # Single-row stamp bumped whenever the locations table is rewritten
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS location_version (
+                id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT NOW()
+            )
+        ''')
+
+        # Per-location version of each ingested dataset ('surf', 'tide', 'graph'), used for ETags
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_versions (
+                location_id INT REFERENCES locations(id),
+                dataset VARCHAR(20) NOT NULL,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT NOW(),
+                PRIMARY KEY (location_id, dataset)
+            )
+        ''')
+
+        # Surf-quality score per surf_data row, rewritten by surf_scores.score_all_surf
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS surf_scores (
+                surf_data_id INT PRIMARY KEY REFERENCES surf_data(id) ON DELETE CASCADE,
+                location_id INT REFERENCES locations(id),
+                region VARCHAR(50),
+                forecast_time TIMESTAMP,
+                score DOUBLE PRECISION,
+                face_ft DOUBLE PRECISION,
+                swell_quality DOUBLE PRECISION,
+                wind_quality DOUBLE PRECISION
+            )
+        ''')
+        # Region rankings scan one region's time range; the included columns make it index-only
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS surf_scores_region_time_idx ON surf_scores (region, forecast_time)
+            INCLUDE (location_id, score, face_ft, wind_quality)
+        ''')
+
+        # JSON bodies rendered at ingest time, served as-is by the API
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS response_payloads (
+                location_id INT REFERENCES locations(id),
+                kind VARCHAR(20) NOT NULL,
+                source TEXT NOT NULL,
+                body BYTEA NOT NULL,
+                body_gzip BYTEA NOT NULL,
+                rendered_at TIMESTAMP DEFAULT NOW(),
+                PRIMARY KEY (location_id, kind)
+            )
+        ''')
+
         conn.commit()
         print("Database and tables created successfully!")
 
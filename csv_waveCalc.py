@@ -1,6 +1,7 @@
 import csv
 import psycopg2
 import os
+from location_registry import bump_location_version
 
 def safe_int(value):
     if value == '' or value is None:
@@ -96,6 +97,9 @@ def update_locations():
                         row['reef'].lower() == 'true'
                     ))
 
+        # Tell the API workers to reload their location registry
+        bump_location_version(cur)
+
         conn.commit()
         cur.close()
         conn.close()
@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+import psycopg2
+import psycopg2.extensions
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pool settings, overridable per dyno/worker through the environment
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_MAX_AGE = float(os.getenv('DB_POOL_MAX_AGE', '1800'))        # seconds before a connection is recycled
+DB_POOL_CHECK_AFTER = float(os.getenv('DB_POOL_CHECK_AFTER', '30'))  # idle seconds before a checkout ping
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))          # seconds to wait for a free connection
+DB_POOL_MODE = os.getenv('DB_POOL_MODE', 'session')                  # 'session' or 'transaction' (PgBouncer)
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """Raised when no connection becomes free within the checkout timeout."""
+
+
+def connect():
+    """Opens a new raw connection using the same settings the app always used."""
+    DATABASE_URL = os.environ.get('DATABASE_URL')
+    if DATABASE_URL:
+        return psycopg2.connect(DATABASE_URL, sslmode='require')
+    return psycopg2.connect(
+        dbname="surf_forecast",
+        user="orlandosantos",
+        host="localhost",
+        port="5432"
+    )
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections with checkout health checks and a max connection age.
+
+    In 'transaction' mode connections run in autocommit so every statement is its own
+    transaction; a transaction-mode pooler can then hand the server backend to another
+    client as soon as the statement finishes, and no session state is ever relied on.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN_SIZE, maxconn=DB_POOL_MAX_SIZE, max_age=DB_POOL_MAX_AGE,
+                 check_after=DB_POOL_CHECK_AFTER, timeout=DB_POOL_TIMEOUT, mode=DB_POOL_MODE,
+                 connect=connect):
+        if mode not in ('session', 'transaction'):
+            raise ValueError(f"Unknown DB_POOL_MODE: {mode}")
+        self.minconn = minconn
+        self.maxconn = max(maxconn, 1)
+        self.max_age = max_age
+        self.check_after = check_after
+        self.timeout = timeout
+        self.mode = mode
+        self.pid = os.getpid()
+        self._connect = connect
+        self._idle = []      # [(conn, last_used)] - most recently used last
+        self._created = {}   # id(conn) -> creation time, for every open connection
+        self._opening = 0    # connects in progress, counted against maxconn
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def _new_connection(self):
+        conn = self._connect()
+        if self.mode == 'transaction':
+            conn.autocommit = True
+        with self._cond:
+            self._created[id(conn)] = time.monotonic()
+        return conn
+
+    def _discard(self, conn):
+        self._created.pop(id(conn), None)
+        try:
+            if not conn.closed:
+                conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _expired(self, conn):
+        return time.monotonic() - self._created.get(id(conn), 0) > self.max_age
+
+    def _healthy(self, conn, last_used):
+        """Cheap checks always; a round-trip ping only for connections idle longer than check_after."""
+        if conn.closed or self._expired(conn):
+            return False
+        if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def warm(self):
+        """Opens connections up to minconn so the first requests skip the handshake."""
+        while len(self._created) < self.minconn:
+            conn = self._new_connection()
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+
+    def getconn(self):
+        """
+        Checks out a connection. Pings and new connects happen outside the lock so a slow
+        handshake never blocks other threads returning or borrowing connections.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self.closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                elif len(self._created) + self._opening < self.maxconn:
+                    conn = None
+                    self._opening += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is not None:
+                if self._healthy(conn, last_used):
+                    return conn
+                with self._cond:
+                    self._discard(conn)
+                continue
+
+            try:
+                return self._new_connection()
+            finally:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify()
+
+    def putconn(self, conn, discard=False):
+        with self._cond:
+            try:
+                if id(conn) not in self._created:
+                    conn.close()
+                    return
+                if self.closed or discard or conn.closed or self._expired(conn):
+                    self._discard(conn)
+                    return
+                # Never hand out a connection with an open (or failed) transaction
+                status = conn.info.transaction_status
+                if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                    self._discard(conn)
+                    return
+                if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        self._discard(conn)
+                        return
+                self._idle.append((conn, time.monotonic()))
+            finally:
+                self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self.closed = True
+            for conn, _ in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def init_pool(**kwargs):
+    """
+    Creates the pool for the current process. Called from gunicorn's post_fork hook so every
+    worker owns its own sockets; a pool inherited from a parent process is abandoned, never
+    closed, because closing it would tear down the parent's server sessions.
+    """
+    global _pool
+    with _pool_lock:
+        _pool = ConnectionPool(**kwargs)
+    try:
+        _pool.warm()
+    except psycopg2.Error as e:
+        # Don't fail worker boot; routes will connect lazily once the database is reachable
+        print(f"Database pool warm-up error: {e}")
+    return _pool
+
+
+def get_pool():
+    """Returns this process's pool, creating it lazily (e.g. under `flask run` or after a fork)."""
+    global _pool
+    pool = _pool
+    if pool is None or pool.pid != os.getpid() or pool.closed:
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid() or _pool.closed:
+                _pool = ConnectionPool()
+            pool = _pool
+    return pool
+
+
+def getconn():
+    return get_pool().getconn()
+
+
+def putconn(conn, discard=False):
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        conn.close()
+        return
+    pool.putconn(conn, discard=discard)
@@ -0,0 +1,190 @@
+import argparse
+import math
+import os
+
+# Spots a few hundred metres apart (Pipeline / Backdoor / Off The Wall, the Cardiff reefs) get
+# the same forecast from the provider's much coarser model grid. With MARINE_GRID_DEGREES set,
+# the planner groups locations into cells and fetches each cell once, at its first (lowest-id)
+# member's coordinates, for every member to share. A location joins the nearest cell whose
+# fetch point is within MARINE_GRID_DEGREES on both axes (searched in the neighbouring grid
+# squares), so spots on either side of a grid line still share. The default 0 keeps one fetch
+# per distinct coordinate pair; validate a grid before turning it on.
+#
+#     python fetch_planner.py [--grid 0.05]                       cells and calls saved
+#     python fetch_planner.py --validate [--grid 0.05] [--cells 10]
+#         fetches shared cells both ways and compares the fanned-out forecasts per spot
+MARINE_GRID_DEGREES = float(os.getenv('MARINE_GRID_DEGREES', '0'))
+
+# Forecast values compared in validation mode; directions are compared around the circle
+VALIDATION_FIELDS = ('swellHeight_ft', 'swellPeriod_secs', 'swellDir', 'windspeedMiles', 'winddirDegree')
+DIRECTION_FIELDS = ('swellDir', 'winddirDegree')
+
+
+def cell_key(lat, lng, grid_degrees=MARINE_GRID_DEGREES):
+    """Grid square of a point; the exact coordinates when grid_degrees is 0."""
+    if not grid_degrees:
+        return (float(lat), float(lng))
+    return (math.floor(float(lat) / grid_degrees), math.floor(float(lng) / grid_degrees))
+
+
+class FetchCell:
+    def __init__(self, location_id, lat, lng):
+        self.location_id = location_id  # the member whose coordinates are fetched
+        self.lat = lat
+        self.lng = lng
+        self.members = []
+
+
+class FetchPlan:
+    """(location_id, lat, lng) locations grouped into fetch cells, one fetch per cell."""
+
+    def __init__(self, locations, grid_degrees=MARINE_GRID_DEGREES):
+        self.grid_degrees = grid_degrees
+        self.cells = {}
+        self.locations = {}
+        self._cell_of = {}
+        squares = {}  # cell_key of each cell's fetch point -> cells
+        for location_id, lat, lng in sorted(locations):
+            self.locations[location_id] = (lat, lng)
+            cell = self._nearest_cell(squares, float(lat), float(lng))
+            if cell is None:
+                cell = self.cells[location_id] = FetchCell(location_id, lat, lng)
+                squares.setdefault(cell_key(lat, lng, grid_degrees), []).append(cell)
+            cell.members.append(location_id)
+            self._cell_of[location_id] = cell
+
+    def _nearest_cell(self, squares, lat, lng):
+        """Closest cell whose fetch point is within grid_degrees on both axes, or None."""
+        if not self.grid_degrees:
+            cells = squares.get(cell_key(lat, lng, 0))
+            return cells[0] if cells else None
+        row, column = cell_key(lat, lng, self.grid_degrees)
+        best, best_distance = None, None
+        for nearby in ((row + dr, column + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+            for cell in squares.get(nearby, ()):
+                distance = max(abs(float(cell.lat) - lat), abs(float(cell.lng) - lng))
+                if distance <= self.grid_degrees and (best is None or distance < best_distance):
+                    best, best_distance = cell, distance
+        return best
+
+    def fetch_point(self, location_id):
+        """Coordinates to fetch for the location: its cell's."""
+        cell = self._cell_of[location_id]
+        return cell.lat, cell.lng
+
+    def shared_cells(self):
+        return [cell for cell in self.cells.values() if len(cell.members) > 1]
+
+    def report(self):
+        locations = len(self.locations)
+        return {
+            'grid_degrees': self.grid_degrees,
+            'locations': locations,
+            'fetches': len(self.cells),
+            'calls_saved': locations - len(self.cells),
+            'shared_cells': len(self.shared_cells()),
+            'largest_cell': max((len(cell.members) for cell in self.cells.values()), default=0),
+        }
+
+    def summary(self):
+        report = self.report()
+        return (f"{report['fetches']} fetches for {report['locations']} locations on a "
+                f"{report['grid_degrees']} degree grid ({report['calls_saved']} calls saved, "
+                f"{report['shared_cells']} shared cells, largest {report['largest_cell']})")
+
+
+def forecast_values(weather_data):
+    """{(date, time, field): number} of the rows insert_surf_data keeps, plus tide heights by date and order."""
+    values = {}
+    for day in weather_data or []:
+        date = day.get('date')
+        for hourly in day.get('hourly', []):
+            for field in VALIDATION_FIELDS:
+                try:
+                    values[(date, hourly.get('time'), field)] = float(hourly.get(field))
+                except (TypeError, ValueError):
+                    pass
+        for tides in day.get('tides', [])[:1]:
+            for index, tide in enumerate(tides.get('tide_data', [])):
+                try:
+                    values[(date, index, 'tideHeight_mt')] = float(tide.get('tideHeight_mt'))
+                except (TypeError, ValueError):
+                    pass
+    return values
+
+
+def _difference(field, a, b):
+    difference = abs(a - b)
+    return min(difference, 360 - difference) if field in DIRECTION_FIELDS else difference
+
+
+def compare_forecasts(shared, own):
+    """Per-field (max, mean) absolute difference between two payloads' forecast values, plus missing keys."""
+    shared_values, own_values = forecast_values(shared), forecast_values(own)
+    differences = {}
+    for key, value in own_values.items():
+        if key in shared_values:
+            differences.setdefault(key[2], []).append(_difference(key[2], shared_values[key], value))
+    return {
+        'fields': {field: (round(max(values), 2), round(sum(values) / len(values), 3))
+                   for field, values in differences.items()},
+        'missing': len(set(own_values) ^ set(shared_values)),
+    }
+
+
+def validate(plan, fetch_weather, max_cells=None):
+    """
+    For each shared cell (up to max_cells), fetches every member at its own coordinates and
+    compares that with the cell's forecast. fetch_weather(lat, lng) returns the weather list.
+    Returns {'spots', 'identical', 'fields': {field: (max, mean of spot means)}, 'worst': [...]}.
+    """
+    results = []
+    for cell in plan.shared_cells()[:max_cells]:
+        shared = fetch_weather(cell.lat, cell.lng)
+        for location_id in cell.members[1:]:
+            lat, lng = plan.locations[location_id]
+            comparison = compare_forecasts(shared, fetch_weather(lat, lng))
+            results.append((location_id, comparison))
+
+    fields = {}
+    for _, comparison in results:
+        for field, (largest, mean) in comparison['fields'].items():
+            worst, means = fields.setdefault(field, (0.0, []))
+            means.append(mean)
+            fields[field] = (max(worst, largest), means)
+    identical = sum(1 for _, comparison in results
+                    if not comparison['missing'] and all(largest == 0 for largest, _ in comparison['fields'].values()))
+    return {
+        'spots': len(results),
+        'identical': identical,
+        'fields': {field: (largest, round(sum(means) / len(means), 3)) for field, (largest, means) in fields.items()},
+        'worst': sorted(((comparison['fields'].get('swellHeight_ft', (0, 0))[0], location_id)
+                         for location_id, comparison in results), reverse=True)[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--grid', type=float, default=MARINE_GRID_DEGREES, help='cell size in degrees, 0 = exact coordinates')
+    parser.add_argument('--validate', action='store_true', help='compare shared-cell forecasts with per-spot fetches')
+    parser.add_argument('--cells', type=int, default=None, help='shared cells to validate (default all)')
+    args = parser.parse_args()
+
+    from surfBackend import load_locations
+    plan = FetchPlan(load_locations(), args.grid)
+    print(plan.summary())
+    if not args.validate:
+        return
+
+    import marine_client
+    report = validate(plan, marine_client.client.weather, args.cells)
+    print(f"\n{report['identical']} of {report['spots']} fanned-out spots identical to their own fetch")
+    print(f"{'field':<18}{'max diff':>10}{'mean diff':>11}")
+    for field, (largest, mean) in sorted(report['fields'].items()):
+        print(f"{field:<18}{largest:>10}{mean:>11}")
+    print(f"largest swell height differences (ft, location): {report['worst']}")
+    print(marine_client.client.latency.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import functools
+from forecast_data import SURF_FIELDS, COMBINED_SURF_FIELDS
+
+# ?fields= lets a client ask for only some keys of each forecast row; the projection both
+# narrows the SELECT list and builds smaller row dicts. Each endpoint names the row keys
+# it accepts (for combined-data, the keys of its surf_data rows).
+FIELD_WHITELISTS = {
+    'surf': ('surf_data', SURF_FIELDS),
+    'combined': ('surf_data', COMBINED_SURF_FIELDS),
+}
+
+# Distinct field lists whose projections are kept per worker
+PROJECTION_CACHE_SIZE = 256
+
+
+class Projection:
+    """SELECT clause (ending in FROM, ready for a WHERE) and row formatter for one field list."""
+
+    def __init__(self, fields, table, columns):
+        self.fields = fields
+        self.select = f"\n    SELECT {', '.join(columns[field][0] for field in fields)}\n    FROM {table}\n"
+        self.format_row = _row_formatter([(field, columns[field][1]) for field in fields])
+
+
+def _row_formatter(fields):
+    plain = [(index, field) for index, (field, serializer) in enumerate(fields) if serializer is None]
+    serialized = [(index, field, serializer) for index, (field, serializer) in enumerate(fields) if serializer]
+
+    def format_row(row):
+        formatted = {field: row[index] for index, field in plain}
+        for index, field, serializer in serialized:
+            formatted[field] = serializer(row[index])
+        return formatted
+    return format_row
+
+
+def parse_fields(value, endpoint):
+    """
+    ?fields=a,b,c -> the named fields as a tuple in the endpoint's column order (duplicates
+    dropped), or None when the parameter is absent. Raises ValueError with a message for
+    the client when a field is not on the endpoint's whitelist.
+    """
+    if value is None:
+        return None
+    columns = FIELD_WHITELISTS[endpoint][1]
+    requested = {field.strip() for field in value.split(',') if field.strip()}
+    if not requested:
+        raise ValueError("fields must name at least one field")
+    unknown = sorted(requested - columns.keys())
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)} (choose from {', '.join(columns)})")
+    return tuple(field for field in columns if field in requested)
+
+
+@functools.lru_cache(maxsize=PROJECTION_CACHE_SIZE)
+def projection(endpoint, fields):
+    """The Projection for parse_fields' output, built once per distinct field list."""
+    table, columns = FIELD_WHITELISTS[endpoint]
+    return Projection(fields, table, columns)
+
+
+def request_projection(value, endpoint):
+    """
+    parse_fields + projection, or None when every field is wanted (so the full-row paths,
+    pre-rendered bodies included, still apply). Raises ValueError like parse_fields.
+    """
+    fields = parse_fields(value, endpoint)
+    if fields is None or len(fields) == len(FIELD_WHITELISTS[endpoint][1]):
+        return None
+    return projection(endpoint, fields)
@@ -0,0 +1,230 @@
+from datetime import datetime, time as time_type
+
+# Queries and row formatting shared by the API routes and the payload renderer,
+# so a pre-rendered body is byte-for-byte what the live route would return.
+
+SURF_SELECT = '''
+    SELECT id, location_id, date, sunrise, sunset, time, tempF, windspeedMiles, winddirDegree,
+           winddir16point, weatherDesc, swellHeight_ft, swelldir, swelldir16point, swellperiod_secs
+    FROM surf_data
+'''
+
+TIDE_SELECT = '''
+    SELECT id, location_id, tide_time, tide_height_mt, tide_type, tide_date
+    FROM tide_data
+'''
+
+# Combined-data surf rows also carry the row's surf-quality score (surf_scores.py), null until scored
+SURF_SCORE_SQL = '(SELECT score FROM surf_scores WHERE surf_scores.surf_data_id = surf_data.id)'
+
+COMBINED_SURF_SELECT = f'''
+    SELECT id, location_id, date, sunrise, sunset, time, tempF, windspeedMiles, winddirDegree,
+           winddir16point, weatherDesc, swellHeight_ft, swelldir, swelldir16point, swellperiod_secs,
+           {SURF_SCORE_SQL} AS score
+    FROM surf_data
+'''
+
+# Only the score columns of surf_scores, so callers' unqualified location_id/date filters stay on surf_data
+SCORES_SELECT = '''
+    SELECT id, location_id, date, time, score, face_ft, swell_quality, wind_quality
+    FROM surf_data
+    JOIN (SELECT surf_data_id, score, face_ft, swell_quality, wind_quality FROM surf_scores) surf_scores
+      ON surf_scores.surf_data_id = surf_data.id
+'''
+
+GRAPH_POINTS_SELECT = '''
+    SELECT id, location_id, graph_time, tide_height, tide_type
+    FROM graph_points
+'''
+
+
+# Utility functions to serialize date and time
+def serialize_time(value):
+    if isinstance(value, datetime):
+        return value.strftime('%H:%M')
+    elif isinstance(value, time_type):  # Use time_type to avoid conflict
+        return value.strftime('%H:%M')
+    elif isinstance(value, str):
+        try:
+            time_obj = datetime.strptime(value, '%H:%M')
+            return time_obj.strftime('%H:%M')
+        except ValueError:
+            try:
+                time_obj = datetime.strptime(value, '%I:%M %p')
+                return time_obj.strftime('%H:%M')
+            except ValueError:
+                return value
+    return value
+
+def serialize_date(value):
+    return value.strftime('%a %b %d') if isinstance(value, datetime) else value
+
+
+def surf_row(row):
+    return {
+        'id': row[0],
+        'location_id': row[1],
+        'date': serialize_date(row[2]),
+        'sunrise': serialize_time(row[3]),
+        'sunset': serialize_time(row[4]),
+        'time': serialize_time(row[5]),
+        'tempF': row[6],
+        'windspeedMiles': row[7],
+        'winddirDegree': row[8],
+        'winddir16point': row[9],
+        'weatherDesc': row[10],
+        'swellHeight_ft': row[11],
+        'swelldir': row[12],
+        'swelldir16point': row[13],
+        'swellperiod_secs': row[14],
+    }
+
+
+# surf_row's keys -> (surf_data column, serializer or None), in SURF_SELECT order; ?fields=
+# projections (field_selection.py) select and format just the keys they name from this
+SURF_FIELDS = {
+    'id': ('id', None),
+    'location_id': ('location_id', None),
+    'date': ('date', serialize_date),
+    'sunrise': ('sunrise', serialize_time),
+    'sunset': ('sunset', serialize_time),
+    'time': ('time', serialize_time),
+    'tempF': ('tempF', None),
+    'windspeedMiles': ('windspeedMiles', None),
+    'winddirDegree': ('winddirDegree', None),
+    'winddir16point': ('winddir16point', None),
+    'weatherDesc': ('weatherDesc', None),
+    'swellHeight_ft': ('swellHeight_ft', None),
+    'swelldir': ('swelldir', None),
+    'swelldir16point': ('swelldir16point', None),
+    'swellperiod_secs': ('swellperiod_secs', None),
+}
+
+
+def combined_surf_row(row):
+    combined = surf_row(row)
+    combined['score'] = row[15]
+    return combined
+
+
+# Keys a combined-data surf row may be narrowed to
+COMBINED_SURF_FIELDS = dict(SURF_FIELDS, score=(SURF_SCORE_SQL, None))
+
+
+def score_row(row):
+    return {
+        'id': row[0],
+        'location_id': row[1],
+        'date': serialize_date(row[2]),
+        'time': serialize_time(row[3]),
+        'score': row[4],
+        'face_ft': row[5],
+        'swell_quality': row[6],
+        'wind_quality': row[7],
+    }
+
+
+def tide_row(row, height_key='tide_height_mt'):
+    """/tide-data names the height 'tide_height_mt'; combined-data calls it 'tide_height'."""
+    return {
+        'id': row[0],
+        'location_id': row[1],
+        'tide_time': serialize_time(row[2]),
+        height_key: row[3],
+        'tide_type': row[4],
+        'tide_date': serialize_date(row[5])
+    }
+
+
+def metres_to_feet(value):
+    return round(float(value) * 3.28084, 2)  # Convert to float, then to feet and round
+
+
+def graph_point_row(row):
+    return {
+        'id': row[0],
+        'location_id': row[1],
+        'graph_time': serialize_time(row[2]),
+        'tide_height': metres_to_feet(row[3]),
+        'tide_type': row[4]
+    }
+
+
+def fetch_surf_data(cursor, location_id, projection=None, scored=False):
+    """All surf fields (plus the score when scored), or only those of a field_selection projection."""
+    if projection:
+        select, format_row = projection.select, projection.format_row
+    else:
+        select, format_row = (COMBINED_SURF_SELECT, combined_surf_row) if scored else (SURF_SELECT, surf_row)
+    cursor.execute(select + 'WHERE location_id = %s', (location_id,))
+    return [format_row(row) for row in cursor.fetchall()]
+
+
+def fetch_tide_data(cursor, location_id, height_key='tide_height_mt'):
+    cursor.execute(TIDE_SELECT + 'WHERE location_id = %s', (location_id,))
+    return [tide_row(row, height_key) for row in cursor.fetchall()]
+
+
+def fetch_graph_points(cursor, location_id):
+    cursor.execute(GRAPH_POINTS_SELECT + 'WHERE location_id = %s ORDER BY id', (location_id,))
+    return [graph_point_row(row) for row in cursor.fetchall()]
+
+
+def location_summary(location):
+    """Location fields at the top of a combined-data document (location has overrides applied)."""
+    return {
+        'location_id': location['id'],
+        'location_name': location['location_name'],
+        'latitude': location['latitude'],
+        'longitude': location['longitude'],
+        'preferred_wind_dir_min': location['preferred_wind_dir_min'],
+        'preferred_wind_dir_max': location['preferred_wind_dir_max'],
+        'preferred_swell_dir_min': location['preferred_swell_dir_min'],
+        'preferred_swell_dir_max': location['preferred_swell_dir_max'],
+    }
+
+
+def build_combined_data(cursor, location, include_surf=True, include_tide=True, surf_projection=None):
+    combined_data = location_summary(location)
+    if include_surf:
+        combined_data['surf_data'] = fetch_surf_data(cursor, location['id'], surf_projection, scored=True)
+    if include_tide:
+        combined_data['tide_data'] = fetch_tide_data(cursor, location['id'], height_key='tide_height')
+    return combined_data
+
+
+def group_by_location(rows, location_ids, format_row):
+    """Rows ordered by location -> {location_id: [format_row(row)]}, with an empty list for ids without rows."""
+    grouped = {location_id: [] for location_id in location_ids}
+    for row in rows:
+        grouped[row[1]].append(format_row(row))
+    return grouped
+
+
+def fetch_surf_data_many(cursor, location_ids, scored=False):
+    """Surf rows (plus scores when scored) for several locations in one query -> {location_id: [row dicts]}."""
+    select, format_row = (COMBINED_SURF_SELECT, combined_surf_row) if scored else (SURF_SELECT, surf_row)
+    cursor.execute(select + 'WHERE location_id = ANY(%s) ORDER BY location_id, id', (list(location_ids),))
+    return group_by_location(cursor.fetchall(), location_ids, format_row)
+
+
+def fetch_tide_data_many(cursor, location_ids, height_key='tide_height_mt'):
+    cursor.execute(TIDE_SELECT + 'WHERE location_id = ANY(%s) ORDER BY location_id, id', (list(location_ids),))
+    return group_by_location(cursor.fetchall(), location_ids, lambda row: tide_row(row, height_key))
+
+
+def build_combined_data_many(cursor, locations, include_surf=True, include_tide=True):
+    """Combined documents for several locations using one query per dataset -> {location_id: document}."""
+    location_ids = [location['id'] for location in locations]
+    surf = fetch_surf_data_many(cursor, location_ids, scored=True) if include_surf else None
+    tide = fetch_tide_data_many(cursor, location_ids, height_key='tide_height') if include_tide else None
+
+    documents = {}
+    for location in locations:
+        combined_data = location_summary(location)
+        if include_surf:
+            combined_data['surf_data'] = surf[location['id']]
+        if include_tide:
+            combined_data['tide_data'] = tide[location['id']]
+        documents[location['id']] = combined_data
+    return documents
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta
+import pytz
+
+# The marine API reports times in the spot's local time; regions map to the zone to compare against
+REGION_TIMEZONES = {
+    'WestCoast': 'America/Los_Angeles',
+    'Oahu': 'Pacific/Honolulu',
+    'Maui': 'Pacific/Honolulu',
+    'Kauai': 'Pacific/Honolulu',
+    'Hawaii': 'Pacific/Honolulu',
+    'Lanai': 'Pacific/Honolulu',
+}
+DEFAULT_TIMEZONE = 'America/Los_Angeles'
+
+# surf_data keeps date as 'YYYY-MM-DD' and time as the API's 'HMM'/'HHMM' (e.g. '300', '1500')
+SURF_TIMESTAMP_SQL = "to_timestamp({alias}date || lpad(replace({alias}time, ':', ''), 4, '0'), 'YYYY-MM-DDHH24MI')::timestamp"
+
+# tide_data / boundary_tide_data keep a DATE plus a text time ('04:30:00')
+TIDE_TIMESTAMP_SQL = "({alias}tide_date + {alias}tide_time::time)"
+
+# graph_points keep a DATE plus a TIME
+GRAPH_TIMESTAMP_SQL = "({alias}graph_date + {alias}graph_time)"
+
+# Longest window a forecast request may ask for with ?hours=
+MAX_WINDOW_HOURS = 24 * 16
+
+# ?all=1 opts out of a route's "from now" default and returns every stored row
+ALL_ROWS_VALUES = ('1', 'true', 'yes')
+
+
+def surf_timestamp_sql(alias=''):
+    return SURF_TIMESTAMP_SQL.format(alias=f'{alias}.' if alias else '')
+
+
+def tide_timestamp_sql(alias=''):
+    return TIDE_TIMESTAMP_SQL.format(alias=f'{alias}.' if alias else '')
+
+
+def graph_timestamp_sql(alias=''):
+    return GRAPH_TIMESTAMP_SQL.format(alias=f'{alias}.' if alias else '')
+
+
+def region_timezone(region):
+    return pytz.timezone(REGION_TIMEZONES.get(region, DEFAULT_TIMEZONE))
+
+
+def local_now(region):
+    """Current wall-clock time in the region, naive, comparable with stored forecast times."""
+    return datetime.now(region_timezone(region)).replace(tzinfo=None)
+
+
+class ForecastWindow:
+    """
+    A [start, end) slice of forecast time as naive local datetimes; end None means open-ended.
+    from_now windows were anchored at the current hour, so their responses go stale when the
+    hour turns: valid_seconds says how long they hold. requested is False for a route's
+    default window, which the client never asked for.
+    """
+
+    def __init__(self, start, end=None, from_now=False, valid_seconds=None, requested=True):
+        self.start = start
+        self.end = end
+        self.from_now = from_now
+        self.valid_seconds = valid_seconds
+        self.requested = requested
+
+    def key(self):
+        """Text identifying the resolved window, for ETags."""
+        return f"{self.start.isoformat()}/{self.end.isoformat() if self.end else ''}"
+
+    def sql(self, timestamp_sql, date_column, date_as_text=False):
+        """
+        WHERE fragment and params: a date range on date_column (which the (location_id, date)
+        indexes serve), plus exact timestamp bounds unless the window is whole days.
+        date_as_text compares 'YYYY-MM-DD' strings, for surf_data's VARCHAR date.
+        """
+        def day(value):
+            return value.isoformat() if date_as_text else value
+
+        parts = [f'{date_column} >= %s']
+        params = [day(self.start.date())]
+        if self.start.time() != datetime.min.time():
+            parts.append(f'{timestamp_sql} >= %s')
+            params.append(self.start)
+        if self.end is not None:
+            parts.append(f'{date_column} <= %s')
+            params.append(day((self.end - timedelta(microseconds=1)).date()))
+            if self.end.time() != datetime.min.time():
+                parts.append(f'{timestamp_sql} < %s')
+                params.append(self.end)
+        return ' AND '.join(parts), params
+
+
+def apply_window(sql, params, forecast_window, timestamp_sql, date_column, date_as_text=False):
+    """Appends the window's predicates (if there is a window) to a query ending in a WHERE clause."""
+    params = list(params)
+    if forecast_window is not None:
+        predicate, window_params = forecast_window.sql(timestamp_sql, date_column, date_as_text)
+        sql += ' AND ' + predicate
+        params += window_params
+    return sql, params
+
+
+def _parse_bound(value, name, is_end=False):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date (YYYY-MM-DD) or date and time (YYYY-MM-DDTHH:MM)")
+    if parsed.tzinfo is not None:
+        raise ValueError(f"{name} is in the spot's local time and takes no UTC offset")
+    # A bare end date includes that whole day
+    if is_end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def _current_hour(region):
+    """The current local hour, and seconds until the next one begins (plus one)."""
+    now = local_now(region)
+    anchor = now.replace(minute=0, second=0, microsecond=0)
+    return anchor, int((anchor + timedelta(hours=1) - now).total_seconds()) + 1
+
+
+def from_now_window(region, lookback_hours=0):
+    """Open-ended window from the current local hour (minus lookback_hours), as parse_window builds without start."""
+    anchor, valid_seconds = _current_hour(region)
+    return ForecastWindow(anchor - timedelta(hours=lookback_hours), None, True, valid_seconds, requested=False)
+
+
+def empty_is_not_found(forecast_window):
+    """
+    Whether no rows should be a 404: yes for every row (None) or a route's default window, where
+    the location simply has no data; no for a window the client asked for, which may be empty.
+    """
+    return forecast_window is None or not forecast_window.requested
+
+
+def parse_window(args, region, lookback_hours=0, default=None, allow_all=False):
+    """
+    ForecastWindow from ?start=&end=&hours= (spot local time), or `default` when none is given.
+    Without start the window begins at the current local hour, minus lookback_hours so the
+    forecast slot in progress is kept; hours counts from the start. With allow_all, ?all=1
+    returns None (no window). Raises ValueError with a message for the client.
+    """
+    window_given = any(name in args for name in ('start', 'end', 'hours'))
+    if allow_all and args.get('all', '').lower() in ALL_ROWS_VALUES:
+        if window_given:
+            raise ValueError("Use either all or start/end/hours, not both")
+        return None
+    if not window_given:
+        return default
+    if 'end' in args and 'hours' in args:
+        raise ValueError("Use either end or hours, not both")
+
+    from_now = 'start' not in args
+    valid_seconds = None
+    if from_now:
+        anchor, valid_seconds = _current_hour(region)
+        start = anchor - timedelta(hours=lookback_hours)
+    else:
+        start = anchor = _parse_bound(args.get('start'), 'start')
+
+    end = None
+    if 'hours' in args:
+        try:
+            hours = int(args.get('hours'))
+        except ValueError:
+            raise ValueError("hours must be an integer")
+        if not 1 <= hours <= MAX_WINDOW_HOURS:
+            raise ValueError(f"hours must be between 1 and {MAX_WINDOW_HOURS}")
+        end = anchor + timedelta(hours=hours)
+    elif 'end' in args:
+        end = _parse_bound(args.get('end'), 'end', is_end=True)
+        if end <= start:
+            raise ValueError("end must be after start")
+    return ForecastWindow(start, end, from_now, valid_seconds)
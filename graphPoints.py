@@ -3,6 +3,9 @@ import psycopg2
 from datetime import datetime, timedelta, date
 from urllib.parse import urlparse
 from dotenv import load_dotenv
+from ingest_versions import bump_ingest_versions, GRAPH
+from payload_store import render_all_payloads
+from surf_scores import score_all_surf
 
 if os.getenv('ENV') != 'production':
     load_dotenv('config.env')
@@ -178,6 +181,44 @@ def delete_all_graph_points():
         conn.close()
         
 
+def record_graph_versions():
+    """Bump the graph ingest version of every location that now has graph points."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    cursor = conn.cursor()
+    try:
+        bump_ingest_versions(cursor, GRAPH, 'graph_points')
+        conn.commit()
+    except psycopg2.Error as e:
+        print(f"Error recording graph versions: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def score_surf():
+    """Score every surf row from the spots' preferences; combined payloads include the scores."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        score_all_surf(conn)
+    finally:
+        conn.close()
+
+
+def render_payloads():
+    """Pre-render the API response bodies now that surf, tide and graph data are in place."""
+    conn = get_db_connection()
+    if conn is None:
+        return
+    try:
+        render_all_payloads(conn)
+    finally:
+        conn.close()
+
+
 def main():
     """Main function to fetch data and process entries."""
     # Delete all previous data from graph_points
@@ -193,7 +234,10 @@ def main():
     start_date = fetch_latest_tide_date() or datetime.now().date()
     print(f"Processing from start date: {start_date}")
     process_tide_entries(tide_data, start_date)
+    record_graph_versions()
     print("Data processing completed.")
+    score_surf()
+    render_payloads()
 
     
 
@@ -0,0 +1,109 @@
+import struct
+from datetime import datetime, timedelta
+from forecast_data import metres_to_feet
+from columnar import SERIES_FORMATS
+
+try:
+    import msgpack
+except ImportError:  # optional; the packed format needs only the standard library
+    msgpack = None
+
+# Binary /graph-points bodies for chart clients, built straight from the rows of GRAPH_BINARY_SELECT
+# (no per-point dicts or JSON). Heights are feet, rounded to 2 places as in the JSON body.
+#
+# packed (little-endian):
+#   header  4s magic b'SGP1', uint16 year, uint8 month, uint8 day (earliest point's date), uint32 count
+#   points  count x (uint16 minutes after that date's midnight, float32 height_ft, uint8 tide type)
+# Tide type codes are TIDE_TYPE_CODES (0 for interpolated points).
+#
+# msgpack: {"start": "YYYY-MM-DD", "minutes": [...], "tide_height": [...], "tide_type": [...]},
+# the same columns as plain arrays, tide_type as strings or nil. Offered when msgpack is installed.
+
+PACKED_MEDIA_TYPE = 'application/vnd.surfbackend.graph-points'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+
+GRAPH_FORMATS = dict(SERIES_FORMATS, packed=PACKED_MEDIA_TYPE)
+if msgpack is not None:
+    GRAPH_FORMATS['msgpack'] = MSGPACK_MEDIA_TYPE
+
+GRAPH_BINARY_SELECT = '''
+    SELECT graph_date, graph_time, tide_height, tide_type
+    FROM graph_points
+'''
+
+PACKED_MAGIC = b'SGP1'
+PACKED_HEADER = struct.Struct('<4sHBBI')
+PACKED_POINT = struct.Struct('<HfB')
+
+TIDE_TYPE_CODES = {None: 0, 'LOW': 1, 'HIGH': 2}
+TIDE_TYPE_NAMES = {code: name for name, code in TIDE_TYPE_CODES.items()}
+
+# uint16 minutes reach 45 days past the earliest point
+MAX_MINUTE_OFFSET = 0xFFFF
+
+
+def _minute_offsets(rows):
+    """(start date, minutes after start for each row); rows are (graph_date, graph_time, ...)."""
+    if not rows:
+        return None, []
+    start = min(row[0] for row in rows)
+    offsets = []
+    for graph_date, graph_time, *_ in rows:
+        minutes = (graph_date - start).days * 1440 + graph_time.hour * 60 + graph_time.minute
+        if not 0 <= minutes <= MAX_MINUTE_OFFSET:
+            raise ValueError("Graph points span more than the packed format's 45 days")
+        offsets.append(minutes)
+    return start, offsets
+
+
+def encode_packed(rows):
+    """Packed body for rows of GRAPH_BINARY_SELECT in time order."""
+    start, offsets = _minute_offsets(rows)
+    body = bytearray(PACKED_HEADER.size + PACKED_POINT.size * len(rows))
+    if start is None:
+        PACKED_HEADER.pack_into(body, 0, PACKED_MAGIC, 0, 0, 0, 0)
+        return bytes(body)
+    PACKED_HEADER.pack_into(body, 0, PACKED_MAGIC, start.year, start.month, start.day, len(rows))
+    position = PACKED_HEADER.size
+    for minutes, row in zip(offsets, rows):
+        PACKED_POINT.pack_into(body, position, minutes, metres_to_feet(row[2]), TIDE_TYPE_CODES.get(row[3], 0))
+        position += PACKED_POINT.size
+    return bytes(body)
+
+
+def decode_packed(body):
+    """Packed body -> [(datetime, height_ft, tide_type)], heights rounded back to 2 places."""
+    magic, year, month, day, count = PACKED_HEADER.unpack_from(body)
+    if magic != PACKED_MAGIC:
+        raise ValueError("Not a packed graph-points body")
+    if len(body) != PACKED_HEADER.size + PACKED_POINT.size * count:
+        raise ValueError("Packed graph-points body has the wrong length")
+    if count == 0:
+        return []
+    start = datetime(year, month, day)
+    return [(start + timedelta(minutes=minutes), round(height, 2), TIDE_TYPE_NAMES.get(code))
+            for minutes, height, code in PACKED_POINT.iter_unpack(memoryview(body)[PACKED_HEADER.size:])]
+
+
+def encode_msgpack(rows):
+    """msgpack body for rows of GRAPH_BINARY_SELECT in time order."""
+    start, offsets = _minute_offsets(rows)
+    return msgpack.packb({
+        'start': start.isoformat() if start else None,
+        'minutes': offsets,
+        'tide_height': [metres_to_feet(row[2]) for row in rows],
+        'tide_type': [row[3] for row in rows],
+    })
+
+
+def decode_msgpack(body):
+    """msgpack body -> [(datetime, height_ft, tide_type)], like decode_packed."""
+    document = msgpack.unpackb(body)
+    if document['start'] is None:
+        return []
+    start = datetime.fromisoformat(document['start'])
+    return [(start + timedelta(minutes=minutes), height, tide_type)
+            for minutes, height, tide_type in zip(document['minutes'], document['tide_height'], document['tide_type'])]
+
+
+ENCODERS = {'packed': encode_packed, 'msgpack': encode_msgpack}
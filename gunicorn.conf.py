@@ -0,0 +1,7 @@
+# Picked up automatically by `gunicorn app:app` (see Procfile)
+import db_pool
+
+
+def post_fork(server, worker):
+    # Each worker gets its own Postgres pool; sockets must never be shared across a fork
+    db_pool.init_pool()
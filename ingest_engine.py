@@ -0,0 +1,105 @@
+import os
+import queue
+import threading
+import time
+
+# Concurrent fetch -> write pipeline for the marine API ingest. INGEST_PARALLELISM fetcher
+# threads pull locations and hand each response to INGEST_WRITERS writer threads through a
+# queue of at most INGEST_QUEUE_SIZE results: when writes fall behind, the queue fills and the
+# fetchers block instead of piling responses up in memory. The API's rate limit is kept by
+# marine_client (MARINE_RATE_PER_SEC), which only spends it on real HTTP requests, so cached
+# answers and payloads shared between locations don't wait for it.
+INGEST_PARALLELISM = int(os.getenv('INGEST_PARALLELISM', '8'))
+INGEST_WRITERS = int(os.getenv('INGEST_WRITERS', '2'))
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '16'))
+
+_DONE = object()
+
+
+class IngestStats:
+    """Counts for one run; locations_per_sec covers the whole run, fetch and write."""
+
+    def __init__(self):
+        self.fetched = 0
+        self.written = 0
+        self.fetch_errors = 0
+        self.write_errors = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def locations_per_sec(self):
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.written} locations written in {self.elapsed:.1f}s "
+                f"({self.locations_per_sec:.1f}/s), {self.fetch_errors} fetch errors, "
+                f"{self.write_errors} write errors")
+
+
+def run_ingest(locations, fetch, write, parallelism=INGEST_PARALLELISM, writers=INGEST_WRITERS,
+               queue_size=INGEST_QUEUE_SIZE):
+    """
+    Runs fetch(location) for every (location_id, lat, lng) location on `parallelism` threads,
+    and write(location_id, result) for each result that isn't None on `writers` threads.
+    Errors are printed and counted, including writes that return False (writers that print
+    their own errors); returns IngestStats.
+    """
+    stats = IngestStats()
+    pending = iter(locations)
+    pending_lock = threading.Lock()
+    results = queue.Queue(maxsize=queue_size)
+
+    def next_location():
+        with pending_lock:
+            return next(pending, None)
+
+    def fetcher():
+        while True:
+            location = next_location()
+            if location is None:
+                return
+            try:
+                result = fetch(location)
+            except Exception as e:
+                print(f"Error fetching location {location[0]}: {e}")
+                stats.add('fetch_errors')
+                continue
+            if result is None:
+                stats.add('fetch_errors')
+                continue
+            stats.add('fetched')
+            results.put((location[0], result))  # blocks while the writers are behind
+
+    def writer():
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            location_id, result = item
+            try:
+                if write(location_id, result) is False:
+                    stats.add('write_errors')
+                else:
+                    stats.add('written')
+            except Exception as e:
+                print(f"Error writing location {location_id}: {e}")
+                stats.add('write_errors')
+
+    start = time.perf_counter()
+    fetchers = [threading.Thread(target=fetcher, name=f'ingest-fetch-{n}') for n in range(max(1, parallelism))]
+    writer_threads = [threading.Thread(target=writer, name=f'ingest-write-{n}') for n in range(max(1, writers))]
+    for thread in fetchers + writer_threads:
+        thread.start()
+    for thread in fetchers:
+        thread.join()
+    for _ in writer_threads:
+        results.put(_DONE)
+    for thread in writer_threads:
+        thread.join()
+    stats.elapsed = time.perf_counter() - start
+    return stats
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import psycopg2
+import db_pool
+
+# How often (seconds) a worker re-reads the ingest_versions table
+INGEST_VERSION_CHECK_SECONDS = float(os.getenv('INGEST_VERSION_CHECK_SECONDS', '15'))
+
+# Comma-separated UTC times the ingest pipeline is scheduled at, e.g. "01:00,13:00"
+INGEST_SCHEDULE_UTC = os.getenv('INGEST_SCHEDULE_UTC', '')
+# Roughly how long a run takes to land; clients may serve stale data for this long while revalidating
+INGEST_DURATION_SECONDS = int(os.getenv('INGEST_DURATION_SECONDS', '900'))
+# max-age used when no schedule is configured
+INGEST_DEFAULT_MAX_AGE = int(os.getenv('INGEST_DEFAULT_MAX_AGE', '300'))
+
+# Datasets written by the ingest scripts
+SURF = 'surf'    # surfBackend.insert_surf_data
+TIDE = 'tide'    # surfBackend / TideData insert_tide_data
+GRAPH = 'graph'  # graphPoints.main
+SCORE = 'score'  # surf_scores.score_all_surf
+
+BUMP_INGEST_VERSION_SQL = '''
+    INSERT INTO ingest_versions (location_id, dataset, version, updated_at)
+    VALUES (%s, %s, 1, NOW())
+    ON CONFLICT (location_id, dataset)
+    DO UPDATE SET version = ingest_versions.version + 1, updated_at = NOW()
+'''
+
+
+def bump_ingest_version(cursor, location_id, dataset):
+    """Records a new version of one location's dataset; call in the transaction that wrote it."""
+    cursor.execute(BUMP_INGEST_VERSION_SQL, (location_id, dataset))
+
+
+def bump_ingest_versions(cursor, dataset, table):
+    """Bumps `dataset` for every location that has rows in `table` (one statement per run)."""
+    cursor.execute(f'''
+        INSERT INTO ingest_versions (location_id, dataset, version, updated_at)
+        SELECT DISTINCT location_id, %s, 1, NOW() FROM {table}
+        ON CONFLICT (location_id, dataset)
+        DO UPDATE SET version = ingest_versions.version + 1, updated_at = NOW()
+    ''', (dataset,))
+
+
+def source_key(entries):
+    """Stable text for (dataset, version, updated_at) entries; identical in workers and ingest scripts."""
+    return ','.join(f'{dataset}:{version}:{updated_at.isoformat() if updated_at else ""}'
+                    for dataset, version, updated_at in entries)
+
+
+def _parse_schedule(schedule):
+    times = []
+    for part in schedule.split(','):
+        part = part.strip()
+        if part:
+            hour, minute = part.split(':')
+            times.append((int(hour), int(minute)))
+    return sorted(times)
+
+
+def next_ingest_time(now=None, schedule=INGEST_SCHEDULE_UTC):
+    """Next scheduled run after `now` (UTC), or None when no schedule is configured."""
+    times = _parse_schedule(schedule)
+    if not times:
+        return None
+    now = now or datetime.now(timezone.utc)
+    for days in (0, 1):
+        day = (now + timedelta(days=days)).date()
+        for hour, minute in times:
+            candidate = datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc)
+            if candidate > now:
+                return candidate
+    return None
+
+
+def cache_control(now=None, max_age_limit=None):
+    """
+    Cache-Control value that keeps responses fresh until the next ingest run starts, or for
+    at most max_age_limit seconds (e.g. until a "from now" window moves).
+    """
+    now = now or datetime.now(timezone.utc)
+    next_run = next_ingest_time(now)
+    max_age = int((next_run - now).total_seconds()) if next_run else INGEST_DEFAULT_MAX_AGE
+    if max_age_limit is not None:
+        max_age = min(max_age, max_age_limit)
+    return f'public, max-age={max(max_age, 0)}, stale-while-revalidate={INGEST_DURATION_SECONDS}'
+
+
+class IngestVersions:
+    """
+    Per-worker copy of the ingest_versions table, refreshed at most every check_interval
+    seconds, so conditional requests can be answered without touching the database.
+    """
+
+    def __init__(self, check_interval=INGEST_VERSION_CHECK_SECONDS):
+        self.check_interval = check_interval
+        self._versions = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        if self._versions is None:
+            self._lock.acquire()
+        elif not self._lock.acquire(blocking=False):
+            return self._versions
+        try:
+            if self._versions is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._versions
+            try:
+                conn = db_pool.getconn()
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute('SELECT location_id, dataset, version, updated_at FROM ingest_versions')
+                        self._versions = {
+                            (location_id, dataset): (version, updated_at)
+                            for location_id, dataset, version, updated_at in cursor.fetchall()
+                        }
+                finally:
+                    db_pool.putconn(conn)
+            except psycopg2.Error as e:
+                # No versions yet (or a hiccup): serve without ETags rather than failing requests
+                print(f"Ingest version refresh error: {e}")
+                if self._versions is None:
+                    self._versions = {}
+            self._checked_at = time.monotonic()
+            return self._versions
+        finally:
+            self._lock.release()
+
+    def get(self, location_id, dataset):
+        versions = self._versions
+        if versions is None or time.monotonic() - self._checked_at >= self.check_interval:
+            versions = self.refresh()
+        return versions.get((location_id, dataset))
+
+    def source(self, location_id, datasets):
+        """source_key() of the location's current versions, or None if a dataset was never ingested."""
+        entries = []
+        for dataset in datasets:
+            version = self.get(location_id, dataset)
+            if version is None:
+                return None
+            entries.append((dataset, version[0], version[1]))
+        return source_key(entries)
+
+    def etag(self, location_id, datasets, variant='', extra=()):
+        """
+        Weak ETag for a location's datasets plus the request variant (path and query string).
+        Returns None when any dataset has never been ingested.
+        """
+        source = self.source(location_id, datasets)
+        if source is None:
+            return None
+        parts = [variant, source] + [str(value) for value in extra]
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
@@ -0,0 +1,103 @@
+import json
+import re
+import decimal
+import os
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib encoder is always available
+    orjson = None
+
+# 'auto' uses orjson when it is installed; 'stdlib' forces the standard library encoder
+JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')
+
+# Rows encoded per chunk when streaming a JSON array
+STREAM_CHUNK_ROWS = 50
+
+# ensure_ascii escapes DEL too, not only characters past ASCII
+_NON_ASCII = re.compile(r'[^\x00-\x7e]')
+
+
+def json_default(value):
+    """Same conversions as Flask's default JSON provider, so pre-rendered bodies match jsonify."""
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_encode(obj):
+    return json.dumps(obj, default=json_default, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+if orjson is not None and JSON_ENCODER != 'stdlib':
+    # Dates go through json_default (HTTP dates, like Flask) instead of orjson's ISO format.
+    # Non-ASCII text is written as UTF-8 rather than \u escapes; the JSON is equivalent.
+    _ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def encode(obj):
+        return orjson.dumps(obj, default=json_default, option=_ORJSON_OPTIONS)
+
+    JSON_BACKEND = 'orjson'
+else:
+    encode = _stdlib_encode
+    JSON_BACKEND = 'stdlib'
+
+
+def dumps_json(obj):
+    """Serializes like jsonify in production (sorted keys, compact, trailing newline) to bytes."""
+    return encode(obj) + b'\n'
+
+
+def _escape_non_ascii(match):
+    code = ord(match.group())
+    if code < 0x10000:
+        return f'\\u{code:04x}'
+    code -= 0x10000
+    return f'\\u{0xd800 | (code >> 10):04x}\\u{0xdc00 | (code & 0x3ff):04x}'
+
+
+def ascii_json(body):
+    """Escapes non-ASCII characters (and DEL) in UTF-8 JSON bytes as \\uXXXX, as the stdlib encoder writes them."""
+    if body.isascii() and b'\x7f' not in body:
+        return body
+    return _NON_ASCII.sub(_escape_non_ascii, body.decode('utf-8')).encode('ascii')
+
+
+def iter_json_array(rows, format_row, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Yields a JSON array of format_row(row) for each row, encoding chunk_rows dicts at a time so
+    the full list of dicts never exists at once. Output matches dumps_json(list).
+    """
+    yield b'['
+    separator = b''
+    chunk = []
+    for row in rows:
+        chunk.append(format_row(row))
+        if len(chunk) >= chunk_rows:
+            # Encode the chunk as one list and drop its brackets: one encoder call per chunk
+            yield separator + encode(chunk)[1:-1]
+            separator = b','
+            chunk = []
+    if chunk:
+        yield separator + encode(chunk)[1:-1]
+    yield b']\n'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that routes jsonify through the selected encoder."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent') or not self.sort_keys:
+            return super().dumps(obj, **kwargs)
+        return encode(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_json(obj), mimetype=self.mimetype)
@@ -1,6 +1,7 @@
 import csv
 import psycopg2
 import os
+from location_registry import bump_location_version
 
 def safe_int(value):
     # Return None if the value is empty or not a valid integer
@@ -71,6 +72,9 @@ def load_locations():
                     row['region'], 
                 ))
 
+        # Tell the API workers to reload their location registry
+        bump_location_version(cur)
+
         # Commit changes and close the connection
         conn.commit()
         cur.close()
@@ -0,0 +1,128 @@
+import hashlib
+import json
+
+# OVERRIDE LOCATIONS!!!!!!
+LOCATION_COORDINATE_OVERRIDES = {
+    
+    # !!!!NORCAL!!!!
+    
+    106: {'latitude': 34.329648, 'longitude': -119.405961},  # Faria
+    108: {'latitude': 34.317135, 'longitude': -119.374548},  # Mondos
+    110: {'latitude': 34.306946, 'longitude': -119.359833},  # Solimar
+    120: {'latitude': 34.150716, 'longitude': -119.222780},  # Silver Strand
+    
+ 
+    
+    #  !!!!SOCAL!!!!!!
+    
+    
+    218: {'latitude': 32.926921, 'longitude': -117.261348},  # Torrey Pines
+    220: {'latitude': 32.883053, 'longitude': -117.256193},  # Blacks
+    222: {'latitude': 32.865790, 'longitude': -117.256182},  # Scripps  
+    223: {'latitude': 32.862438, 'longitude': -117.257255},  # La Jolla  
+    224: {'latitude': 32.837644, 'longitude': -117.283237},  # Horseshoe  
+    232: {'latitude': 32.752517, 'longitude': -117.255807},  # Ocean Beach  
+    233: {'latitude': 32.736865, 'longitude': -117.256585},  # Sunset Cliffs 
+    # 198: {'latitude': 33.085983, 'longitude': -117.313915},  # Ponto  
+    # 200: {'latitude': 33.076462, 'longitude': -117.310942},  # Grandview  
+    # 202: {'latitude': 33.065375, 'longitude': -117.307658},  # Beacons  
+    # 204: {'latitude': 33.047037, 'longitude': -117.298923},  # Moonlight  
+    # 205: {'latitude': 33.045603, 'longitude': -117.298806},  # D-Street  
+    # 206: {'latitude': 33.033844, 'longitude': -117.295402},  # Swami's  
+    # 208: {'latitude': 33.024358, 'longitude': -117.289884},  # Pipes  
+    210: {'latitude': 33.013240, 'longitude': -117.283262},  # Cardiff Reef  
+    212: {'latitude': 33.001681, 'longitude': -117.282118},  # Seaside Reef  
+    214: {'latitude': 32.974702, 'longitude': -117.271754},  # River Mouth  
+
+  
+    
+    
+    # !!!!MEXICO!!!!!!
+    
+    
+    268: {'latitude': 32.056660, 'longitude': -116.884037},  # La Salina  
+    269: {'latitude': 32.035890, 'longitude': -116.886783},  # El Paso  
+    271: {'latitude': 31.975145, 'longitude': -116.790638},  # Salsipuedes  
+    272: {'latitude': 31.899349, 'longitude': -116.731289},  # San Miguel  
+    273: {'latitude': 31.877028, 'longitude': -116.688175},  # 3Ms  
+    274: {'latitude': 31.869540, 'longitude': -116.679793},  # Stacks 
+    # 277: {'latitude': 31.462509, 'longitude': -116.589201},  # Light House  
+    # 278: {'latitude': 31.328248, 'longitude': -116.455489},  # Punta Cabras  
+    # 280: {'latitude': 30.855740, 'longitude': -116.171328},  # 4 Casas  
+    # 308: {'latitude': 22.895806, 'longitude': -109.868477},  # Monuments  
+
+ 
+
+
+        
+    # !!!!MAUI!!!!!!
+    
+    432: {'latitude': 20.864631, 'longitude': -156.165437},  # Honomanu
+   
+    436: {'latitude': 20.590686, 'longitude': -156.414735},  # Perouse Bay  
+    437: {'latitude': 20.612308, 'longitude': -156.437565},  # Dumps  
+    439: {'latitude': 20.634524, 'longitude': -156.452177},  # Little Beach  
+    441: {'latitude': 20.727902, 'longitude': -156.451735},  # The Cove  
+
+    454: {'latitude': 21.017501, 'longitude': -156.641494},  # Honolua Bay
+    456: {'latitude': 21.026671, 'longitude': -156.630644},  # WindMills
+    457: {'latitude': 21.023738, 'longitude': -156.610418},  # Honokohau
+    463: {'latitude': 20.937247, 'longitude': -156.354435},  # Pavillions
+    
+    
+
+    
+    # !!!!OAHU!!!!!!
+    
+        # !!!!SOUTH SHORE!!!!!!
+
+    
+    504: {'latitude': 21.284179, 'longitude': -157.67278},   # Sandy Beach
+    506: {'latitude': 21.255018, 'longitude': -157.794234},  # Black Point
+    508: {'latitude': 21.252854, 'longitude': -157.805273},  # Diamond
+    512: {'latitude': 21.26771, 'longitude': -157.824682},   # Publics
+    516: {'latitude': 21.272952, 'longitude': -157.831626},  # Waikiki
+    518: {'latitude': 21.272100, 'longitude': -157.832826},  # Populars
+    520: {'latitude': 21.275351, 'longitude': -157.833866},  # Threes
+    522: {'latitude': 21.276619, 'longitude': -157.83917},   # Fours
+    524: {'latitude': 21.276452, 'longitude': -157.841549},  # Kaisers
+    526: {'latitude': 21.281239, 'longitude': -157.845857},  # Bowls
+    528: {'latitude': 21.28576, 'longitude': -157.851543},   # Ala Moana
+    530: {'latitude': 21.299028, 'longitude': -157.875976},  # Sand Island
+    532: {'latitude': 21.301940, 'longitude': -158.002802},  # Ewa
+    534: {'latitude': 21.294790, 'longitude': -158.106832},  # Barbers
+    
+        # !!!!NORTH SHORE!!!!!!
+        
+    542: {'latitude': 21.595378, 'longitude': -158.108636},  # Hale'iwa
+    544: {'latitude': 21.61922, 'longitude': -158.087975},   # Laniakea
+    546: {'latitude': 21.622838, 'longitude': -158.084584},  # Jockos
+    548: {'latitude': 21.624339, 'longitude': -158.082737},  # Chuns
+    552: {'latitude': 21.659598, 'longitude': -158.059782},  # Log Cabins
+    554: {'latitude': 21.661639, 'longitude': -158.056826},  # Rockpile
+    556: {'latitude': 21.662891, 'longitude': -158.055381},  # Off The Wall
+    558: {'latitude': 21.663689, 'longitude': -158.054756},  # Backdoor
+    559: {'latitude': 21.664735, 'longitude': -158.053571},  # Pipeline
+    560: {'latitude': 21.667839, 'longitude': -158.050055},  # Chambers
+    562: {'latitude': 21.669923, 'longitude': -158.048039},  # Rocky Point
+    564: {'latitude': 21.679007, 'longitude': -158.04112},   # Sunset
+    566: {'latitude': 21.684658, 'longitude': -158.032643},  # Velzyland
+
+}
+
+def apply_coordinate_overrides(location_data):
+    """
+    Applies coordinate overrides to a location's data if the location ID exists in the overrides dictionary.
+    """
+    location_id = location_data['id']
+    if location_id in LOCATION_COORDINATE_OVERRIDES:
+        override = LOCATION_COORDINATE_OVERRIDES[location_id]
+        location_data['latitude'] = override['latitude']
+        location_data['longitude'] = override['longitude']
+    return location_data
+
+
+def overrides_digest():
+    """Short fingerprint of the override table, so cached payloads notice when it changes."""
+    encoded = json.dumps(LOCATION_COORDINATE_OVERRIDES, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()[:12]
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import psycopg2
+import db_pool
+from json_encoding import dumps_json
+
+# How often (seconds) a worker asks the database whether the location set changed
+LOCATION_REGISTRY_CHECK_SECONDS = float(os.getenv('LOCATION_REGISTRY_CHECK_SECONDS', '30'))
+
+LOCATION_COLUMNS = (
+    'id', 'location_name', 'latitude', 'longitude',
+    'preferred_wind_dir_min', 'preferred_wind_dir_max',
+    'preferred_swell_dir_min', 'preferred_swell_dir_max',
+    'bad_swell_dir_min', 'bad_swell_dir_max',
+    'wavecalc', 'region', 'reef',
+)
+
+LOCATIONS_SQL = f'SELECT {", ".join(LOCATION_COLUMNS)} FROM locations ORDER BY latitude DESC'
+
+# Fields returned by /locations (the list view)
+LOCATION_LIST_FIELDS = ('id', 'location_name', 'region', 'latitude', 'longitude')
+
+BUMP_LOCATION_VERSION_SQL = '''
+    INSERT INTO location_version (id, version, updated_at) VALUES (1, 1, NOW())
+    ON CONFLICT (id) DO UPDATE SET version = location_version.version + 1, updated_at = NOW()
+'''
+
+
+def bump_location_version(cursor):
+    """Marks the location set as changed; call in the same transaction that writes locations."""
+    cursor.execute(BUMP_LOCATION_VERSION_SQL)
+
+
+class _Snapshot:
+    def __init__(self, version, rows, by_id, list_body, detail_bodies):
+        self.version = version
+        self.rows = rows                    # location dicts, ordered by DB latitude DESC
+        self.by_id = by_id                  # id -> location dict (overrides applied)
+        self.list_body = list_body          # /locations response bytes
+        self.detail_bodies = detail_bodies  # id -> /locations/<id> response bytes
+
+
+class LocationRegistry:
+    """
+    In-memory copy of the locations table, loaded once per worker with coordinate overrides
+    already applied and the /locations responses pre-serialized. The location_version stamp
+    is checked at most every check_interval seconds and the set is reloaded when it changes.
+    """
+
+    def __init__(self, apply_overrides, check_interval=LOCATION_REGISTRY_CHECK_SECONDS):
+        self.apply_overrides = apply_overrides
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def on_reload(self, callback):
+        """Registers callback(rows) to run after every (re)load, e.g. to rebuild derived indexes."""
+        self._listeners.append(callback)
+        if self._snapshot is not None:
+            callback(self._snapshot.rows)
+
+    def _fetch_version(self, cursor):
+        try:
+            cursor.execute('SELECT version FROM location_version WHERE id = 1')
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except psycopg2.Error:
+            # Stamp table not created yet: reload on every check instead
+            cursor.connection.rollback()
+            return None
+
+    def _load(self, cursor, version):
+        cursor.execute(LOCATIONS_SQL)
+        return self._build(version, cursor.fetchall())
+
+    def _build(self, version, db_rows):
+        """Snapshot from locations rows in LOCATION_COLUMNS order (from any driver)."""
+        rows = []
+        for row in db_rows:
+            rows.append(self.apply_overrides(dict(zip(LOCATION_COLUMNS, row))))
+
+        by_id = {location['id']: location for location in rows}
+        list_body = dumps_json([{field: location[field] for field in LOCATION_LIST_FIELDS} for location in rows])
+        detail_bodies = {location['id']: dumps_json(location) for location in rows}
+        return _Snapshot(version, rows, by_id, list_body, detail_bodies)
+
+    def refresh(self, force=False):
+        """Reloads if the version stamp moved (or unconditionally with force=True)."""
+        if force or self._snapshot is None:
+            self._lock.acquire()
+        elif not self._lock.acquire(blocking=False):
+            # Another thread is already checking; keep serving the current snapshot
+            return self._snapshot
+
+        reloaded = False
+        try:
+            now = time.monotonic()
+            if not force and self._snapshot is not None and now - self._checked_at < self.check_interval:
+                return self._snapshot
+
+            current = self._snapshot
+            try:
+                conn = db_pool.getconn()
+                try:
+                    with conn.cursor() as cursor:
+                        version = self._fetch_version(cursor)
+                        if force or current is None or version is None or version != current.version:
+                            self._snapshot = self._load(cursor, version)
+                            reloaded = True
+                finally:
+                    db_pool.putconn(conn)
+            except psycopg2.Error as e:
+                if current is None:
+                    raise
+                # Database hiccup: keep serving the locations we already have
+                print(f"Location registry refresh error: {e}")
+            self._checked_at = now
+        finally:
+            self._lock.release()
+
+        if reloaded:
+            for callback in self._listeners:
+                callback(self._snapshot.rows)
+        return self._snapshot
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None or time.monotonic() - self._checked_at >= self.check_interval:
+            snapshot = self.refresh()
+        return snapshot
+
+    @property
+    def version(self):
+        return self.snapshot().version
+
+    def all(self):
+        return self.snapshot().rows
+
+    def get(self, location_id):
+        return self.snapshot().by_id.get(location_id)
+
+    def list_json(self):
+        return self.snapshot().list_body
+
+    def detail_json(self, location_id):
+        return self.snapshot().detail_bodies.get(location_id)
@@ -0,0 +1,121 @@
+import math
+
+# Spots closer than this many screen pixels at a zoom level are merged into one cluster
+CLUSTER_CELL_PX = 60
+TILE_SIZE_PX = 256
+# Deepest precomputed cluster level; above it every spot in the box is returned on its own
+MAX_CLUSTER_ZOOM = 16
+
+LOCATION_MAP_FIELDS = ('id', 'location_name', 'region', 'latitude', 'longitude')
+
+
+def mercator_xy(lat, lng):
+    """Web Mercator position normalized to [0, 1) on both axes (x east, y south)."""
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x % 1.0, min(max(y, 0.0), 1.0 - 1e-12)
+
+
+def cells_per_side(zoom):
+    return max(1, int(TILE_SIZE_PX * (2 ** zoom) / CLUSTER_CELL_PX))
+
+
+class _Level:
+    """Clusters for one zoom level, keyed by grid cell."""
+
+    def __init__(self, zoom, points):
+        self.zoom = zoom
+        self.side = cells_per_side(zoom)
+        members = {}
+        for x, y, location in points:
+            cell = (int(x * self.side), int(y * self.side))
+            members.setdefault(cell, []).append(location)
+
+        self.cells = {}
+        for cell, locations in members.items():
+            if len(locations) == 1:
+                self.cells[cell] = {'spot': {field: locations[0][field] for field in LOCATION_MAP_FIELDS}}
+            else:
+                self.cells[cell] = {'cluster': {
+                    'id': f'{zoom}/{cell[0]}/{cell[1]}',
+                    'count': len(locations),
+                    'latitude': round(sum(float(location['latitude']) for location in locations) / len(locations), 6),
+                    'longitude': round(sum(float(location['longitude']) for location in locations) / len(locations), 6),
+                    'location_ids': sorted(location['id'] for location in locations),
+                }}
+
+    def query(self, x_ranges, y0, y1):
+        cell_count = sum(x1 - x0 + 1 for x0, x1 in x_ranges) * (y1 - y0 + 1)
+        if cell_count > len(self.cells):
+            # Viewport covers more cells than there are clusters: scan the clusters instead
+            return [entry for (cx, cy), entry in self.cells.items()
+                    if y0 <= cy <= y1 and any(x0 <= cx <= x1 for x0, x1 in x_ranges)]
+        found = []
+        for x0, x1 in x_ranges:
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    entry = self.cells.get((cx, cy))
+                    if entry is not None:
+                        found.append(entry)
+        return found
+
+
+class ClusterPyramid:
+    """
+    Grid clusters of all locations for zoom levels 0..MAX_CLUSTER_ZOOM, precomputed in one go
+    and rebuilt only when the location registry reloads. Zooms past max_zoom get every spot
+    in the box individually, so spots sharing a max_zoom cell still separate.
+    """
+
+    def __init__(self, locations=(), max_zoom=MAX_CLUSTER_ZOOM):
+        self.max_zoom = max_zoom
+        self._levels = []
+        self._points = []
+        self.rebuild(locations)
+
+    def rebuild(self, locations):
+        points = []
+        for location in locations:
+            if location.get('latitude') is None or location.get('longitude') is None:
+                continue
+            x, y = mercator_xy(float(location['latitude']), float(location['longitude']))
+            points.append((x, y, location))
+        self._levels = [_Level(zoom, points) for zoom in range(self.max_zoom + 1)]
+        self._points = [(x, y, {field: location[field] for field in LOCATION_MAP_FIELDS})
+                        for x, y, location in points]
+
+    def query(self, west, south, east, north, zoom):
+        """Spots and clusters whose grid cell overlaps the bounding box at the given zoom."""
+        levels = self._levels
+        if not levels:
+            return {'clusters': [], 'spots': []}
+
+        left, top = mercator_xy(north, west)
+        right, bottom = mercator_xy(south, east)
+        if east - west >= 360:
+            left, right = 0.0, 1.0 - 1e-12
+        if zoom > self.max_zoom:
+            return {'clusters': [], 'spots': self._spots_in(left, top, right, bottom)}
+
+        level = levels[max(0, int(zoom))]
+        side = level.side
+        x0, x1 = int(left * side), int(right * side)
+        y0, y1 = int(top * side), int(bottom * side)
+        # A box crossing the antimeridian wraps around the right edge of the grid
+        x_ranges = [(x0, x1)] if x0 <= x1 else [(x0, side - 1), (0, x1)]
+
+        clusters, spots = [], []
+        for entry in level.query(x_ranges, y0, y1):
+            if 'spot' in entry:
+                spots.append(entry['spot'])
+            else:
+                clusters.append(entry['cluster'])
+        return {'clusters': clusters, 'spots': spots}
+
+    def _spots_in(self, left, top, right, bottom):
+        """Every spot inside the box (normalized Mercator bounds, left > right across the antimeridian)."""
+        if left <= right:
+            return [spot for x, y, spot in self._points if left <= x <= right and top <= y <= bottom]
+        return [spot for x, y, spot in self._points if (x >= left or x <= right) and top <= y <= bottom]
@@ -0,0 +1,248 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from response_cache import ResponseCache, MARINE_CACHE_DIR
+
+# The one HTTP client for the marine API (surfBackend, TideData, boundary_tide). Each thread
+# keeps a pooled keep-alive session, every request has connect/read timeouts, 429 and 5xx
+# answers (and connection errors) are retried with jittered exponential backoff, and after
+# MARINE_BREAKER_FAILURES failures in a row the circuit opens: calls fail fast with
+# CircuitOpenError for MARINE_BREAKER_RESET_SECONDS, then one trial call decides whether it
+# closes again. Every attempt's latency is recorded (client.latency.summary()). Successful
+# answers are kept in the on-disk response cache (response_cache.py) and a cached answer
+# skips the HTTP call. All threads share one MARINE_RATE_PER_SEC budget (0 = no limit),
+# spent only on real HTTP attempts, so the API's rate limit holds at any parallelism while
+# cached or shared payloads don't wait for it.
+MARINE_API_URL = os.getenv('MARINE_API_URL', "http://api.worldweatheronline.com/premium/v1/marine.ashx")
+MARINE_CONNECT_TIMEOUT = float(os.getenv('MARINE_CONNECT_TIMEOUT', '5'))
+MARINE_READ_TIMEOUT = float(os.getenv('MARINE_READ_TIMEOUT', '30'))
+MARINE_MAX_RETRIES = int(os.getenv('MARINE_MAX_RETRIES', '3'))
+MARINE_BACKOFF_SECONDS = float(os.getenv('MARINE_BACKOFF_SECONDS', '0.5'))
+MARINE_BACKOFF_MAX_SECONDS = float(os.getenv('MARINE_BACKOFF_MAX_SECONDS', '20'))
+MARINE_BREAKER_FAILURES = int(os.getenv('MARINE_BREAKER_FAILURES', '5'))
+MARINE_BREAKER_RESET_SECONDS = float(os.getenv('MARINE_BREAKER_RESET_SECONDS', '60'))
+MARINE_POOL_SIZE = int(os.getenv('MARINE_POOL_SIZE', '4'))
+# INGEST_RATE_PER_SEC is the setting's older name, from when the ingest engine kept the budget
+MARINE_RATE_PER_SEC = float(os.getenv('MARINE_RATE_PER_SEC', os.getenv('INGEST_RATE_PER_SEC', '10')))
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+class RateLimiter:
+    """Thread-safe token bucket: acquire() blocks until a request may start (rate 0 = no limit)."""
+
+    def __init__(self, rate_per_sec, burst=1):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open after `failures`, half-open (one trial) after reset_seconds."""
+
+    def __init__(self, failures=MARINE_BREAKER_FAILURES, reset_seconds=MARINE_BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._failed = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self._opened_at >= self.reset_seconds else 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            if self._trial or (self._opened_at is None and self._failed >= self.failures):
+                print(f"Marine API circuit open after {self._failed} failures in a row")
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class LatencyRecorder:
+    """Per-attempt latencies: counts by outcome, and percentiles over the last `window` attempts."""
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self._outcomes = {}
+        self._lock = threading.Lock()
+
+    def record(self, seconds, outcome):
+        with self._lock:
+            self._samples.append(seconds)
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            outcomes = dict(self._outcomes)
+
+        def percentile(fraction):
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000, 1) if samples else None
+
+        return {'calls': sum(outcomes.values()), 'outcomes': outcomes,
+                'p50_ms': percentile(0.5), 'p95_ms': percentile(0.95),
+                'max_ms': round(samples[-1] * 1000, 1) if samples else None}
+
+    def summary(self):
+        snapshot = self.snapshot()
+        return (f"marine API: {snapshot['calls']} calls {snapshot['outcomes']}, "
+                f"p50 {snapshot['p50_ms']} ms, p95 {snapshot['p95_ms']} ms, max {snapshot['max_ms']} ms")
+
+
+def backoff_seconds(attempt, base=MARINE_BACKOFF_SECONDS, cap=MARINE_BACKOFF_MAX_SECONDS):
+    """Full-jitter exponential backoff before retry number `attempt` (1, 2, ...)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class MarineClient:
+    def __init__(self, base_url=MARINE_API_URL, connect_timeout=MARINE_CONNECT_TIMEOUT,
+                 read_timeout=MARINE_READ_TIMEOUT, max_retries=MARINE_MAX_RETRIES, breaker=None, cache=None,
+                 rate_per_sec=MARINE_RATE_PER_SEC):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyRecorder()
+        self.cache = cache
+        self.rate_limiter = RateLimiter(rate_per_sec)
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """This thread's keep-alive session (requests sessions aren't safe to share across threads)."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MARINE_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+
+    def get(self, params):
+        """
+        GET base_url with params, retrying 429/5xx and connection errors, each attempt within
+        the rate limit. Returns the last response (which may be an error status); raises
+        CircuitOpenError while the circuit is open, or the last requests exception when every
+        attempt failed to connect.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Marine API circuit open; skipping {params.get('q')}")
+            self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                self.latency.record(time.perf_counter() - start, type(e).__name__)
+                self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(backoff_seconds(attempt + 1))
+                continue
+            self.latency.record(time.perf_counter() - start, response.status_code)
+
+            if response.status_code not in RETRY_STATUSES:
+                self.breaker.record_success()
+                return response
+            self.breaker.record_failure()
+            if attempt == self.max_retries:
+                return response
+            retry_after = _retry_after(response)
+            time.sleep(min(retry_after, MARINE_BACKOFF_MAX_SECONDS) if retry_after is not None
+                       else backoff_seconds(attempt + 1))
+
+    def marine(self, lat, lng, **extra_params):
+        """The marine.ashx JSON (with tides) for a point, or None after printing why there is none."""
+        api_key = os.getenv('API_KEY')
+        if not api_key:
+            print('Error: API key not found')
+            return None
+        params = {'key': api_key, 'format': 'json', 'q': f'{lat},{lng}', 'tide': 'yes', **extra_params}
+        if self.cache:
+            data = self.cache.get(self.base_url, lat, lng, params)
+            if data is not None:
+                return data
+        response = self.get(params)
+        if response.status_code != 200:
+            print(f"Error fetching marine data for {lat},{lng}: {response.status_code}")
+            return None
+        data = response.json()
+        if self.cache and 'error' not in data.get('data', {}):  # the API reports some errors with a 200
+            self.cache.put(self.base_url, lat, lng, params, data)
+        return data
+
+    def weather(self, lat, lng, **extra_params):
+        """The marine.ashx per-day weather list for a point, or None after printing why there is none."""
+        data = self.marine(lat, lng, **extra_params)
+        if data is None:
+            return None
+        try:
+            if 'data' in data and data['data'].get('weather'):
+                return data['data']['weather']
+            print("Warning: 'weather' data not found in the API response.")
+        except KeyError as e:
+            print(f"KeyError: {str(e)} - Data not found in the API response.")
+        return None
+
+    def summary(self):
+        """Latency line, plus the response cache's hits and misses for this run."""
+        lines = [self.latency.summary()]
+        if self.cache:
+            lines.append(self.cache.summary())
+        return '\n'.join(lines)
+
+
+# Shared by every fetcher in the process
+client = MarineClient(cache=ResponseCache() if MARINE_CACHE_DIR else None)
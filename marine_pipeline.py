@@ -0,0 +1,140 @@
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+import pytz
+import ingest_engine
+import marine_client
+import boundary_tide
+from fetch_planner import FetchPlan
+from forecast_data import serialize_time
+from surfBackend import get_db_connection, load_locations, insert_surf_data, insert_tide_data
+
+# One marine ingest stage for surf, tide and boundary tides. Each location's marine.ashx
+# payload is fetched once per run (locations in the same fetch_planner cell share the fetch) and fanned
+# out to the stages, instead of surfBackend.py, TideData.py and boundary_tide.py each calling
+# the API for the same point. The boundary tide (yesterday's last tide, which graphData joins
+# onto the forecast tides) is carried over from the tide_data rows the previous run stored
+# for yesterday, before the tide stage replaces them; only spots without such a row (e.g. on
+# the first run) still call the API for it.
+#
+#     python marine_pipeline.py
+#
+# then graphData.py and graphPoints.py as before.
+
+# Same "yesterday" as boundary_tide.fetch_historical_tide_data
+BOUNDARY_TIMEZONE = 'America/Los_Angeles'
+
+LAST_TIDE_SQL = '''
+    SELECT tide_time, tide_height_mt, tide_type, tide_date
+    FROM tide_data
+    WHERE location_id = %s AND tide_date = %s
+    ORDER BY tide_time DESC
+    LIMIT 1
+'''
+
+
+def previous_day():
+    return (datetime.now(pytz.timezone(BOUNDARY_TIMEZONE)) - timedelta(days=1)).date()
+
+
+class RunPayloads:
+    """
+    Marine weather per coordinates for one run: each point is fetched once and concurrent asks
+    wait for that fetch. A fetch that raises is forgotten, so the next ask tries again.
+    """
+
+    def __init__(self, client=None):
+        self.client = client or marine_client.client
+        self.api_fetches = 0
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def weather(self, lat, lng):
+        key = (str(lat), str(lng))
+        with self._lock:
+            payload = self._payloads.get(key)
+            fetching = payload is None
+            if fetching:
+                payload = self._payloads[key] = Future()
+                self.api_fetches += 1
+        if fetching:
+            try:
+                payload.set_result(self.client.weather(lat, lng))
+            except Exception as e:
+                with self._lock:
+                    del self._payloads[key]
+                payload.set_exception(e)
+        return payload.result()
+
+
+def carry_over_boundary_tide(location_id, day):
+    """
+    Replaces the location's boundary tide with its last tide_data row on `day`, as
+    boundary_tide.move_last_tide_to_boundary stores it. Returns False if there is no such row.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LAST_TIDE_SQL, (location_id, day))
+        row = cursor.fetchone()
+        if row is None:
+            return False
+        tide_time, tide_height_mt, tide_type, tide_date = row
+        cursor.execute('DELETE FROM boundary_tide_data WHERE location_id = %s', (location_id,))
+        cursor.execute('''
+            INSERT INTO boundary_tide_data (
+                location_id, tide_time, tide_height_mt, tide_type, tide_date
+            ) VALUES (%s, %s, %s, %s, %s)
+        ''', (location_id, serialize_time(tide_time)[:5], tide_height_mt, tide_type, tide_date))  # '04:30:00' -> '04:30'
+        conn.commit()
+        return True
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run_pipeline(**engine_options):
+    """
+    Fetches every location's payload once (ingest_engine.py, engine_options override the
+    INGEST_* settings) and runs the boundary, surf and tide stages on it. Returns IngestStats.
+    """
+    try:
+        locations = load_locations()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+    plan = FetchPlan(locations)
+    print(plan.summary())
+    payloads = RunPayloads()
+    day = previous_day()
+    boundary_fallbacks = []
+
+    def fetch(location):
+        return payloads.weather(*plan.fetch_point(location[0]))
+
+    def write(location_id, weather_data):
+        # Boundary first: it reads yesterday's rows the tide stage is about to replace
+        try:
+            if not carry_over_boundary_tide(location_id, day):
+                boundary_fallbacks.append(location_id)
+        except Exception as e:
+            print(f"Error carrying over boundary tide for location {location_id}: {e}")
+            boundary_fallbacks.append(location_id)
+        surf_written = insert_surf_data(location_id, weather_data)
+        tide_written = insert_tide_data(location_id, weather_data)
+        return surf_written and tide_written
+
+    stats = ingest_engine.run_ingest(locations, fetch, write, **engine_options)
+    for location_id in boundary_fallbacks:
+        boundary_tide.move_last_tide_to_boundary(location_id, *plan.locations[location_id])
+
+    print(stats.summary())
+    print(f"{payloads.api_fetches} payload fetches for {len(locations)} locations, "
+          f"{len(boundary_fallbacks)} boundary tides fetched separately")
+    print(marine_client.client.summary())
+    return stats
+
+
+if __name__ == "__main__":
+    run_pipeline()
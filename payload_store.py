@@ -0,0 +1,134 @@
+import gzip
+import psycopg2
+import psycopg2.errors
+import db_pool
+from forecast_data import fetch_surf_data, fetch_tide_data, fetch_graph_points, build_combined_data
+from ingest_versions import source_key, SURF, TIDE, GRAPH, SCORE
+from json_encoding import dumps_json
+from location_overrides import apply_coordinate_overrides, overrides_digest
+from location_registry import LOCATION_COLUMNS
+
+# Pre-rendered response bodies, written once per ingest run (after graphPoints.main()).
+# They hold every stored row, so /surf, /tide-data and /graph-points serve them for ?all=1
+# only; their default from-now view moves with the hour and is queried live instead.
+# kind -> the ingest datasets the body is built from
+PAYLOAD_SOURCES = {
+    'surf': (SURF,),                  # /surf/<id>
+    'tide': (TIDE,),                  # /tide-data/<id>
+    'graph': (GRAPH,),                # /graph-points/<id>
+    'combined': (SURF, TIDE, SCORE),  # /locations/combined-data/<id> with default flags
+}
+
+
+def payload_source(kind, source, location_version=None):
+    """
+    Text identifying what a payload was rendered from: the source_key() of its datasets'
+    ingest versions, plus the location stamp and override table for combined data.
+    """
+    if kind == 'combined':
+        source += f',loc:{location_version}:{overrides_digest()}'
+    return source
+
+
+def payload_select(compressed=False):
+    column = 'body_gzip' if compressed else 'body'
+    return f'''
+        SELECT {column} FROM response_payloads
+        WHERE location_id = %s AND kind = %s AND source = %s
+    '''
+
+
+def fetch_payload(cursor, location_id, kind, source, compressed=False):
+    """Primary-key lookup of a stored body; None if missing or rendered from other versions."""
+    try:
+        cursor.execute(payload_select(compressed), (location_id, kind, source))
+    except psycopg2.errors.UndefinedTable:
+        cursor.connection.rollback()
+        return None
+    row = cursor.fetchone()
+    return bytes(row[0]) if row else None
+
+
+def store_payload(cursor, location_id, kind, source, body):
+    cursor.execute('''
+        INSERT INTO response_payloads (location_id, kind, source, body, body_gzip, rendered_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())
+        ON CONFLICT (location_id, kind) DO UPDATE
+        SET source = EXCLUDED.source, body = EXCLUDED.body,
+            body_gzip = EXCLUDED.body_gzip, rendered_at = EXCLUDED.rendered_at
+    ''', (location_id, kind, source, body, gzip.compress(body, compresslevel=9, mtime=0)))
+
+
+def _location_version(cursor):
+    try:
+        cursor.execute('SELECT version FROM location_version WHERE id = 1')
+    except psycopg2.errors.UndefinedTable:
+        cursor.connection.rollback()
+        return None
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def render_location_payloads(cursor, location, location_version):
+    """Renders and stores every payload kind for one location. Returns the number stored."""
+    location_id = location['id']
+    cursor.execute('SELECT dataset, version, updated_at FROM ingest_versions WHERE location_id = %s',
+                   (location_id,))
+    versions = {row[0]: row for row in cursor.fetchall()}
+
+    documents = {
+        'surf': lambda: fetch_surf_data(cursor, location_id),
+        'tide': lambda: fetch_tide_data(cursor, location_id),
+        'graph': lambda: fetch_graph_points(cursor, location_id),
+        'combined': lambda: build_combined_data(cursor, location),
+    }
+
+    stored = 0
+    for kind, datasets in PAYLOAD_SOURCES.items():
+        if any(dataset not in versions for dataset in datasets):
+            continue
+        document = documents[kind]()
+        # The live routes answer 404 for empty series; leave those to them
+        if kind != 'combined' and not document:
+            cursor.execute('DELETE FROM response_payloads WHERE location_id = %s AND kind = %s',
+                           (location_id, kind))
+            continue
+        source = payload_source(kind, source_key(versions[dataset] for dataset in datasets), location_version)
+        store_payload(cursor, location_id, kind, source, dumps_json(document))
+        stored += 1
+    return stored
+
+
+def render_all_payloads(conn=None):
+    """Pipeline stage: pre-render surf, tide, graph and combined bodies for every location."""
+    own_conn = conn is None
+    if own_conn:
+        conn = db_pool.connect()
+    # Versions and rows must come from the same snapshot so a body is never mislabelled
+    conn.set_session(isolation_level='REPEATABLE READ')
+    cursor = conn.cursor()
+    try:
+        location_version = _location_version(cursor)
+        cursor.execute(f'SELECT {", ".join(LOCATION_COLUMNS)} FROM locations ORDER BY id')
+        locations = [apply_coordinate_overrides(dict(zip(LOCATION_COLUMNS, row))) for row in cursor.fetchall()]
+        conn.commit()
+
+        total = 0
+        for location in locations:
+            try:
+                total += render_location_payloads(cursor, location, location_version)
+                conn.commit()
+            except psycopg2.Error as e:
+                print(f"Error rendering payloads for location {location['id']}: {e}")
+                conn.rollback()
+        print(f"Rendered {total} payloads for {len(locations)} locations.")
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+        else:
+            conn.set_session(isolation_level='DEFAULT')
+
+
+if __name__ == "__main__":
+    render_all_payloads()
@@ -0,0 +1,87 @@
+from forecast_data import serialize_time
+from forecast_time import surf_timestamp_sql, tide_timestamp_sql
+
+REGION_OVERVIEW_SQL = f'''
+    WITH hours AS (
+        SELECT location_id,
+               json_agg(json_build_object(
+                   'time', to_char(forecast_time, 'YYYY-MM-DD HH24:MI'),
+                   'swellHeight_ft', swellheight_ft,
+                   'swellperiod_secs', swellperiod_secs,
+                   'swelldir', swelldir,
+                   'swelldir16point', swelldir16point,
+                   'windspeedMiles', windspeedmiles,
+                   'winddirDegree', winddirdegree,
+                   'winddir16point', winddir16point
+               ) ORDER BY forecast_time) AS hours
+        FROM (
+            SELECT s.*, {surf_timestamp_sql('s')} AS forecast_time
+            FROM surf_data s
+            WHERE s.location_id = ANY(%(location_ids)s::int[])
+        ) surf
+        -- Forecast slots are 3 hours apart: keep the slot we're in plus the requested horizon
+        WHERE forecast_time > %(now)s::timestamp - INTERVAL '3 hours'
+          AND forecast_time <= %(now)s::timestamp + %(hours)s::int * INTERVAL '1 hour'
+        GROUP BY location_id
+    ),
+    next_tides AS (
+        SELECT DISTINCT ON (location_id, tide_type)
+               location_id, tide_type, tide_date, tide_time, tide_height_mt
+        FROM tide_data t
+        WHERE t.location_id = ANY(%(location_ids)s::int[])
+          AND {tide_timestamp_sql('t')} >= %(now)s::timestamp
+        ORDER BY location_id, tide_type, {tide_timestamp_sql('t')}
+    )
+    SELECT ids.location_id, hours.hours,
+           high.tide_date, high.tide_time, high.tide_height_mt,
+           low.tide_date, low.tide_time, low.tide_height_mt
+    FROM unnest(%(location_ids)s::int[]) AS ids(location_id)
+    LEFT JOIN hours ON hours.location_id = ids.location_id
+    LEFT JOIN next_tides high ON high.location_id = ids.location_id AND high.tide_type = 'HIGH'
+    LEFT JOIN next_tides low ON low.location_id = ids.location_id AND low.tide_type = 'LOW'
+'''
+
+
+def _tide(date, time, height):
+    if date is None:
+        return None
+    return {'tide_date': date.strftime('%Y-%m-%d'), 'tide_time': serialize_time(time), 'tide_height_mt': height}
+
+
+def fetch_region_overview(cursor, locations, now, hours=6):
+    """
+    Current conditions, the next `hours` of forecast and the next high/low tide for every
+    spot in a region, computed in a single round trip. `locations` come from the registry
+    (overrides applied) and keep their order in the result.
+    """
+    cursor.execute(REGION_OVERVIEW_SQL, region_overview_params(locations, now, hours))
+    return region_overview_spots(locations, cursor.fetchall())
+
+
+def region_overview_params(locations, now, hours=6):
+    return {
+        'location_ids': [location['id'] for location in locations],
+        'now': now,
+        'hours': hours,
+    }
+
+
+def region_overview_spots(locations, rows):
+    """Spot entries from REGION_OVERVIEW_SQL rows, in the order of `locations`."""
+    rows = {row[0]: row for row in rows}
+
+    spots = []
+    for location in locations:
+        _, forecast, high_date, high_time, high_height, low_date, low_time, low_height = rows[location['id']]
+        forecast = forecast or []
+        spots.append({
+            'location_id': location['id'],
+            'location_name': location['location_name'],
+            'latitude': location['latitude'],
+            'longitude': location['longitude'],
+            'current': forecast[0] if forecast else None,
+            'hours': forecast,
+            'next_high_tide': _tide(high_date, high_time, high_height),
+            'next_low_tide': _tide(low_date, low_time, low_height),
+        })
+    return spots
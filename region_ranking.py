@@ -0,0 +1,97 @@
+import heapq
+
+# "Best spots in a region for a time range": every spot's surf_scores slots in the range are
+# summarised in one scan of surf_scores (region, forecast_time), one row per spot: the
+# aggregates are per-spot window totals and DISTINCT ON keeps each spot's best slot, so the
+# range is sorted once instead of once per spot. The best `limit` spots are then picked with a
+# heap instead of sorting the whole region.
+
+REGION_RANKING_SQL = '''
+    SELECT DISTINCT ON (location_id)
+           location_id,
+           count(*) OVER spot,
+           avg(score) OVER spot, max(score) OVER spot,
+           forecast_time,
+           avg(face_ft) OVER spot, max(face_ft) OVER spot,
+           avg(wind_quality) OVER spot
+    FROM surf_scores
+    WHERE region = %(region)s
+      AND forecast_time >= %(start)s
+{end_filter}    WINDOW spot AS (PARTITION BY location_id ORDER BY score DESC NULLS LAST, forecast_time
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    ORDER BY location_id, score DESC NULLS LAST, forecast_time
+'''
+
+# ?by= -> REGION_RANKING_SQL column ranked on (ties go to the better single slot)
+RANK_METRICS = {'score': 2, 'face_ft': 5, 'wind_quality': 7}
+BEST_SCORE_COLUMN = 3
+DEFAULT_RANK_METRIC = 'score'
+DEFAULT_RANKING_LIMIT = 10
+MAX_RANKING_LIMIT = 50
+
+
+def region_ranking_query(region, forecast_window):
+    """REGION_RANKING_SQL and params for the region's slots inside the window."""
+    params = {'region': region, 'start': forecast_window.start}
+    end_filter = ''
+    if forecast_window.end is not None:
+        end_filter = '      AND forecast_time < %(end)s\n'
+        params['end'] = forecast_window.end
+    return REGION_RANKING_SQL.format(end_filter=end_filter), params
+
+
+def parse_ranking_args(args):
+    """(metric, limit) from ?by=&limit=; ValueError with a message for the client."""
+    metric = args.get('by', DEFAULT_RANK_METRIC)
+    if metric not in RANK_METRICS:
+        raise ValueError(f"by must be one of {', '.join(RANK_METRICS)}")
+    try:
+        limit = int(args.get('limit', DEFAULT_RANKING_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_RANKING_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_RANKING_LIMIT}")
+    return metric, limit
+
+
+def _round(value, digits):
+    return None if value is None else round(float(value), digits)
+
+
+def _spot(location, row):
+    _, slots, score, best_score, best_time, face_ft, face_ft_max, wind_quality = row
+    return {
+        'location_id': location['id'],
+        'location_name': location['location_name'],
+        'latitude': location['latitude'],
+        'longitude': location['longitude'],
+        'slots': slots,
+        'score': _round(score, 1),
+        'best_score': _round(best_score, 1),
+        'best_time': best_time.strftime('%Y-%m-%d %H:%M') if best_time is not None else None,
+        'face_ft': _round(face_ft, 1),
+        'face_ft_max': _round(face_ft_max, 1),
+        'wind_quality': _round(wind_quality, 2),
+    }
+
+
+def rank_region_spots(locations, rows, metric=DEFAULT_RANK_METRIC, limit=DEFAULT_RANKING_LIMIT):
+    """
+    The `limit` best spots from REGION_RANKING_SQL rows, best first. `locations` come from the
+    registry (overrides applied); spots with no slots in the range, or no value for the metric,
+    are left out.
+    """
+    by_id = {location['id']: location for location in locations}
+    column = RANK_METRICS[metric]
+    candidates = (row for row in rows if row[0] in by_id and row[column] is not None)
+    # Only the winners become spot dicts
+    best = heapq.nlargest(limit, candidates,
+                          key=lambda row: (row[column], row[BEST_SCORE_COLUMN] or 0, -row[0]))
+    return [_spot(by_id[row[0]], row) for row in best]
+
+
+def fetch_region_ranking(cursor, region, locations, forecast_window, metric=DEFAULT_RANK_METRIC,
+                         limit=DEFAULT_RANKING_LIMIT):
+    """The region's best spots inside the window, in a single round trip."""
+    cursor.execute(*region_ranking_query(region, forecast_window))
+    return rank_region_spots(locations, cursor.fetchall(), metric, limit)
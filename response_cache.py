@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+# On-disk cache of raw marine API responses, so rerunning an ingest (minutes after the last
+# run, or after one that crashed halfway) doesn't refetch what it already has. Entries are
+# gzipped JSON files named by a hash of (endpoint, lat, lng, UTC date, params without the API
+# key), kept for MARINE_CACHE_TTL_SECONDS. Files are written to a temp name and renamed into
+# place, so a reader (or another process) never sees half an entry. Reads bump the file's
+# mtime and, past MARINE_CACHE_MAX_MB, the least recently used files are deleted first.
+# MARINE_CACHE_DIR= (empty) turns the cache off.
+MARINE_CACHE_DIR = os.getenv('MARINE_CACHE_DIR', '.marine_cache')
+MARINE_CACHE_TTL_SECONDS = float(os.getenv('MARINE_CACHE_TTL_SECONDS', '10800'))
+MARINE_CACHE_MAX_MB = float(os.getenv('MARINE_CACHE_MAX_MB', '200'))
+
+ENTRY_SUFFIX = '.json.gz'
+
+
+def cache_key(endpoint, lat, lng, params, day=None):
+    day = day or datetime.now(timezone.utc).date().isoformat()
+    params = sorted((name, str(value)) for name, value in params.items() if name != 'key')
+    text = json.dumps([endpoint, str(lat), str(lng), day, params])
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class ResponseCache:
+    def __init__(self, directory=MARINE_CACHE_DIR, ttl=MARINE_CACHE_TTL_SECONDS,
+                 max_bytes=int(MARINE_CACHE_MAX_MB * 1024 * 1024)):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stores': 0, 'evictions': 0, 'errors': 0}
+        self._sizes = None  # file path -> bytes, scanned on the first store
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def _count(self, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def _discard(self, path, outcome):
+        _unlink(path)
+        with self._lock:
+            self.stats[outcome] += 1
+            if self._sizes is not None:
+                self._sizes.pop(path, None)
+
+    def get(self, endpoint, lat, lng, params):
+        """The cached response data for the request, or None (missing, expired or unreadable)."""
+        path = self._path(cache_key(endpoint, lat, lng, params))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+            if not isinstance(entry, dict) or 'data' not in entry:
+                raise ValueError("not a cache entry")
+            fetched_at = float(entry['fetched_at'])
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading cached response {path}: {e}")
+            self._discard(path, 'errors')
+            return None
+
+        if time.time() - fetched_at > self.ttl:
+            self._discard(path, 'expired')
+            return None
+        try:
+            os.utime(path)  # most recently used
+        except OSError:
+            pass
+        self._count('hits')
+        return entry['data']
+
+    def put(self, endpoint, lat, lng, params, data):
+        path = self._path(cache_key(endpoint, lat, lng, params))
+        body = gzip.compress(json.dumps({'fetched_at': time.time(), 'data': data}).encode(), mtime=0)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(body)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            print(f"Error caching response {path}: {e}")
+            self._count('errors')
+            return
+
+        with self._lock:
+            self.stats['stores'] += 1
+            sizes = self._scan() if self._sizes is None else self._sizes
+            sizes[path] = len(body)
+            if sum(sizes.values()) > self.max_bytes:
+                self._evict(sizes)
+
+    def _scan(self):
+        sizes = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(ENTRY_SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        sizes[path] = os.path.getsize(path)
+                    except OSError:
+                        pass
+        self._sizes = sizes
+        return sizes
+
+    def _evict(self, sizes):
+        """Deletes least recently used entries until the cache fits max_bytes (caller holds the lock)."""
+        def last_used(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        total = sum(sizes.values())
+        for path in sorted(sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(path)
+            _unlink(path)
+            self.stats['evictions'] += 1
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses'] + stats['expired']
+        ratio = f"{stats['hits'] / lookups:.0%}" if lookups else 'n/a'
+        return (f"response cache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['expired']} expired ({ratio} hit rate), {stats['stores']} stored, "
+                f"{stats['evictions']} evicted, {stats['errors']} errors")
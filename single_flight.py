@@ -0,0 +1,168 @@
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+# Per-worker request coalescing. Concurrent identical reads (same key) wait on the one fetch
+# already in flight and share its result, which is then kept for COALESCE_TTL_SECONDS. Keys
+# include the ingest versions the result was read from, so a new ingest starts a new key.
+# Entries are refreshed a little before they expire, with a probability that grows as
+# expiry nears and with how long the fetch took ("XFetch", scaled by EARLY_REFRESH_BETA), so
+# a hot key is refreshed by one request instead of stampeding when it expires.
+COALESCE_TTL_SECONDS = float(os.getenv('COALESCE_TTL_SECONDS', '5'))
+COALESCE_MAX_ENTRIES = int(os.getenv('COALESCE_MAX_ENTRIES', '1024'))
+EARLY_REFRESH_BETA = float(os.getenv('EARLY_REFRESH_BETA', '1.0'))
+
+
+class CoalescingMetrics:
+    """Per-name counters: fetches run, requests that shared an in-flight fetch or a kept result."""
+
+    def __init__(self):
+        self._names = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, outcome):
+        with self._lock:
+            stats = self._names.setdefault(name, {
+                'fetches': 0, 'coalesced': 0, 'cache_hits': 0, 'early_refreshes': 0, 'errors': 0,
+            })
+            stats[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = {}
+            for name, stats in self._names.items():
+                saved = stats['coalesced'] + stats['cache_hits']
+                requests = saved + stats['fetches']
+                snapshot[name] = dict(stats, queries_saved=saved,
+                                      saved_ratio=round(saved / requests, 3) if requests else None)
+            return snapshot
+
+
+def refresh_early(expires, fetch_seconds, now, beta=EARLY_REFRESH_BETA):
+    """Whether to refresh an unexpired entry now (XFetch: -log(random) makes this rare until expiry nears)."""
+    return now - fetch_seconds * beta * math.log(1.0 - random.random()) >= expires
+
+
+class _Entry:
+    __slots__ = ('value', 'expires', 'fetch_seconds')
+
+    def __init__(self, value, expires, fetch_seconds):
+        self.value = value
+        self.expires = expires
+        self.fetch_seconds = fetch_seconds
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self, done):
+        self.done = done
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent get(key, fetch) calls in a threaded worker: the first caller runs
+    fetch(), the rest wait for it. Successful results are kept for ttl seconds (LRU beyond
+    max_entries); exceptions are raised to every waiting caller and not kept.
+    """
+
+    def __init__(self, name, metrics, ttl=COALESCE_TTL_SECONDS, max_entries=COALESCE_MAX_ENTRIES,
+                 beta=EARLY_REFRESH_BETA):
+        self.name = name
+        self.metrics = metrics
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.beta = beta
+        self._results = OrderedDict()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _new_call(self):
+        return _Call(threading.Event())
+
+    def _join(self, key):
+        """(kept value, None, False), or (None, call, leading) for the fetch to run or wait on."""
+        with self._lock:
+            now = time.monotonic()
+            entry = self._results.get(key)
+            call = self._calls.get(key)
+            if entry is not None and now < entry.expires:
+                # While someone refreshes early, everyone else keeps using the unexpired value
+                if call is not None or not refresh_early(entry.expires, entry.fetch_seconds, now, self.beta):
+                    self._results.move_to_end(key)
+                    self.metrics.record(self.name, 'cache_hits')
+                    return entry.value, None, False
+                self.metrics.record(self.name, 'early_refreshes')
+            if call is not None:
+                self.metrics.record(self.name, 'coalesced')
+                return None, call, False
+            call = self._calls[key] = self._new_call()
+            self.metrics.record(self.name, 'fetches')
+            return None, call, True
+
+    def _finish(self, key, call, started):
+        with self._lock:
+            del self._calls[key]
+            if call.error is None:
+                finished = time.monotonic()
+                self._results[key] = _Entry(call.value, finished + self.ttl, finished - started)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            else:
+                self.metrics.record(self.name, 'errors')
+
+    def get(self, key, fetch):
+        value, call, leading = self._join(key)
+        if call is None:
+            return value
+        if not leading:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        started = time.monotonic()
+        try:
+            call.value = fetch()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call, started)
+            call.done.set()
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for one event loop: `await get(key, fetch)` with fetch an async function."""
+
+    def _new_call(self):
+        return _Call(asyncio.Event())
+
+    async def get(self, key, fetch):
+        value, call, leading = self._join(key)
+        if call is None:
+            return value
+        if not leading:
+            await call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        started = time.monotonic()
+        try:
+            call.value = await fetch()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            self._finish(key, call, started)
+            call.done.set()
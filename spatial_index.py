@@ -0,0 +1,141 @@
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit_vector(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+
+def _chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def _km_to_chord(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class _Tree:
+    """
+    Static KD-tree over points on the unit sphere. Straight-line (chord) distance between unit
+    vectors orders points exactly like great-circle distance, and has no antimeridian seam.
+    Nodes live in flat lists: node i splits on axis[i] at points[i], children left[i]/right[i].
+    """
+
+    def __init__(self, points, items):
+        self.points = []
+        self.items = []
+        self.axis = []
+        self.left = []
+        self.right = []
+        self.root = self._build(list(zip(points, items)), 0)
+
+    def _build(self, entries, depth):
+        if not entries:
+            return -1
+        axis = depth % 3
+        entries.sort(key=lambda entry: entry[0][axis])
+        middle = len(entries) // 2
+        node = len(self.points)
+        self.points.append(entries[middle][0])
+        self.items.append(entries[middle][1])
+        self.axis.append(axis)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.left[node] = self._build(entries[:middle], depth + 1)
+        self.right[node] = self._build(entries[middle + 1:], depth + 1)
+        return node
+
+    def nearest(self, target, k, max_distance_sq=math.inf):
+        """Up to k (squared chord distance, item) pairs within max_distance_sq, nearest first."""
+        heap = []  # max-heap of the best k via negated distances
+        points, axes, left, right = self.points, self.axis, self.left, self.right
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            point = points[node]
+            dx, dy, dz = point[0] - target[0], point[1] - target[1], point[2] - target[2]
+            distance_sq = dx * dx + dy * dy + dz * dz
+            bound = -heap[0][0] if len(heap) == k else max_distance_sq
+            if distance_sq <= bound:
+                entry = (-distance_sq, node)
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heapreplace(heap, entry)
+                bound = -heap[0][0] if len(heap) == k else max_distance_sq
+
+            diff = target[axes[node]] - point[axes[node]]
+            near, far = (left[node], right[node]) if diff < 0 else (right[node], left[node])
+            # Far side is pushed first so the near side is explored first
+            if diff * diff <= bound:
+                stack.append(far)
+            stack.append(near)
+        return [(-distance_sq, self.items[node]) for distance_sq, node in sorted(heap, reverse=True)]
+
+
+class SpotIndex:
+    """
+    k-nearest and radius lookups over locations (with coordinate overrides applied).
+    Rebuilt wholesale from the location registry whenever it reloads.
+    """
+
+    def __init__(self, locations=()):
+        self._tree = None
+        self._size = 0
+        self.rebuild(locations)
+
+    def rebuild(self, locations):
+        locations = [location for location in locations
+                     if location.get('latitude') is not None and location.get('longitude') is not None]
+        points = [_unit_vector(float(location['latitude']), float(location['longitude'])) for location in locations]
+        # Swap in one assignment so readers never see a half-built tree
+        self._tree, self._size = _Tree(points, locations), len(locations)
+
+    def __len__(self):
+        return self._size
+
+    def nearest(self, lat, lng, k=10, radius_km=None):
+        """[(distance_km, location)] for the k closest spots, optionally limited to radius_km."""
+        tree = self._tree
+        if tree is None or k <= 0:
+            return []
+        max_distance_sq = _km_to_chord(radius_km) ** 2 if radius_km is not None else math.inf
+        matches = tree.nearest(_unit_vector(lat, lng), k, max_distance_sq)
+        return [(_chord_to_km(math.sqrt(distance_sq)), location) for distance_sq, location in matches]
+
+    def within(self, lat, lng, radius_km):
+        """[(distance_km, location)] for every spot within radius_km, nearest first."""
+        return self.nearest(lat, lng, k=max(self._size, 1), radius_km=radius_km)
+
+
+def spot_summary(distance_km, location):
+    """One /locations/nearest entry."""
+    return {
+        'id': location['id'],
+        'location_name': location['location_name'],
+        'region': location['region'],
+        'latitude': location['latitude'],
+        'longitude': location['longitude'],
+        'distance_km': round(distance_km, 3),
+    }
+
+
+def linear_nearest(locations, lat, lng, k=10, radius_km=None):
+    """Reference implementation: haversine against every spot, then sort."""
+    distances = [(haversine_km(lat, lng, float(location['latitude']), float(location['longitude'])), location)
+                 for location in locations]
+    if radius_km is not None:
+        distances = [entry for entry in distances if entry[0] <= radius_km]
+    distances.sort(key=lambda entry: entry[0])
+    return distances[:k]
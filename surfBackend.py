@@ -1,9 +1,11 @@
-import requests
 import os
 import psycopg2
 from dotenv import load_dotenv
 from datetime import datetime
 from urllib.parse import urlparse
+from ingest_versions import bump_ingest_version, SURF, TIDE
+import ingest_engine
+import marine_client
 
 # Load environment variables from config.env (only for local testing)
 if os.getenv('ENV') != 'production':
@@ -21,36 +23,20 @@ def get_db_connection():
             port=os.getenv('DB_PORT', '5432')
         )
 
+def fetch_marine_weather(lat, lng):
+    """The API's per-day weather list for a point, or None (after printing why) if there isn't one."""
+    return marine_client.client.weather(lat, lng)
+
+def write_marine_data(location_id, weather_data):
+    """Writes surf and tide rows; False if either insert failed (it prints its own error)."""
+    surf_written = insert_surf_data(location_id, weather_data)
+    tide_written = insert_tide_data(location_id, weather_data)
+    return surf_written and tide_written
+
 def fetch_marine_data(lat, lng, location_id):
-    api_key = os.getenv('API_KEY')
-    
-    if not api_key:
-        print('Error: API key not found')
-        return
-        
-    base_url = "http://api.worldweatheronline.com/premium/v1/marine.ashx"
-    params = {
-        'key': api_key,
-        'format': 'json',
-        'q': f'{lat},{lng}',
-        'tide': 'yes',
-    }
-
-    response = requests.get(base_url, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        print("API Response:", data)
-
-        try:
-            if 'data' in data and data['data'].get('weather'):
-                weather_data = data['data']['weather']
-                insert_surf_data(location_id, weather_data)
-                insert_tide_data(location_id, weather_data)
-            else:
-                print("Warning: 'weather' data not found in the API response.")
-        except KeyError as e:
-            print(f"KeyError: {str(e)} - Data not found in the API response.")
+    weather_data = fetch_marine_weather(lat, lng)
+    if weather_data is not None:
+        write_marine_data(location_id, weather_data)
 
 def insert_surf_data(location_id, weather_data):
     conn = None
@@ -121,10 +107,13 @@ def insert_surf_data(location_id, weather_data):
                     values
                 )
 
+        bump_ingest_version(cursor, location_id, SURF)
         conn.commit()
+        return True
 
     except Exception as e:
         print(f"Error inserting surf data: {str(e)}")
+        return False
     finally:
         if cursor:
             cursor.close()
@@ -160,40 +149,56 @@ def insert_tide_data(location_id, weather_data):
                         (location_id, tide_time, tide_height, tide_type, tide_date)
                     )
 
+        bump_ingest_version(cursor, location_id, TIDE)
         conn.commit()
+        return True
 
     except Exception as e:
         print(f"Error inserting tide data: {str(e)}")
+        return False
     finally:
         if cursor:
             cursor.close()
         if conn:
             conn.close()
 
-def process_all_locations():
+def load_locations():
     conn = None
     cursor = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-
         cursor.execute('SELECT id, latitude, longitude FROM locations')
-        locations = cursor.fetchall()
-
-        for location in locations:
-            location_id, lat, lng = location
-            fetch_marine_data(lat, lng, location_id)
-
-    except Exception as e:
-        print(f"Error: {str(e)}")
+        return cursor.fetchall()
     finally:
         if cursor:
             cursor.close()
         if conn:
             conn.close()
 
-# Run for all locations
-process_all_locations()
+def process_all_locations(**engine_options):
+    """
+    Fetches every location concurrently and writes each as it arrives (ingest_engine.py;
+    engine_options override the INGEST_* settings). Returns the run's IngestStats.
+    """
+    try:
+        locations = load_locations()
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return None
+
+    def fetch(location):
+        _, lat, lng = location
+        return fetch_marine_weather(lat, lng)
+
+    stats = ingest_engine.run_ingest(locations, fetch, write_marine_data, **engine_options)
+    print(stats.summary())
+    print(marine_client.client.summary())
+    return stats
+
+if __name__ == "__main__":
+    # Run for all locations
+    process_all_locations()
 
 
 
@@ -0,0 +1,171 @@
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+import db_pool
+from forecast_time import surf_timestamp_sql
+from ingest_versions import bump_ingest_versions, SCORE
+
+# Surf-quality scores (0-10) for every surf_data row, computed for all locations at once from
+# the spots' preferences in the locations table. Runs as a pipeline stage after the surf ingest
+# (graphPoints.main(), before payloads are rendered); `python surf_scores.py` re-scores on its
+# own, e.g. after csv_waveCalc.py changed the preferences.
+#
+# score = 10 * size * swell_quality * (0.4 + 0.6 * wind_quality) * (0.5 + 0.5 * period_quality)
+#   size            face height (swellHeight_ft * wavecalc) over IDEAL_FACE_FT, capped at 1
+#   swell_quality   1 inside the preferred swell window, falling to SWELL_OFF_WINDOW over
+#                   SWELL_FALLOFF_DEG outside it, 0 inside the bad swell window
+#   wind_quality    1 inside the preferred (offshore) wind window or below LIGHT_WIND_MPH,
+#                   else falling to 0 at BLOWN_OUT_MPH
+#   period_quality  swell period from MIN_PERIOD_SECS (0) to IDEAL_PERIOD_SECS (1)
+# Direction windows are clockwise bearings and may wrap through north (e.g. 285-40).
+# Each score row also carries its spot's region and forecast time, so region rankings
+# (region_ranking.py) read surf_scores alone through its (region, forecast_time) index.
+
+# Face height (ft) at which the size term saturates; reefs need more swell to break well
+IDEAL_FACE_FT = 6.0
+IDEAL_REEF_FACE_FT = 8.0
+# Swell quality outside the preferred window, reached SWELL_FALLOFF_DEG past its edge
+SWELL_OFF_WINDOW = 0.4
+SWELL_FALLOFF_DEG = 45.0
+# Swell quality for spots without a preferred window
+SWELL_UNKNOWN_WINDOW = 0.75
+LIGHT_WIND_MPH = 5.0
+BLOWN_OUT_MPH = 20.0
+MIN_PERIOD_SECS = 6.0
+IDEAL_PERIOD_SECS = 14.0
+
+LOCATION_PREFERENCES_SQL = '''
+    SELECT id, preferred_wind_dir_min, preferred_wind_dir_max,
+           preferred_swell_dir_min, preferred_swell_dir_max,
+           bad_swell_dir_min, bad_swell_dir_max, wavecalc::text, reef
+    FROM locations
+    ORDER BY id
+'''
+
+SURF_INPUTS_SQL = f'''
+    SELECT s.id, s.location_id, s.swellHeight_ft, s.swelldir, s.swellperiod_secs, s.windspeedMiles,
+           s.winddirDegree, l.region, {surf_timestamp_sql('s')}
+    FROM surf_data s
+    JOIN locations l ON l.id = s.location_id
+'''
+
+
+def in_circular_range(bearings, low, high):
+    """Whether each bearing lies on the clockwise arc from low to high; False where a bound is NaN."""
+    return np.mod(bearings - low, 360) <= np.mod(high - low, 360)
+
+
+def degrees_outside_range(bearings, low, high):
+    """Angular distance from each bearing to the nearer edge of the low-high arc, 0 inside it."""
+    def distance(a, b):
+        difference = np.mod(a - b, 360)
+        return np.minimum(difference, 360 - difference)
+    outside = np.minimum(distance(bearings, low), distance(bearings, high))
+    return np.where(in_circular_range(bearings, low, high), 0.0, outside)
+
+
+def score_arrays(swell_ft, swell_dir, period, wind_mph, wind_dir, preferences):
+    """
+    Scores for parallel row arrays; preferences holds per-row arrays of the spot columns
+    (NaN where unset). Returns score, face_ft, swell_quality and wind_quality arrays, NaN
+    where an input the term needs is missing.
+    """
+    wavecalc = np.where(np.isnan(preferences['wavecalc']), 1.0, preferences['wavecalc'])
+    face_ft = swell_ft * wavecalc
+    size = np.clip(face_ft / np.where(preferences['reef'], IDEAL_REEF_FACE_FT, IDEAL_FACE_FT), 0, 1)
+
+    swell_min, swell_max = preferences['preferred_swell_dir_min'], preferences['preferred_swell_dir_max']
+    has_window = ~np.isnan(swell_min) & ~np.isnan(swell_max)
+    outside = degrees_outside_range(swell_dir, swell_min, swell_max)
+    swell_quality = 1 - (1 - SWELL_OFF_WINDOW) * np.clip(outside / SWELL_FALLOFF_DEG, 0, 1)
+    swell_quality = np.where(has_window, swell_quality, np.where(np.isnan(swell_dir), np.nan, SWELL_UNKNOWN_WINDOW))
+    # The preferred window wins where the two overlap; spots without one still get the bad window
+    in_preferred = has_window & (outside == 0)
+    bad = in_circular_range(swell_dir, preferences['bad_swell_dir_min'], preferences['bad_swell_dir_max'])
+    swell_quality = np.where(bad & ~in_preferred, 0.0, swell_quality)
+
+    strength = np.clip((wind_mph - LIGHT_WIND_MPH) / (BLOWN_OUT_MPH - LIGHT_WIND_MPH), 0, 1)
+    offshore = in_circular_range(wind_dir, preferences['preferred_wind_dir_min'], preferences['preferred_wind_dir_max'])
+    wind_quality = np.where(offshore, 1.0, 1 - strength)
+
+    period_quality = np.clip((period - MIN_PERIOD_SECS) / (IDEAL_PERIOD_SECS - MIN_PERIOD_SECS), 0, 1)
+
+    score = 10 * size * swell_quality * (0.4 + 0.6 * wind_quality) * (0.5 + 0.5 * period_quality)
+    return {
+        'score': np.round(score, 1),
+        'face_ft': np.round(face_ft, 1),
+        'swell_quality': np.round(swell_quality, 2),
+        'wind_quality': np.round(wind_quality, 2),
+    }
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def location_preferences(rows):
+    """(sorted location ids, {column: array per location}) from LOCATION_PREFERENCES_SQL rows."""
+    columns = ('preferred_wind_dir_min', 'preferred_wind_dir_max', 'preferred_swell_dir_min',
+               'preferred_swell_dir_max', 'bad_swell_dir_min', 'bad_swell_dir_max', 'wavecalc')
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    preferences = {column: np.array([_number(row[index]) for row in rows], dtype=float)
+                   for index, column in enumerate(columns, 1)}
+    preferences['reef'] = np.array([bool(row[8]) for row in rows], dtype=bool)
+    return ids, preferences
+
+
+def score_surf_rows(surf_rows, location_rows):
+    """
+    [(surf_data id, location id, region, forecast time, score, face_ft, swell_quality, wind_quality)]
+    for SURF_INPUTS_SQL rows.
+    """
+    if not surf_rows:
+        return []
+    location_ids, preferences = location_preferences(location_rows)
+    inputs = np.array([row[1:7] for row in surf_rows], dtype=float)
+    # Spread each spot's preferences over its rows (location_ids is sorted)
+    spot = np.searchsorted(location_ids, inputs[:, 0].astype(np.int64))
+    scores = score_arrays(inputs[:, 1], inputs[:, 2], inputs[:, 3], inputs[:, 4], inputs[:, 5],
+                          {column: values[spot] for column, values in preferences.items()})
+
+    columns = [scores['score'], scores['face_ft'], scores['swell_quality'], scores['wind_quality']]
+    return [
+        (row[0], row[1], row[7], row[8]) + tuple(None if np.isnan(column[index]) else float(column[index]) for column in columns)
+        for index, row in enumerate(surf_rows)
+    ]
+
+
+def score_all_surf(conn=None):
+    """Pipeline stage: rewrite surf_scores for every surf_data row and bump the score versions."""
+    own_conn = conn is None
+    if own_conn:
+        conn = db_pool.connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LOCATION_PREFERENCES_SQL)
+        location_rows = cursor.fetchall()
+        cursor.execute(SURF_INPUTS_SQL)
+        scored = score_surf_rows(cursor.fetchall(), location_rows)
+
+        cursor.execute('DELETE FROM surf_scores')
+        execute_values(cursor, '''
+            INSERT INTO surf_scores (surf_data_id, location_id, region, forecast_time,
+                                     score, face_ft, swell_quality, wind_quality) VALUES %s
+        ''', scored, page_size=1000)
+        bump_ingest_versions(cursor, SCORE, 'surf_data')
+        conn.commit()
+        print(f"Scored {len(scored)} surf rows.")
+    except psycopg2.Error as e:
+        print(f"Error scoring surf data: {e}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        if own_conn:
+            conn.close()
+
+
+if __name__ == "__main__":
+    score_all_surf()
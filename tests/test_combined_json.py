@@ -0,0 +1,139 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+import combined_json
+import json_encoding
+
+psycopg2 = pytest.importorskip('psycopg2')
+
+from combined_json import FALLBACK_MARKER, _float, _text, fetch_combined_json
+from forecast_data import build_combined_data
+from json_encoding import _stdlib_encode, ascii_json, dumps_json, encode
+
+# combined_json renders in Postgres (12+), so these run against TEST_DATABASE_URL, e.g.
+# postgresql://postgres@localhost/postgres; the tables are temporary and the database is left as it was.
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+LOCATION = {
+    'id': 1, 'location_name': 'Pipeline', 'latitude': 21.66, 'longitude': -158.05,
+    'preferred_wind_dir_min': 90, 'preferred_wind_dir_max': 180,
+    'preferred_swell_dir_min': 285.5, 'preferred_swell_dir_max': 40,
+}
+
+TEMP_TABLES = '''
+    CREATE TEMP TABLE surf_data (
+        id INT, location_id INT, date VARCHAR(20), sunrise VARCHAR(10), sunset VARCHAR(10), time VARCHAR(10),
+        tempF FLOAT, windspeedMiles FLOAT, winddirDegree INT, winddir16Point VARCHAR(10), weatherDesc VARCHAR(100),
+        swellHeight_ft FLOAT, swellDir INT, swellDir16Point VARCHAR(10), swellPeriod_secs FLOAT
+    );
+    CREATE TEMP TABLE surf_scores (surf_data_id INT, score DOUBLE PRECISION);
+    CREATE TEMP TABLE tide_data (
+        id INT, location_id INT, tide_time VARCHAR(10), tide_height_mt FLOAT, tide_type VARCHAR(10), tide_date DATE
+    );
+'''
+
+TRICKY_TEXT = [
+    'Sunny', 'Partly "cloudy"', 'back\\slash', 'tab\there', 'line\nbreak', 'bell\x07', 'del\x7f',
+    'slash/ok', 'Ōahu ☀', 'line separator', 'emoji 🌊', '',
+]
+
+
+@pytest.fixture
+def cursor():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    try:
+        conn = psycopg2.connect(TEST_DATABASE_URL)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f'No test database: {e}')
+    cursor = conn.cursor()
+    cursor.execute(TEMP_TABLES)
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+        conn.rollback()
+        conn.close()
+
+
+def rendered(cursor, expression, value, sql_type):
+    cursor.execute(f'SELECT {expression.format(column=f"(%(value)s::{sql_type})")}', {'value': value})
+    return cursor.fetchone()[0]
+
+
+def insert_surf(cursor, rows, score=None):
+    for n, row in enumerate(rows, start=1):
+        values = dict({
+            'date': '2026-10-18', 'sunrise': '06:45 AM', 'sunset': '6:10 PM', 'time': '300', 'tempf': 72.0,
+            'windspeedmiles': 12.5, 'winddirdegree': 45, 'winddir16point': 'NE', 'weatherdesc': 'Sunny',
+            'swellheight_ft': 4.2, 'swelldir': 300, 'swelldir16point': 'WNW', 'swellperiod_secs': 14.0,
+        }, **row)
+        columns = ', '.join(values)
+        cursor.execute(f'INSERT INTO surf_data (id, location_id, {columns}) VALUES (%s, 1, {", ".join(["%s"] * len(values))})',
+                       (n, *values.values()))
+        cursor.execute('INSERT INTO surf_scores VALUES (%s, %s)', (n, score))
+
+
+def insert_tide(cursor, heights):
+    for n, height in enumerate(heights, start=1):
+        cursor.execute("INSERT INTO tide_data VALUES (%s, 1, '04:30', %s, 'LOW', %s)", (n, height, date(2026, 10, 18)))
+
+
+@pytest.mark.parametrize('value', [0.1 + 0.2, -0.0, 0.0, 72.0, -1.5, 1e-4, 123456789012345.6, 1e15 - 1])
+def test_float_written_like_python(cursor, value):
+    text = rendered(cursor, _float('{column}'), value, 'float8')
+    assert text != FALLBACK_MARKER
+    assert text.encode() == encode(value) == _stdlib_encode(value)
+
+
+@pytest.mark.parametrize('value', [1e16, 1e15, -2.5e20, 9.9e-5, 5e-324, float('nan'), float('inf'), float('-inf')])
+def test_float_Postgres_writes_differently_is_marked(cursor, value):
+    assert rendered(cursor, _float('{column}'), value, 'float8') == FALLBACK_MARKER
+
+
+def test_null_float(cursor):
+    assert rendered(cursor, _float('{column}'), None, 'float8') == 'null'
+
+
+@pytest.mark.parametrize('value', TRICKY_TEXT + [None])
+def test_text_escaped_like_python(cursor, value):
+    text = rendered(cursor, _text('{column}'), value, 'text')
+    assert FALLBACK_MARKER not in text
+    assert json.loads(text) == value
+    # Postgres writes non-ASCII as UTF-8 like orjson; fetch_combined_json escapes it for the stdlib encoder
+    assert ascii_json(text.encode('utf-8')) == _stdlib_encode(value)
+
+
+@pytest.mark.parametrize('backend', ['orjson', 'stdlib'])
+def test_document_matches_python_build(cursor, monkeypatch, backend):
+    if backend == 'stdlib':
+        monkeypatch.setattr(combined_json, 'JSON_BACKEND', 'stdlib')
+        monkeypatch.setattr(json_encoding, 'encode', _stdlib_encode)
+    elif json_encoding.JSON_BACKEND != 'orjson':
+        pytest.skip('orjson is not installed')
+    insert_surf(cursor, [{'weatherdesc': text, 'winddir16point': text[:10]} for text in TRICKY_TEXT], score=0.1 + 0.2)
+    insert_tide(cursor, [-0.0, 0.3, 1.75])
+    assert fetch_combined_json(cursor, LOCATION) == dumps_json(build_combined_data(cursor, LOCATION))
+    assert (fetch_combined_json(cursor, LOCATION, include_surf=False)
+            == dumps_json(build_combined_data(cursor, LOCATION, include_surf=False)))
+
+
+@pytest.mark.parametrize('surf, tide', [
+    ({'swellheight_ft': 1e16}, 0.5),
+    ({'tempf': float('nan')}, 0.5),
+    ({}, 1e-7),
+])
+def test_document_with_divergent_float_falls_back(cursor, surf, tide):
+    insert_surf(cursor, [{}, surf])
+    insert_tide(cursor, [0.5, tide])
+    assert fetch_combined_json(cursor, LOCATION) is None
+
+
+def test_divergent_float_in_excluded_array_is_ignored(cursor):
+    insert_surf(cursor, [{}])
+    insert_tide(cursor, [1e-7])
+    assert fetch_combined_json(cursor, LOCATION, include_tide=False) == dumps_json(
+        build_combined_data(cursor, LOCATION, include_tide=False))
@@ -0,0 +1,107 @@
+import pytest
+
+from fetch_planner import FetchPlan, cell_key, compare_forecasts, validate
+
+
+def cells_of(plan):
+    return {leader: cell.members for leader, cell in plan.cells.items()}
+
+
+def test_grid_zero_shares_only_identical_coordinates():
+    plan = FetchPlan([(1, 21.66, -158.05), (2, '21.66', '-158.05'), (3, 21.6601, -158.05)], 0)
+    assert cells_of(plan) == {1: [1, 2], 3: [3]}
+    assert plan.fetch_point(2) == (21.66, -158.05)
+
+
+def test_grid_cell_key():
+    assert cell_key(21.66, -158.05, 0) == (21.66, -158.05)
+    assert cell_key(21.66, -158.03, 0.05) == (433, -3161)
+
+
+@pytest.mark.parametrize('first, second', [
+    ((21.649, -158.0), (21.651, -158.0)),        # either side of a latitude line
+    ((21.66, -158.049), (21.66, -158.051)),      # either side of a (negative) longitude line
+    ((21.649, -158.049), (21.651, -158.051)),    # diagonal neighbour square
+])
+def test_spots_straddling_a_grid_line_share(first, second):
+    assert cell_key(*first, 0.05) != cell_key(*second, 0.05)
+    plan = FetchPlan([(1, *first), (2, *second)], 0.05)
+    assert cells_of(plan) == {1: [1, 2]}
+    assert plan.fetch_point(2) == first
+
+
+def test_joins_the_nearest_fetch_point():
+    # Fetch points 0.09 apart can't share; spots between them join whichever is closer
+    plan = FetchPlan([(1, 0.0, 0.0), (2, 0.0, 0.09), (3, 0.0, 0.04), (4, 0.0, 0.05)], 0.05)
+    assert cells_of(plan) == {1: [1, 3], 2: [2, 4]}
+
+
+def test_cells_do_not_chain():
+    # 3 is within the grid of 2 but not of 2's fetch point (1), so it gets its own fetch
+    plan = FetchPlan([(1, 0.0, 0.0), (2, 0.0, 0.04), (3, 0.0, 0.08)], 0.05)
+    assert cells_of(plan) == {1: [1, 2], 3: [3]}
+
+
+def test_leader_is_lowest_id_regardless_of_input_order():
+    plan = FetchPlan([(9, 0.0, 0.01), (4, 0.0, 0.0)], 0.05)
+    assert cells_of(plan) == {4: [4, 9]}
+    assert plan.fetch_point(9) == (0.0, 0.0)
+
+
+def test_report():
+    plan = FetchPlan([(1, 0.0, 0.0), (2, 0.0, 0.01), (3, 0.0, 0.02), (4, 5.0, 5.0)], 0.05)
+    assert plan.report() == {'grid_degrees': 0.05, 'locations': 4, 'fetches': 2, 'calls_saved': 2,
+                             'shared_cells': 1, 'largest_cell': 3}
+    assert '2 fetches for 4 locations' in plan.summary()
+    assert FetchPlan([], 0.05).report()['largest_cell'] == 0
+
+
+def weather(swell_height=4.0, swell_dir=300, tide_height=1.2, hours=('0', '300')):
+    return [{
+        'date': '2026-10-18',
+        'hourly': [{'time': time, 'swellHeight_ft': str(swell_height), 'swellPeriod_secs': '14',
+                    'swellDir': str(swell_dir), 'windspeedMiles': '8', 'winddirDegree': '45'} for time in hours],
+        'tides': [{'tide_data': [{'tideHeight_mt': str(tide_height)}]}],
+    }]
+
+
+def test_compare_forecasts():
+    comparison = compare_forecasts(weather(), weather(swell_height=5.5, swell_dir=10, hours=('0', '300', '600')))
+    assert comparison['fields']['swellHeight_ft'] == (1.5, 1.5)
+    assert comparison['fields']['swellDir'] == (70, 70)  # around the circle, not 290
+    assert comparison['fields']['windspeedMiles'] == (0, 0)
+    assert comparison['missing'] == 5  # every field of the extra 600 row
+
+
+def test_validate_fetches_members_at_their_own_coordinates():
+    payloads = {
+        (0.0, 0.0): weather(),
+        (0.0, 0.01): weather(),                 # identical to its cell's forecast
+        (0.0, 0.02): weather(swell_height=6.0),
+        (1.0, 1.0): weather(swell_dir=350),
+        (1.0, 1.01): weather(swell_dir=10),
+        (9.0, 9.0): weather(),                  # alone in its cell: never fetched
+    }
+    fetched = []
+
+    def fetch_weather(lat, lng):
+        fetched.append((lat, lng))
+        return payloads[(lat, lng)]
+
+    plan = FetchPlan([(1, 0.0, 0.0), (2, 0.0, 0.01), (3, 0.0, 0.02), (4, 1.0, 1.0), (5, 1.0, 1.01), (6, 9.0, 9.0)], 0.05)
+    report = validate(plan, fetch_weather)
+    assert sorted(set(fetched)) == sorted(set(payloads) - {(9.0, 9.0)})
+    assert (report['spots'], report['identical']) == (3, 1)
+    assert report['fields']['swellHeight_ft'] == (2.0, 0.667)
+    assert report['fields']['swellDir'] == (20, 6.667)
+    assert report['worst'][0] == (2.0, 3)
+
+    fetched.clear()
+    assert validate(plan, fetch_weather, max_cells=1)['spots'] == 2
+    assert set(fetched) == {(0.0, 0.0), (0.0, 0.01), (0.0, 0.02)}
+
+
+def test_validate_counts_missing_payloads_as_different():
+    plan = FetchPlan([(1, 0.0, 0.0), (2, 0.0, 0.01)], 0.05)
+    report = validate(plan, lambda lat, lng: weather() if lng == 0.0 else None)
+    assert (report['spots'], report['identical']) == (1, 0)
@@ -0,0 +1,160 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import forecast_time
+from forecast_time import (
+    MAX_WINDOW_HOURS, ForecastWindow, apply_window, empty_is_not_found, from_now_window, parse_window,
+)
+
+# 20:30 UTC: 13:30 in Los Angeles (PDT), 10:30 in Honolulu
+NOW_UTC = datetime(2026, 10, 18, 20, 30, tzinfo=timezone.utc)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW_UTC.astimezone(tz)
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(forecast_time, 'datetime', FrozenDatetime)
+
+
+DEFAULT = ForecastWindow(datetime(2000, 1, 1), requested=False)
+
+
+def test_no_window_gives_default():
+    assert parse_window({}, 'Oahu', default=DEFAULT) is DEFAULT
+    assert parse_window({'fields': 'time'}, 'Oahu') is None
+
+
+@pytest.mark.parametrize('value', ['1', 'true', 'YES'])
+def test_all_asks_for_every_row(value):
+    assert parse_window({'all': value}, 'Oahu', default=DEFAULT, allow_all=True) is None
+
+
+def test_all_ignored_unless_allowed_or_set():
+    assert parse_window({'all': '1'}, 'Oahu', default=DEFAULT) is DEFAULT
+    assert parse_window({'all': '0'}, 'Oahu', default=DEFAULT, allow_all=True) is DEFAULT
+
+
+@pytest.mark.parametrize('args', [
+    {'all': '1', 'start': '2026-10-19'},
+    {'all': '1', 'end': '2026-10-19'},
+    {'all': '1', 'hours': '24'},
+])
+def test_all_with_window_is_rejected(args):
+    with pytest.raises(ValueError, match='either all or start/end/hours'):
+        parse_window(args, 'Oahu', default=DEFAULT, allow_all=True)
+
+
+def test_all_without_allow_all_still_takes_the_window():
+    window = parse_window({'all': '1', 'start': '2026-10-19'}, 'Oahu')
+    assert window.start == datetime(2026, 10, 19)
+
+
+@pytest.mark.parametrize('region, anchor', [
+    ('Oahu', datetime(2026, 10, 18, 10)),
+    ('Maui', datetime(2026, 10, 18, 10)),
+    ('WestCoast', datetime(2026, 10, 18, 13)),
+    ('Atlantis', datetime(2026, 10, 18, 13)),  # unknown regions use DEFAULT_TIMEZONE
+    (None, datetime(2026, 10, 18, 13)),
+])
+def test_from_now_uses_region_timezone(region, anchor):
+    window = from_now_window(region)
+    assert (window.start, window.end, window.from_now) == (anchor, None, True)
+    assert window.valid_seconds == 30 * 60 + 1
+    assert not window.requested
+
+
+def test_from_now_lookback():
+    assert from_now_window('Oahu', lookback_hours=3).start == datetime(2026, 10, 18, 7)
+
+
+def test_hours_count_from_current_hour_not_lookback():
+    window = parse_window({'hours': '24'}, 'Oahu', lookback_hours=3)
+    assert window.start == datetime(2026, 10, 18, 7)
+    assert window.end == datetime(2026, 10, 19, 10)
+    assert window.from_now and window.requested
+    assert window.valid_seconds == 30 * 60 + 1
+
+
+def test_hours_from_explicit_start():
+    window = parse_window({'start': '2026-10-20T06:00', 'hours': '6'}, 'Oahu', lookback_hours=3)
+    assert (window.start, window.end) == (datetime(2026, 10, 20, 6), datetime(2026, 10, 20, 12))
+    assert not window.from_now and window.valid_seconds is None
+
+
+@pytest.mark.parametrize('hours', ['1', str(MAX_WINDOW_HOURS)])
+def test_hours_bounds_accepted(hours):
+    window = parse_window({'start': '2026-10-20', 'hours': hours}, 'Oahu')
+    assert window.end - window.start == timedelta(hours=int(hours))
+
+
+@pytest.mark.parametrize('hours', ['0', '-5', str(MAX_WINDOW_HOURS + 1)])
+def test_hours_out_of_range(hours):
+    with pytest.raises(ValueError, match=f'between 1 and {MAX_WINDOW_HOURS}'):
+        parse_window({'hours': hours}, 'Oahu')
+
+
+def test_hours_not_an_integer():
+    with pytest.raises(ValueError, match='integer'):
+        parse_window({'hours': '2.5'}, 'Oahu')
+
+
+def test_end_and_hours_together():
+    with pytest.raises(ValueError, match='either end or hours'):
+        parse_window({'end': '2026-10-20', 'hours': '6'}, 'Oahu')
+
+
+def test_bare_end_date_includes_the_day():
+    window = parse_window({'start': '2026-10-19', 'end': '2026-10-19'}, 'Oahu')
+    assert (window.start, window.end) == (datetime(2026, 10, 19), datetime(2026, 10, 20))
+
+
+@pytest.mark.parametrize('args', [
+    {'start': '2026-10-20T06:00', 'end': '2026-10-20T06:00'},
+    {'start': '2026-10-20T06:00', 'end': '2026-10-20T05:00'},
+    {'start': '2026-10-21', 'end': '2026-10-19'},
+    {'end': '2026-10-18T09:00'},  # before the current Honolulu hour
+])
+def test_end_not_after_start(args):
+    with pytest.raises(ValueError, match='end must be after start'):
+        parse_window(args, 'Oahu')
+
+
+def test_end_without_start_runs_from_lookback():
+    window = parse_window({'end': '2026-10-18T12:00'}, 'Oahu', lookback_hours=3)
+    assert (window.start, window.end) == (datetime(2026, 10, 18, 7), datetime(2026, 10, 18, 12))
+
+
+@pytest.mark.parametrize('value, message', [
+    ('tomorrow', 'must be a date'),
+    ('2026-10-20T06:00+02:00', 'no UTC offset'),
+])
+def test_bad_start(value, message):
+    with pytest.raises(ValueError, match=message):
+        parse_window({'start': value}, 'Oahu')
+
+
+def test_empty_is_not_found():
+    assert empty_is_not_found(None)
+    assert empty_is_not_found(from_now_window('Oahu'))
+    assert not empty_is_not_found(parse_window({'hours': '6'}, 'Oahu'))
+
+
+def test_whole_day_window_sql():
+    window = ForecastWindow(datetime(2026, 10, 19), datetime(2026, 10, 21))
+    sql, params = apply_window('SELECT 1 WHERE location_id = %s', (7,), window, 'ts', 'date', date_as_text=True)
+    assert sql == 'SELECT 1 WHERE location_id = %s AND date >= %s AND date <= %s'
+    assert params == [7, '2026-10-19', '2026-10-20']
+
+
+def test_partial_day_window_sql():
+    window = ForecastWindow(datetime(2026, 10, 19, 6), datetime(2026, 10, 19, 18))
+    predicate, params = window.sql('ts', 'graph_date')
+    assert predicate == 'graph_date >= %s AND ts >= %s AND graph_date <= %s AND ts < %s'
+    assert params == [date(2026, 10, 19), datetime(2026, 10, 19, 6), date(2026, 10, 19), datetime(2026, 10, 19, 18)]
+    assert apply_window('Q', (), None, 'ts', 'graph_date') == ('Q', [])
@@ -0,0 +1,95 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from forecast_data import metres_to_feet
+from graph_binary import (
+    MAX_MINUTE_OFFSET, PACKED_HEADER, TIDE_TYPE_CODES, decode_packed, encode_packed,
+)
+
+
+def rows_over(days, step_minutes=180, start=date(2024, 3, 1)):
+    rows = []
+    moment = datetime.combine(start, time())
+    types = ['LOW', None, 'HIGH', None]
+    for n in range(days * 1440 // step_minutes):
+        rows.append((moment.date(), moment.time(), 0.1 * (n % 17) - 0.3, types[n % 4]))
+        moment += timedelta(minutes=step_minutes)
+    return rows
+
+
+def expected(rows):
+    return [(datetime.combine(graph_date, graph_time), metres_to_feet(height), tide_type)
+            for graph_date, graph_time, height, tide_type in rows]
+
+
+def test_packed_empty_rows():
+    body = encode_packed([])
+    assert len(body) == PACKED_HEADER.size
+    assert decode_packed(body) == []
+
+
+def test_packed_round_trip_across_days():
+    rows = rows_over(7)
+    assert decode_packed(encode_packed(rows)) == expected(rows)
+
+
+def test_packed_minutes_offset_from_earliest_date():
+    rows = [(date(2024, 3, 2), time(0, 30), 1.0, None), (date(2024, 3, 4), time(23, 59), 1.0, None)]
+    decoded = decode_packed(encode_packed(rows))
+    assert [moment for moment, _, _ in decoded] == [datetime(2024, 3, 2, 0, 30), datetime(2024, 3, 4, 23, 59)]
+
+
+def test_packed_rejects_span_past_uint16_minutes():
+    start = date(2024, 3, 1)
+    last_day = start + timedelta(days=MAX_MINUTE_OFFSET // 1440)
+    fits = [(start, time(0, 0), 1.0, None), (last_day, time(12, 0), 1.0, None)]
+    assert len(decode_packed(encode_packed(fits))) == 2
+
+    too_long = [(start, time(0, 0), 1.0, None), (start + timedelta(days=46), time(0, 0), 1.0, None)]
+    with pytest.raises(ValueError):
+        encode_packed(too_long)
+
+
+@pytest.mark.parametrize('metres', [0.0, -0.31, 0.123456, 1.5, 2.2865, 7.77])
+def test_packed_height_matches_json_rounding(metres):
+    rows = [(date(2024, 3, 1), time(6, 0), metres, None)]
+    (_, height, _), = decode_packed(encode_packed(rows))
+    assert height == metres_to_feet(metres)
+
+
+def test_packed_tide_type_codes():
+    rows = [(date(2024, 3, 1), time(hour, 0), 1.0, tide_type)
+            for hour, tide_type in enumerate(['LOW', 'HIGH', None, 'SLACK'])]
+    body = encode_packed(rows)
+    codes = [body[PACKED_HEADER.size + 7 * n + 6] for n in range(len(rows))]
+    assert codes == [TIDE_TYPE_CODES['LOW'], TIDE_TYPE_CODES['HIGH'], 0, 0]
+    assert [tide_type for _, _, tide_type in decode_packed(body)] == ['LOW', 'HIGH', None, None]
+
+
+def test_packed_rejects_bad_bodies():
+    body = encode_packed(rows_over(1))
+    with pytest.raises(ValueError):
+        decode_packed(b'XXXX' + body[4:])
+    with pytest.raises(ValueError):
+        decode_packed(body[:-1])
+
+
+def test_msgpack_matches_packed():
+    pytest.importorskip('msgpack')
+    from graph_binary import decode_msgpack, encode_msgpack
+
+    rows = rows_over(10, step_minutes=20)
+    assert decode_msgpack(encode_msgpack(rows)) == decode_packed(encode_packed(rows))
+    assert decode_msgpack(encode_msgpack([])) == []
+    with pytest.raises(ValueError):
+        encode_msgpack([(date(2024, 3, 1), time(0, 0), 1.0, None), (date(2024, 5, 1), time(0, 0), 1.0, None)])
+
+
+def test_msgpack_keeps_unknown_tide_types():
+    pytest.importorskip('msgpack')
+    from graph_binary import decode_msgpack, encode_msgpack
+
+    rows = [(date(2024, 3, 1), time(hour, 0), 1.0, tide_type)
+            for hour, tide_type in enumerate(['LOW', 'HIGH', None])]
+    assert [tide_type for _, _, tide_type in decode_msgpack(encode_msgpack(rows))] == ['LOW', 'HIGH', None]
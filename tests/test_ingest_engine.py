@@ -0,0 +1,100 @@
+import threading
+import time
+
+from ingest_engine import run_ingest
+
+
+def locations(count):
+    return [(location_id, 20.0 + location_id / 100, -158.0) for location_id in range(1, count + 1)]
+
+
+def ingest_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('ingest-')]
+
+
+def run_in_background(*args, **kwargs):
+    """run_ingest on its own thread -> (thread, {'stats': IngestStats once it returns})."""
+    outcome = {}
+    thread = threading.Thread(target=lambda: outcome.update(stats=run_ingest(*args, **kwargs)))
+    thread.start()
+    return thread, outcome
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def test_counts_fetch_and_write_failures():
+    def fetch(location):
+        location_id = location[0]
+        if location_id % 10 == 0:
+            raise ConnectionError('refused')
+        return None if location_id % 10 == 1 else {'weather': location_id}
+
+    written = []
+
+    def write(location_id, result):
+        assert result == {'weather': location_id}
+        if location_id % 10 == 2:
+            raise RuntimeError('insert failed')
+        if location_id % 10 == 3:
+            return False  # a writer that printed its own error
+        written.append(location_id)
+        return None if location_id % 2 else True
+
+    stats = run_ingest(locations(100), fetch, write, parallelism=4, writers=3, queue_size=2)
+    assert (stats.fetched, stats.fetch_errors) == (80, 20)
+    assert (stats.written, stats.write_errors) == (60, 20)
+    assert sorted(written) == [n for n in range(1, 101) if n % 10 not in (0, 1, 2, 3)]
+    assert '60 locations written' in stats.summary() and '20 write errors' in stats.summary()
+    assert ingest_threads() == []
+
+
+def test_every_write_failing_still_shuts_down():
+    def write(location_id, result):
+        raise RuntimeError('database down')
+
+    thread, outcome = run_in_background(locations(50), lambda location: location, write,
+                                        parallelism=4, writers=2, queue_size=1)
+    thread.join(10)
+    assert not thread.is_alive()
+    stats = outcome['stats']
+    assert (stats.fetched, stats.written, stats.write_errors) == (50, 0, 50)
+    assert ingest_threads() == []
+
+
+def test_full_queue_holds_fetchers_back():
+    parallelism, queue_size = 3, 2
+    release = threading.Event()
+    fetches = []
+    fetch_lock = threading.Lock()
+
+    def fetch(location):
+        with fetch_lock:
+            fetches.append(location[0])
+        return location
+
+    def slow_write(location_id, result):
+        release.wait(10)
+
+    thread, outcome = run_in_background(locations(40), fetch, slow_write,
+                                        parallelism=parallelism, writers=1, queue_size=queue_size)
+    # One result in the stalled writer, queue_size queued and one held by each blocked fetcher
+    limit = 1 + queue_size + parallelism
+    wait_for(lambda: len(fetches) == limit)
+    time.sleep(0.05)
+    assert len(fetches) == limit
+
+    release.set()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert outcome['stats'].written == 40
+    assert ingest_threads() == []
+
+
+def test_no_locations():
+    stats = run_ingest([], lambda location: location, lambda location_id, result: True)
+    assert (stats.fetched, stats.written, stats.locations_per_sec) == (0, 0, 0.0)
@@ -0,0 +1,249 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import marine_client
+from marine_client import (
+    MARINE_BACKOFF_MAX_SECONDS, CircuitBreaker, CircuitOpenError, MarineClient, RateLimiter, backoff_seconds,
+)
+
+
+class FakeTime:
+    """Stands in for marine_client's time module: sleep() advances the clock instead of waiting."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = monotonic
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, data=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    """Answers each get() with the next scripted outcome: a FakeResponse, a status code or an exception."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(params)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome if isinstance(outcome, FakeResponse) else FakeResponse(outcome)
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(marine_client, 'time', fake)
+    # Full jitter at its ceiling, so backoff sleeps are predictable
+    monkeypatch.setattr(marine_client.random, 'uniform', lambda low, high: high)
+    return fake
+
+
+def make_client(session, max_retries=3, breaker=None, rate_per_sec=0, cache=None):
+    client = MarineClient('http://marine.test/marine.ashx', max_retries=max_retries,
+                          breaker=breaker or CircuitBreaker(failures=100, reset_seconds=60),
+                          rate_per_sec=rate_per_sec, cache=cache)
+    client._local.session = session
+    return client
+
+
+def test_backoff_doubles_up_to_cap(fake_time):
+    assert [backoff_seconds(attempt, base=0.5, cap=3) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3, 3]
+
+
+def test_backoff_is_jittered_below_ceiling():
+    for _ in range(100):
+        assert 0 <= backoff_seconds(3, base=0.5, cap=20) <= 2.0
+
+
+def test_retries_5xx_with_backoff(fake_time):
+    session = FakeSession(503, 502, 200)
+    client = make_client(session)
+    assert client.get({'q': '1,2'}).status_code == 200
+    assert len(session.calls) == 3
+    assert fake_time.sleeps == [0.5, 1.0]
+    assert client.latency.snapshot()['outcomes'] == {503: 1, 502: 1, 200: 1}
+
+
+def test_honours_retry_after(fake_time):
+    session = FakeSession(FakeResponse(429, {'Retry-After': '7'}), FakeResponse(429, {'Retry-After': '9999'}),
+                          FakeResponse(429, {'Retry-After': 'Wed, 21 Oct 2026 07:28:00 GMT'}), 200)
+    assert make_client(session).get({'q': '1,2'}).status_code == 200
+    # An HTTP-date Retry-After isn't parsed, so that retry falls back to the backoff
+    assert fake_time.sleeps == [7.0, MARINE_BACKOFF_MAX_SECONDS, 2.0]
+
+
+def test_returns_last_error_after_retries(fake_time):
+    session = FakeSession(500, 500, 500)
+    assert make_client(session, max_retries=2).get({'q': '1,2'}).status_code == 500
+    assert len(session.calls) == 3
+    assert len(fake_time.sleeps) == 2  # no sleep after the last attempt
+
+
+def test_other_errors_are_not_retried(fake_time):
+    session = FakeSession(404)
+    assert make_client(session).get({'q': '1,2'}).status_code == 404
+    assert len(session.calls) == 1 and fake_time.sleeps == []
+
+
+def test_connection_errors_retried_then_raised(fake_time):
+    session = FakeSession(requests.ConnectionError('refused'), 200)
+    assert make_client(session).get({'q': '1,2'}).status_code == 200
+
+    session = FakeSession(*[requests.Timeout('slow')] * 3)
+    with pytest.raises(requests.Timeout):
+        make_client(session, max_retries=2).get({'q': '1,2'})
+    assert len(session.calls) == 3
+
+
+def test_breaker_opens_after_consecutive_failures(fake_time):
+    breaker = CircuitBreaker(failures=3, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # a success resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+    fake_time.now += 59.9
+    assert breaker.state == 'open' and not breaker.allow()
+
+
+def test_breaker_half_open_allows_one_trial(fake_time):
+    breaker = CircuitBreaker(failures=1, reset_seconds=60)
+    breaker.record_failure()
+    fake_time.now += 60
+    assert breaker.state == 'half-open'
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial while it runs
+
+    breaker.record_failure()  # the trial failed: open for another reset period
+    assert breaker.state == 'open' and not breaker.allow()
+    fake_time.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_circuit_fails_fast(fake_time):
+    breaker = CircuitBreaker(failures=2, reset_seconds=60)
+    session = FakeSession(503, 503)
+    client = make_client(session, breaker=breaker)
+    with pytest.raises(CircuitOpenError):
+        client.get({'q': '1,2'})
+    assert len(session.calls) == 2
+
+    with pytest.raises(CircuitOpenError):
+        client.get({'q': '3,4'})
+    assert len(session.calls) == 2
+
+    fake_time.now += 60
+    session.outcomes.append(200)
+    assert client.get({'q': '3,4'}).status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_rate_limiter_spaces_requests(fake_time):
+    limiter = RateLimiter(2)
+    limiter.acquire()
+    limiter.acquire()
+    limiter.acquire()
+    assert fake_time.sleeps == [0.5, 0.5]
+
+    fake_time.now += 10  # idle time refills no more than the burst
+    limiter.acquire()
+    limiter.acquire()
+    assert fake_time.sleeps == [0.5, 0.5, 0.5]
+
+
+def test_rate_limiter_burst(fake_time):
+    limiter = RateLimiter(4, burst=3)
+    fake_time.now += 1
+    for _ in range(3):
+        limiter.acquire()
+    assert fake_time.sleeps == []
+    limiter.acquire()
+    assert fake_time.sleeps == [0.25]
+
+
+def test_rate_limiter_zero_is_unlimited(fake_time):
+    limiter = RateLimiter(0)
+    for _ in range(100):
+        limiter.acquire()
+    assert fake_time.sleeps == []
+
+
+def test_rate_limiter_shared_across_threads():
+    limiter = RateLimiter(200)
+    started = time.monotonic()
+    threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(10)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    # 40 requests at 200/s with a burst of one take at least 39 intervals
+    assert time.monotonic() - started >= 39 / 200 * 0.95
+
+
+def test_every_attempt_waits_for_the_rate_limit(fake_time):
+    session = FakeSession(503, 200)
+    client = make_client(session, rate_per_sec=1)
+    client.get({'q': '1,2'})
+    # The retry waits for its backoff and then for its token: 0.5 s of backoff, 0.5 s more for the rate
+    assert fake_time.sleeps == [0.5, 0.5]
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, endpoint, lat, lng, params):
+        return self.entries.get((lat, lng))
+
+    def put(self, endpoint, lat, lng, params, data):
+        self.entries[(lat, lng)] = data
+
+    def summary(self):
+        return f'{len(self.entries)} cached'
+
+
+def test_cached_answers_skip_http_and_rate_limit(fake_time, monkeypatch):
+    monkeypatch.setenv('API_KEY', 'secret')
+    payload = {'data': {'weather': [{'date': '2026-10-18'}]}}
+    session = FakeSession(FakeResponse(200, data=payload), FakeResponse(200, data={'data': {'error': [{}]}}))
+    client = make_client(session, rate_per_sec=1, cache=DictCache())
+
+    assert client.weather(21.66, -158.05) == payload['data']['weather']
+    assert client.weather(21.66, -158.05) == payload['data']['weather']
+    assert len(session.calls) == 1 and fake_time.sleeps == []
+    assert session.calls[0]['key'] == 'secret' and session.calls[0]['q'] == '21.66,-158.05'
+
+    # Errors the API reports with a 200 are not cached
+    assert client.weather(20.0, -156.0) is None
+    assert client.cache.entries.keys() == {(21.66, -158.05)}
+    assert fake_time.sleeps == [1.0]
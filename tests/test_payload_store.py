@@ -0,0 +1,113 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+import app
+import payload_store
+
+LOCATION = {'id': 7, 'region': 'Oahu'}
+UPDATED_AT = datetime(2026, 10, 18, 1, 0)
+
+
+def surf_rows(count):
+    start = date(2026, 10, 18)
+    return [(n + 1, 7, (start + timedelta(days=n // 8)).isoformat(), '06:45 AM', '06:10 PM', str(n % 8 * 300),
+             61.0 + n % 3, 12.5, n * 7 % 360, 'NW', 'Partly "cloudy" ☀', 4.2 + n / 10, n * 11 % 360,
+             'WNW', 13.0)
+            for n in range(count)]
+
+
+def tide_rows(count):
+    return [(n + 1, 7, f'{n % 24:02d}:30', -0.12 + n / 100, ('LOW', 'HIGH')[n % 2], date(2026, 10, 18) + timedelta(days=n // 4))
+            for n in range(count)]
+
+
+def graph_rows(count):
+    return [(n + 1, 7, time(n // 3 % 24, n * 20 % 60), Decimal('0.35') + Decimal(n % 40) / 100, ('LOW', None, 'HIGH')[n % 3])
+            for n in range(count)]
+
+
+class FakeCursor:
+    """Answers the payload renderer's and the live routes' queries from fixed rows, by table."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.rows = []
+        self.stored = {}
+
+    def execute(self, sql, params=()):
+        if 'INSERT INTO response_payloads' in sql:
+            location_id, kind, source, body, body_gzip = params
+            self.stored[kind] = body
+            self.rows = []
+            return
+        table = next((name for name in self.tables if f'FROM {name}' in sql), None)
+        self.rows = list(self.tables[table]) if table else []
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchone(self):
+        return self.fetchmany(1)[0] if self.rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    autocommit = False
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def cursor(self, name=None):
+        return FakeCursor(self.tables)
+
+
+@pytest.fixture
+def tables():
+    return {
+        'ingest_versions': [('surf', 3, UPDATED_AT), ('tide', 3, UPDATED_AT), ('graph', 2, UPDATED_AT)],
+        'surf_data': surf_rows(1100),
+        'tide_data': tide_rows(60),
+        'graph_points': graph_rows(1300),
+    }
+
+
+@pytest.fixture
+def client(monkeypatch, tables):
+    # No ETags and no current pre-rendered bodies: every request runs the live query
+    monkeypatch.setattr(app.location_registry, 'get', lambda location_id: LOCATION)
+    monkeypatch.setattr(app.ingest_versions, 'etag', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app.ingest_versions, 'source', lambda *args, **kwargs: None)
+    monkeypatch.setattr(app, 'get_db_connection', lambda: FakeConnection(tables))
+    monkeypatch.setattr(app, 'release_db_connection', lambda conn: None)
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize('kind, path', [
+    ('surf', '/surf/7?all=1'),
+    ('tide', '/tide-data/7?all=1'),
+    ('graph', '/graph-points/7?all=1'),
+])
+def test_prerendered_body_matches_live_route(client, tables, kind, path):
+    cursor = FakeCursor(tables)
+    assert payload_store.render_location_payloads(cursor, LOCATION, 1) == 3
+    assert 'combined' not in cursor.stored  # no score version yet
+
+    response = client.get(path, headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert response.get_data() == cursor.stored[kind]
+
+
+def test_empty_series_is_not_rendered(tables):
+    tables['tide_data'] = []
+    cursor = FakeCursor(tables)
+    assert payload_store.render_location_payloads(cursor, LOCATION, 1) == 2
+    assert sorted(cursor.stored) == ['graph', 'surf']
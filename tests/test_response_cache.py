@@ -0,0 +1,68 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from response_cache import ResponseCache, cache_key
+
+ENDPOINT = 'http://api.example/marine.ashx'
+PARAMS = {'key': 'secret', 'q': '21.66,-158.05', 'tide': 'yes'}
+
+
+def entry_path(cache):
+    return cache._path(cache_key(ENDPOINT, 21.66, -158.05, PARAMS))
+
+
+def test_round_trip_and_key_ignores_api_key(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put(ENDPOINT, 21.66, -158.05, PARAMS, {'data': {'weather': [1, 2]}})
+    assert cache.get(ENDPOINT, 21.66, -158.05, dict(PARAMS, key='other')) == {'data': {'weather': [1, 2]}}
+    assert cache.get(ENDPOINT, 21.66, -158.05, dict(PARAMS, date='2024-01-01')) is None
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+
+def test_expired_entry_is_removed(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=-1)
+    cache.put(ENDPOINT, 21.66, -158.05, PARAMS, {'x': 1})
+    assert cache.get(ENDPOINT, 21.66, -158.05, PARAMS) is None
+    assert cache.stats['expired'] == 1
+    assert not os.path.exists(entry_path(cache))
+
+
+@pytest.mark.parametrize('document', [
+    [1, 2], 'text', None, {'data': 1}, {'fetched_at': 1}, {'fetched_at': 'soon', 'data': 1},
+    {'fetched_at': None, 'data': 1},
+])
+def test_wrongly_shaped_entry_is_a_miss(tmp_path, document):
+    cache = ResponseCache(str(tmp_path))
+    path = entry_path(cache)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(json.dumps(document).encode()))
+    assert cache.get(ENDPOINT, 21.66, -158.05, PARAMS) is None
+    assert cache.stats['errors'] == 1
+    assert not os.path.exists(path)
+
+
+def test_corrupt_file_is_a_miss(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    path = entry_path(cache)
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'not gzip')
+    assert cache.get(ENDPOINT, 21.66, -158.05, PARAMS) is None
+    assert cache.stats['errors'] == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 ** 9)
+    for n in range(3):
+        cache.put(ENDPOINT, n, 0, {}, {'n': n, 'pad': 'x' * 200})
+        os.utime(cache._path(cache_key(ENDPOINT, n, 0, {})), (1000 + n, 1000 + n))
+    cache.get(ENDPOINT, 0, 0, {})  # 0 becomes the most recently used
+    cache.max_bytes = sum(cache._sizes.values()) - 1
+    cache.put(ENDPOINT, 3, 0, {}, {'n': 3})
+    assert cache.get(ENDPOINT, 1, 0, {}) is None
+    assert cache.get(ENDPOINT, 0, 0, {}) == {'n': 0, 'pad': 'x' * 200}
+    assert cache.stats['evictions'] >= 1
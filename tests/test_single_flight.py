@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import single_flight
+from single_flight import AsyncSingleFlight, CoalescingMetrics, SingleFlight, refresh_early
+
+CALLERS = 8
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(single_flight, 'time', clock)
+    return clock
+
+
+def set_random(monkeypatch, value):
+    monkeypatch.setattr(single_flight, 'random', SimpleNamespace(random=lambda: value))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def run_callers(flight, fetch):
+    """get('key', fetch) from CALLERS threads at once -> [(value or exception)]."""
+    outcomes = [None] * CALLERS
+
+    def call(n):
+        try:
+            outcomes[n] = flight.get('key', fetch)
+        except Exception as e:
+            outcomes[n] = e
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_fetch():
+    metrics = CoalescingMetrics()
+    flight = SingleFlight('combined', metrics, ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {'rows': 3}
+
+    threads, outcomes = run_callers(flight, fetch)
+    # Hold the fetch until every other caller is waiting on it
+    wait_for(lambda: metrics.snapshot().get('combined', {}).get('coalesced') == CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert outcomes == [{'rows': 3}] * CALLERS
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    stats = metrics.snapshot()['combined']
+    assert (stats['fetches'], stats['coalesced'], stats['errors']) == (1, CALLERS - 1, 0)
+    assert stats['queries_saved'] == CALLERS - 1
+
+    assert flight.get('key', fetch) == {'rows': 3}
+    assert len(calls) == 1 and metrics.snapshot()['combined']['cache_hits'] == 1
+
+
+def test_error_reaches_every_waiter_and_is_not_kept():
+    metrics = CoalescingMetrics()
+    flight = SingleFlight('combined', metrics, ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def failing_fetch():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError('database went away')
+
+    threads, outcomes = run_callers(flight, failing_fetch)
+    wait_for(lambda: metrics.snapshot().get('combined', {}).get('coalesced') == CALLERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert metrics.snapshot()['combined']['errors'] == 1
+
+    # Nothing was kept, so the next call fetches again
+    assert flight.get('key', lambda: 'recovered') == 'recovered'
+    assert metrics.snapshot()['combined']['fetches'] == 2
+
+
+def test_result_kept_until_ttl(clock, monkeypatch):
+    set_random(monkeypatch, 0.0)  # -log(1) = 0: never refresh early
+    flight = SingleFlight('scores', CoalescingMetrics(), ttl=5)
+    values = iter(['first', 'second'])
+    fetch = lambda: next(values)
+
+    assert flight.get('key', fetch) == 'first'
+    clock.now += 4.9
+    assert flight.get('key', fetch) == 'first'
+    clock.now += 0.1
+    assert flight.get('key', fetch) == 'second'
+
+
+def test_keys_evicted_least_recently_used(clock):
+    flight = SingleFlight('scores', CoalescingMetrics(), ttl=60, max_entries=2)
+    flight.get('a', lambda: 'a1')
+    flight.get('b', lambda: 'b1')
+    flight.get('a', lambda: 'unused')  # a is now the most recently used
+    flight.get('c', lambda: 'c1')
+    assert flight.get('a', lambda: 'a2') == 'a1'
+    assert flight.get('b', lambda: 'b2') == 'b2'
+
+
+@pytest.mark.parametrize('random_value, expected', [
+    (0.0, False),          # -log(1) = 0: only at expiry
+    (0.5, False),          # 2 s * 0.69 before expiry: not yet 3 s out
+    (1 - 1e-3, True),      # 2 s * 6.9: well within reach
+])
+def test_refresh_early_probability(monkeypatch, random_value, expected):
+    set_random(monkeypatch, random_value)
+    assert refresh_early(expires=100.0, fetch_seconds=2.0, now=97.0, beta=1.0) is expected
+
+
+def test_refresh_early_at_expiry_and_beta_zero(monkeypatch):
+    set_random(monkeypatch, 1 - 1e-9)
+    assert refresh_early(expires=100.0, fetch_seconds=2.0, now=100.0)
+    assert not refresh_early(expires=100.0, fetch_seconds=2.0, now=99.0, beta=0.0)
+
+
+def test_early_refresh_runs_once_and_others_keep_old_value(clock, monkeypatch):
+    metrics = CoalescingMetrics()
+    flight = SingleFlight('combined', metrics, ttl=10, beta=1.0)
+
+    def slow_fetch(value):
+        def fetch():
+            clock.now += 2.0  # fetch_seconds = 2
+            return value
+        return fetch
+
+    assert flight.get('key', slow_fetch('old')) == 'old'  # expires at now + 10
+    set_random(monkeypatch, 0.0)
+    clock.now += 5
+    assert flight.get('key', slow_fetch('unused')) == 'old'
+
+    set_random(monkeypatch, 1 - 1e-3)  # refresh while the entry is still valid
+    seen_during_refresh = []
+
+    def refresh():
+        seen_during_refresh.append(flight.get('key', slow_fetch('unused')))
+        return slow_fetch('new')()
+
+    assert flight.get('key', refresh) == 'new'
+    assert seen_during_refresh == ['old']
+    stats = metrics.snapshot()['combined']
+    assert (stats['fetches'], stats['early_refreshes'], stats['cache_hits']) == (2, 1, 2)
+    set_random(monkeypatch, 0.0)
+    assert flight.get('key', slow_fetch('unused')) == 'new'
+
+
+def test_async_callers_share_one_fetch():
+    metrics = CoalescingMetrics()
+    flight = AsyncSingleFlight('combined', metrics, ttl=60)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'body'
+
+    async def main():
+        return await asyncio.gather(*(flight.get('key', fetch) for _ in range(CALLERS)))
+
+    assert asyncio.run(main()) == ['body'] * CALLERS
+    assert len(calls) == 1
+    assert metrics.snapshot()['combined']['coalesced'] == CALLERS - 1
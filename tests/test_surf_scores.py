@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from surf_scores import (
+    SWELL_UNKNOWN_WINDOW, degrees_outside_range, in_circular_range, score_arrays,
+)
+
+NAN = np.nan
+
+
+def bearings(*values):
+    return np.array(values, dtype=float)
+
+
+def test_in_range_plain_window():
+    assert in_circular_range(bearings(180, 200, 220, 179, 221), 180, 220).tolist() == [True, True, True, False, False]
+
+
+def test_in_range_wraps_through_north():
+    result = in_circular_range(bearings(285, 300, 359, 0, 20, 40, 41, 200, 284), 285, 40)
+    assert result.tolist() == [True, True, True, True, True, True, False, False, False]
+
+
+def test_in_range_edges_are_inclusive():
+    assert in_circular_range(bearings(285, 40), 285, 40).tolist() == [True, True]
+    assert in_circular_range(bearings(0, 360), 0, 0).tolist() == [True, True]
+
+
+def test_in_range_nan_bounds_and_bearings():
+    assert not in_circular_range(bearings(100), NAN, 200).any()
+    assert not in_circular_range(bearings(100), 50, NAN).any()
+    assert not in_circular_range(bearings(NAN), 50, 200).any()
+
+
+def test_degrees_outside_plain_window():
+    assert degrees_outside_range(bearings(200, 170, 230, 0), 180, 220).tolist() == [0, 10, 10, 140]
+
+
+def test_degrees_outside_wrapping_window():
+    # 285-40 covers north; 60 is 20 past the high edge, 270 is 15 short of the low edge
+    assert degrees_outside_range(bearings(0, 285, 40, 60, 270, 162.5), 285, 40).tolist() == [0, 0, 0, 20, 15, 122.5]
+
+
+def test_degrees_outside_nan_preferences():
+    assert np.isnan(degrees_outside_range(bearings(100), NAN, NAN)).all()
+
+
+def preferences(rows, **columns):
+    defaults = {
+        'preferred_wind_dir_min': NAN, 'preferred_wind_dir_max': NAN,
+        'preferred_swell_dir_min': NAN, 'preferred_swell_dir_max': NAN,
+        'bad_swell_dir_min': NAN, 'bad_swell_dir_max': NAN, 'wavecalc': NAN,
+    }
+    defaults.update(columns)
+    spread = {column: np.full(rows, value, dtype=float) for column, value in defaults.items()}
+    spread['reef'] = np.zeros(rows, dtype=bool)
+    return spread
+
+
+def swell_quality(swell_dirs, **columns):
+    swell_dir = bearings(*swell_dirs)
+    rows = len(swell_dir)
+    scores = score_arrays(np.full(rows, 5.0), swell_dir, np.full(rows, 14.0), np.zeros(rows),
+                          np.zeros(rows), preferences(rows, **columns))
+    return scores['swell_quality'].tolist()
+
+
+def test_bad_window_applies_without_preferred_window():
+    quality = swell_quality([170, 300], bad_swell_dir_min=150, bad_swell_dir_max=200)
+    assert quality == [0.0, SWELL_UNKNOWN_WINDOW]
+
+
+def test_preferred_window_wins_where_windows_overlap():
+    quality = swell_quality([290, 10, 60, 120],
+                            preferred_swell_dir_min=285, preferred_swell_dir_max=40,
+                            bad_swell_dir_min=0, bad_swell_dir_max=90)
+    assert quality[:2] == [1.0, 1.0]
+    assert quality[2:] == [0.0, pytest.approx(0.4)]
+
+
+def test_wrapping_bad_window():
+    quality = swell_quality([350, 10, 180], bad_swell_dir_min=340, bad_swell_dir_max=20)
+    assert quality == [0.0, 0.0, SWELL_UNKNOWN_WINDOW]